@@ -0,0 +1,213 @@
+"""
+Batch scoring of interview answers
+Scores many answers at once: the batch is joined into one string that each
+feature scans in a single pass, the features form an (answers x features)
+matrix, and the scores are one weighted sum clipped to the 1-10 scale.
+The default features and weights reproduce score_answer_quality exactly.
+"""
+
+import re
+from bisect import bisect_right
+
+import numpy as np
+
+SEPARATOR = "\x00"
+
+# First code point after ASCII that can be a decimal digit (ARABIC-INDIC ZERO)
+FIRST_NON_ASCII_DIGIT = 0x660
+
+
+class AnswerBatch:
+    """
+    Answers joined into one string, plus values several features share
+
+    Answer i occupies joined[starts[i]:starts[i + 1] - 1]; answers are
+    separated by a NUL character. Every value is computed on first use.
+    """
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self._joined = {}
+        self._word_counts = None
+        self._codes = None
+
+    def __len__(self):
+        return len(self.answers)
+
+    def joined(self, lowercase=False):
+        """(joined text, start offset of every answer), built once per batch"""
+        if lowercase not in self._joined:
+            texts = [a.lower() for a in self.answers] if lowercase else self.answers
+            starts = [0]
+            for t in texts:
+                starts.append(starts[-1] + len(t) + 1)
+            self._joined[lowercase] = (SEPARATOR.join(texts), starts)
+        return self._joined[lowercase]
+
+    def answer_index(self, positions, lowercase=False):
+        """Which answer each position of the joined text belongs to"""
+        starts = self.joined(lowercase)[1]
+        return np.searchsorted(starts, positions, side="right") - 1
+
+    @property
+    def word_counts(self):
+        if self._word_counts is None:
+            self._word_counts = np.fromiter((len(a.split()) for a in self.answers),
+                                            dtype=np.int64, count=len(self.answers))
+        return self._word_counts
+
+    @property
+    def codes(self):
+        """The joined text as an array of code points"""
+        if self._codes is None:
+            text = self.joined()[0]
+            self._codes = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+        return self._codes
+
+
+class Feature:
+    """
+    One column of the feature matrix
+
+    extract(batch) returns a numeric array with one value per answer;
+    the value is multiplied by weight and added to the score.
+    """
+
+    def __init__(self, name, weight, extract):
+        self.name = name
+        self.weight = weight
+        self.extract = extract
+
+
+def _mark_answers(batch, find, lowercase):
+    """
+    Flag answers in which find(text, pos) reports a match
+    After a hit the scan jumps to the next answer, so every answer is
+    scanned at most once per feature.
+    """
+    text, starts = batch.joined(lowercase)
+    found = np.zeros(len(batch), dtype=np.int64)
+    position = find(text, 0)
+    while position is not None:
+        answer = bisect_right(starts, position) - 1
+        found[answer] = 1
+        position = find(text, starts[answer + 1])
+    return found
+
+
+def pattern_feature(name, weight, pattern, lowercase=False):
+    """
+    1 for answers that match a regex anywhere, else 0
+    The regex runs over the joined batch, so it must not match the NUL
+    separator or rely on ^ / $ anchors.
+    """
+    search = re.compile(pattern).search
+
+    def find(text, pos):
+        match = search(text, pos)
+        return match.start() if match else None
+
+    return Feature(name, weight, lambda batch: _mark_answers(batch, find, lowercase))
+
+
+def digit_feature(name, weight):
+    """
+    1 for answers containing a decimal digit (what re's \\d matches)
+    Checked on the code point array: ASCII digits by range, other decimal
+    digits by looking up the distinct non-ASCII code points once.
+    """
+    def extract(batch):
+        codes = batch.codes
+        is_digit = (codes - 48) < 10  # unsigned: wraps around below '0'
+        high = codes[codes >= FIRST_NON_ASCII_DIGIT]
+        if len(high):
+            other_digits = [c for c in np.unique(high).tolist() if chr(c).isdecimal()]
+            if other_digits:
+                is_digit |= np.isin(codes, other_digits)
+        found = np.zeros(len(batch), dtype=np.int64)
+        found[batch.answer_index(np.flatnonzero(is_digit))] = 1
+        return found
+
+    return Feature(name, weight, extract)
+
+
+def keyword_feature(name, weight, keywords):
+    """1 for answers containing any keyword as a substring, ignoring case"""
+    keywords = [k.lower() for k in keywords]
+
+    def find_keyword(keyword):
+        def find(text, pos):
+            position = text.find(keyword, pos)
+            return None if position == -1 else position
+        return find
+
+    # One linear str.find scan per keyword beats a regex alternation
+    finders = [find_keyword(k) for k in keywords]
+
+    def extract(batch):
+        found = np.zeros(len(batch), dtype=np.int64)
+        for find in finders:
+            found |= _mark_answers(batch, find, lowercase=True)
+        return found
+
+    return Feature(name, weight, extract)
+
+
+def word_count_feature(name, weight, minimum=None, maximum=None):
+    """1 for answers with fewer than `minimum` or more than `maximum` words"""
+    def extract(batch):
+        counts = batch.word_counts
+        if minimum is not None:
+            return (counts < minimum).astype(np.int64)
+        return (counts > maximum).astype(np.int64)
+
+    return Feature(name, weight, extract)
+
+
+EXAMPLE_MARKERS = ['example', 'instance', 'specifically', 'when i']
+STRUCTURE_WORDS = ['first', 'then', 'finally', 'resulted']
+
+DEFAULT_FEATURES = [
+    word_count_feature('short', -2, minimum=20),
+    word_count_feature('long', 1, maximum=50),
+    keyword_feature('examples', 1, EXAMPLE_MARKERS),
+    digit_feature('numbers', 1),
+    keyword_feature('structure', 1, STRUCTURE_WORDS),
+]
+
+
+class AnswerScorer:
+    """Weighted feature scoring: clip(base + features @ weights, low, high)"""
+
+    def __init__(self, features=None, base=5, low=1, high=10):
+        self.features = list(DEFAULT_FEATURES if features is None else features)
+        self.base = base
+        self.low = low
+        self.high = high
+
+    @property
+    def weights(self):
+        return np.array([feature.weight for feature in self.features])
+
+    def feature_matrix(self, answers):
+        """(answers x features) matrix of raw feature values"""
+        batch = answers if isinstance(answers, AnswerBatch) else AnswerBatch(answers)
+        if not self.features:
+            return np.zeros((len(batch), 0), dtype=np.int64)
+        return np.column_stack([feature.extract(batch) for feature in self.features])
+
+    def score_many(self, answers):
+        """Scores for a list of answers, as an array"""
+        matrix = self.feature_matrix(answers)
+        return np.clip(self.base + matrix @ self.weights, self.low, self.high)
+
+    def score(self, answer):
+        return self.score_many([answer])[0].item()
+
+
+_default_scorer = AnswerScorer()
+
+
+def score_answers(answers):
+    """Score a batch of answers with the default features, as a list of ints"""
+    return _default_scorer.score_many(answers).tolist()
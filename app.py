@@ -1,5 +1,4 @@
 import streamlit as st
-from utils import *
 
 st.set_page_config(page_title="AI Interview Coach", page_icon="🎯", layout="wide")
 
@@ -12,7 +11,7 @@ st.markdown("# 🎯 AI Interview Coach")
 st.markdown("### Prepare for your dream job with AI-powered interview preparation!")
 
 st.sidebar.title("📋 Navigation")
-page = st.sidebar.radio("Choose a feature:", [
+pages = [
     "🏠 Home",
     "🔍 Browse Sample Jobs",
     "📝 Job Description Analyzer",
@@ -21,7 +20,11 @@ page = st.sidebar.radio("Choose a feature:", [
     "📄 Resume Analyzer",
     "✍️ Cover Letter Generator",
     "⭐ STAR Method Examples"
-])
+]
+# Hidden page for operators, opened with ?diagnostics=1
+if st.query_params.get("diagnostics") == "1":
+    pages.append("🩺 Diagnostics")
+page = st.sidebar.radio("Choose a feature:", pages)
 
 if page == "🏠 Home":
     st.write("---")
@@ -54,31 +57,49 @@ elif page == "🔍 Browse Sample Jobs":
     st.markdown("## 🔍 Browse Sample Jobs")
     st.info("💡 Data Collection Demo: Pre-collected job descriptions demonstrating data gathering capabilities")
     
-    from scraper import search_jobs, preprocess_job_for_analysis, extract_key_info
+    from scraper import search_jobs, count_jobs, get_job_artifacts
     
     if 'selected_job_desc' not in st.session_state:
         st.session_state.selected_job_desc = ""
     
     # Auto-load all jobs without search bar
-    with st.spinner("Loading sample jobs..."):
-        jobs = search_jobs(query="", location="")
+    total_jobs = count_jobs(query="", location="")
     
-    st.success(f"✅ Showing {len(jobs)} sample job postings")
+    col1, col2 = st.columns(2)
+    with col1:
+        page_size = st.selectbox("Jobs per page:", [10, 25, 50], index=0)
+    with col2:
+        n_pages = max(1, -(-total_jobs // page_size))
+        page_number = st.number_input(f"Page (of {n_pages}):", min_value=1, max_value=n_pages, value=1)
+    
+    # Only the current page is fetched and rendered
+    offset = (page_number - 1) * page_size
+    jobs = search_jobs(query="", location="", offset=offset, limit=page_size)
+    
+    st.success(f"✅ Showing {offset + 1}-{offset + len(jobs)} of {total_jobs} sample job postings")
     
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Jobs Available", len(jobs))
+        st.metric("Jobs Available", total_jobs)
     with col2:
-        avg_length = sum(len(j['description']) for j in jobs) // len(jobs)
-        st.metric("Avg Length", f"{avg_length} chars")
+        avg_length = sum(len(j['description']) for j in jobs) // max(1, len(jobs))
+        st.metric("Avg Length (this page)", f"{avg_length} chars")
     with col3:
         st.metric("Industries", "5+")
     
     st.write("---")
     
-    for idx, job in enumerate(jobs):
-        with st.expander(f"📄 {job['title']} at {job['company']} - {job['location']}", expanded=(idx==0)):
-            processed_desc = preprocess_job_for_analysis(job)
+    for idx, job in enumerate(jobs, start=offset):
+        with st.container(border=True):
+            st.markdown(f"**📄 {job['title']} at {job['company']} - {job['location']}**")
+            
+            # Details are only processed and rendered for jobs the user opens
+            if not st.toggle("Show details", value=(idx == 0), key=f"t{idx}"):
+                continue
+            
+            # Cached by content hash, so reruns skip the text processing
+            artifacts = get_job_artifacts(job)
+            processed_desc = artifacts['processed']
             
             tab1, tab2, tab3 = st.tabs(["📋 Description", "🔧 Processed", "📊 Extracted"])
             
@@ -94,7 +115,7 @@ elif page == "🔍 Browse Sample Jobs":
                 st.code(f"Original: {len(job['description'])} chars\nProcessed: {len(processed_desc)} chars")
             
             with tab3:
-                extracted_info = extract_key_info(job['description'])
+                extracted_info = artifacts['key_info']
                 if extracted_info['skills']:
                     st.write("**Skills:**")
                     st.info(", ".join(extracted_info['skills']))
@@ -109,6 +130,8 @@ elif page == "🔍 Browse Sample Jobs":
                 st.balloons()
 
 elif page == "📝 Job Description Analyzer":
+    from utils import PrepPackSection
+    
     st.markdown("## 📝 Job Description Analyzer")
     
     if 'selected_job_desc' not in st.session_state:
@@ -126,16 +149,17 @@ elif page == "📝 Job Description Analyzer":
         if len(job_desc) > 10:
             st.session_state.selected_job_desc = ""
             
-            with st.spinner("🤖 Analyzing..."):
-                analysis = analyze_job_description(job_desc)
-                st.session_state.last_analysis = analysis
-                
-                if "Error" in analysis:
-                    st.error(f"❌ {analysis}")
-                else:
-                    st.markdown("### 📊 Analysis Results")
-                    st.success("✅ Analysis Complete!")
-                    st.write(analysis)
+            st.markdown("### 📊 Analysis Results")
+            # The same request prepares the questions and STAR examples; the
+            # analysis is rendered as it arrives and write_stream returns the joined text
+            analysis = st.write_stream(PrepPackSection(job_desc, 'analysis'))
+            st.session_state.prep_job_desc = job_desc
+            st.session_state.last_analysis = analysis
+            
+            if analysis.startswith("Error"):
+                st.error(f"❌ {analysis}")
+            else:
+                st.success("✅ Analysis Complete!")
         else:
             st.warning("Please add a job description")
     
@@ -144,26 +168,43 @@ elif page == "📝 Job Description Analyzer":
         st.write(st.session_state.last_analysis)
 
 elif page == "❓ Interview Questions Generator":
+    from utils import PREP_PACK_QUESTIONS, PrepPackSection, get_prep_pack, stream_question_items
+    
     st.markdown("## ❓ Interview Questions Generator")
-    job_desc_q = st.text_area("Job Description:", height=200)
+    job_desc_q = st.text_area("Job Description:", value=st.session_state.get('prep_job_desc', ""), height=200)
     num_q = st.slider("Questions:", 5, 20, 10)
     
     if st.button("🎯 Generate", type="primary"):
         if job_desc_q:
-            with st.spinner("Generating..."):
-                questions_text = generate_interview_questions(job_desc_q, num_q)
-                
-                # Parse questions and store in session state for Mock Interview
-                questions_list = [q.strip() for q in questions_text.split('\n') if q.strip() and len(q.strip()) > 10]
-                st.session_state.questions = questions_list
-                st.session_state.current_question = 0
-                
-                st.markdown("### 📋 Your Interview Questions")
+            st.markdown("### 📋 Your Interview Questions")
+            pack = get_prep_pack(job_desc_q, use_llm=False)
+            pack_questions = len(pack['questions']) if isinstance(pack, dict) else PREP_PACK_QUESTIONS
+            if pack_questions >= num_q:
+                # From the prep pack request that also prepares the analysis and STAR examples
+                stream = PrepPackSection(job_desc_q, 'questions', num_q)
+            else:
+                stream = stream_question_items(job_desc_q, num_q)
+            # Each question is shown and loaded for Mock Interview as soon as it is parsed
+            questions_list = []
+            st.session_state.questions = questions_list
+            st.session_state.current_question = 0
+            for i, q in enumerate(stream, start=1):
+                questions_list.append(q)
+                st.markdown(f"{i}. {q['text']}  \n_{q['category']} · {q['difficulty']}_")
+            error = stream.error
+            st.session_state.questions = questions_list
+            st.session_state.current_question = 0
+            st.session_state.prep_job_desc = job_desc_q
+            
+            if error:
+                st.error(f"❌ {error}")
+            if questions_list:
                 st.success(f"✅ Generated {len(questions_list)} questions!")
-                st.write(questions_text)
                 st.info("💡 These questions are now loaded in the Mock Interview Practice section!")
 
 elif page == "🎤 Mock Interview Practice":
+    from utils import cached_rubric, quick_feedback, score_answer_quality, stream_evaluate_answer
+    
     st.markdown("## 🎤 Mock Interview Practice")
     
     if not st.session_state.questions or len(st.session_state.questions) == 0:
@@ -175,65 +216,151 @@ elif page == "🎤 Mock Interview Practice":
         
         if st.button("📊 Evaluate", type="primary"):
             if custom_q and custom_a:
-                with st.spinner("Evaluating..."):
-                    feedback = evaluate_answer(custom_q, custom_a)
-                    score = score_answer_quality(custom_a)
-                    st.metric("Score", f"{score}/10")
-                    st.write(feedback)
+                score = score_answer_quality(custom_a)
+                st.metric("Score", f"{score}/10")
+                st.write_stream(stream_evaluate_answer(custom_q, custom_a))
     else:
+        evaluate_all = st.toggle("⚡ Evaluate all: keep answering while feedback is prepared in the background", key="evaluate_all")
+        instant = not evaluate_all and st.toggle("📏 Instant feedback: local score and rubric check, AI feedback on request", key="instant_feedback")
+        if evaluate_all and 'evaluation_session' not in st.session_state:
+            from interview_session import EvaluationSession
+            st.session_state.evaluation_session = EvaluationSession()
+        session = st.session_state.get('evaluation_session')
+        
         # Show generated questions
         if st.session_state.current_question < len(st.session_state.questions):
-            current_q = st.session_state.questions[st.session_state.current_question]
+            current = st.session_state.questions[st.session_state.current_question]
+            current_q = current['text']
+            
+            # Rubrics for this and the next questions are generated while the user types
+            from interview_session import prefetch_rubrics
+            prefetch_rubrics([q['text'] for q in st.session_state.questions], st.session_state.current_question)
             
             st.markdown(f"### Question {st.session_state.current_question + 1} of {len(st.session_state.questions)}")
+            rubric_note = " · 📐 rubric ready" if cached_rubric(current_q) else ""
+            st.caption(f"{current['category'].capitalize()} · {current['difficulty']}{rubric_note}")
             st.info(current_q)
             
             answer = st.text_area("Your Answer:", height=150, key=f"a{st.session_state.current_question}")
             
             col1, col2 = st.columns(2)
             
-            with col1:
-                if st.button("📊 Evaluate Answer", type="primary"):
-                    if answer:
-                        with st.spinner("Evaluating..."):
-                            feedback = evaluate_answer(current_q, answer)
+            if evaluate_all:
+                with col1:
+                    if st.button("📥 Submit & Next", type="primary"):
+                        if answer:
+                            # Evaluated on a background thread; no waiting here
+                            session.submit(st.session_state.current_question, current_q, answer)
+                            st.session_state.current_question += 1
+                            st.rerun()
+                
+                with col2:
+                    if st.button("⏭️ Skip Question"):
+                        st.session_state.current_question += 1
+                        st.rerun()
+                
+                if len(session):
+                    st.caption(f"⏳ {session.completed} of {len(session)} evaluations ready")
+            else:
+                with col1:
+                    if st.button("📊 Evaluate Answer", type="primary"):
+                        if answer and instant:
+                            # Kept so the AI feedback button below survives reruns
+                            st.session_state.quick_feedback_for = st.session_state.current_question
+                        elif answer:
                             score = score_answer_quality(answer)
                             
                             st.markdown("### 📈 Feedback")
                             st.metric("Score", f"{score}/10")
-                            st.write(feedback)
-            
-            with col2:
-                if st.button("⏭️ Next Question"):
-                    st.session_state.current_question += 1
-                    st.rerun()
+                            st.write_stream(stream_evaluate_answer(current_q, answer))
+                
+                with col2:
+                    if st.button("⏭️ Next Question"):
+                        st.session_state.current_question += 1
+                        st.rerun()
+                
+                # Local scoring needs no API call, so it follows the answer as it is edited
+                if instant and answer and st.session_state.get('quick_feedback_for') == st.session_state.current_question:
+                    score, feedback = quick_feedback(current_q, answer)
+                    st.markdown("### 📏 Quick Feedback")
+                    st.metric("Score", f"{score}/10")
+                    st.markdown(feedback)
+                    if st.button("🤖 Get AI Feedback"):
+                        st.write_stream(stream_evaluate_answer(current_q, answer))
         else:
             st.success("🎉 You've completed all questions!")
             if st.button("🔄 Start Over"):
                 st.session_state.current_question = 0
+                st.session_state.pop('evaluation_session', None)
                 st.rerun()
+        
+        if session is not None and len(session):
+            finished = st.session_state.current_question >= len(st.session_state.questions)
+            if finished or st.button("📊 Show Session Report"):
+                if finished:
+                    with st.spinner("Collecting the remaining feedback..."):
+                        session.wait()
+                
+                st.markdown("### 📊 Session Report")
+                st.metric("Average Score", f"{session.average_score():.1f}/10")
+                for result in session.results():
+                    with st.expander(f"Question {result['index'] + 1} - Score {result['score']}/10"):
+                        st.info(result['question'])
+                        st.write(f"**Your answer:** {result['answer']}")
+                        if result['status'] == 'pending':
+                            st.write("⏳ Still evaluating...")
+                        elif result['status'] == 'error':
+                            st.error(f"❌ {result['feedback']}")
+                        else:
+                            st.write(result['feedback'])
+                st.download_button("📥 Download Report", session.report(), "interview_report.md")
 
 elif page == "📄 Resume Analyzer":
+    # PyPDF2 is only imported once a resume is read
+    from utils import extract_text_from_pdf, stream_analyze_resume
+    
     st.markdown("## 📄 Resume Analyzer")
     
+    mode = st.radio("Compare against:", ["A job description", "Best matches from sample jobs"], horizontal=True)
+    
     col1, col2 = st.columns(2)
     with col1:
         uploaded = st.file_uploader("Upload PDF Resume", type=['pdf'])
     with col2:
-        job_desc_r = st.text_area("Job Description:", height=200)
+        if mode == "A job description":
+            job_desc_r = st.text_area("Job Description:", height=200)
+        else:
+            # Ranking is local; only the top matches are sent to the AI
+            top_n = st.slider("Detailed analyses for the top matches:", 1, 5, 3)
     
     if st.button("🔍 Analyze", type="primary"):
-        if uploaded and job_desc_r:
-            with st.spinner("Analyzing..."):
+        if uploaded and (mode != "A job description" or job_desc_r):
+            with st.spinner("Reading resume..."):
                 resume_text = extract_text_from_pdf(uploaded)
-                if "Error" not in resume_text:
-                    result = analyze_resume(resume_text, job_desc_r)
-                    st.markdown("### 📊 Analysis")
-                    st.write(result)
-                else:
-                    st.error(resume_text)
+            if "Error" in resume_text:
+                st.error(resume_text)
+            elif mode == "A job description":
+                st.markdown("### 📊 Analysis")
+                st.write_stream(stream_analyze_resume(resume_text, job_desc_r))
+            else:
+                from resume_matcher import get_resume_matcher
+                from scraper import get_job_artifacts
+                
+                matches = get_resume_matcher().match(resume_text, top_k=10)
+                if not matches:
+                    st.warning("No sample jobs share any keywords with this resume")
+                
+                st.markdown("### 🏆 Best Matching Jobs")
+                for rank, (job, score) in enumerate(matches, start=1):
+                    st.write(f"{rank}. **{job['title']}** at {job['company']} - {job['location']} ({score:.0%} similar)")
+                
+                for job, score in matches[:top_n]:
+                    st.markdown(f"### 📊 {job['title']} at {job['company']}")
+                    st.write_stream(stream_analyze_resume(resume_text, get_job_artifacts(job)['processed']))
 
 elif page == "✍️ Cover Letter Generator":
+    from utils import stream_generate_cover_letter
+    
     st.markdown("## ✍️ Cover Letter Generator")
     
     company = st.text_input("Company Name:")
@@ -242,13 +369,13 @@ elif page == "✍️ Cover Letter Generator":
     
     if st.button("✍️ Generate", type="primary"):
         if company and job_desc_c and experience:
-            with st.spinner("Writing..."):
-                letter = generate_cover_letter(experience, job_desc_c, company)
-                st.markdown("### 📝 Your Cover Letter")
-                st.write(letter)
-                st.download_button("📥 Download", letter, f"{company}_cover.txt")
+            st.markdown("### 📝 Your Cover Letter")
+            letter = st.write_stream(stream_generate_cover_letter(experience, job_desc_c, company))
+            st.download_button("📥 Download", letter, f"{company}_cover.txt")
 
 elif page == "⭐ STAR Method Examples":
+    from utils import PrepPackSection
+    
     st.markdown("## ⭐ STAR Method Examples")
     
     st.info("""**STAR Method:**
@@ -257,14 +384,107 @@ elif page == "⭐ STAR Method Examples":
 - **A**ction: Steps taken
 - **R**esult: Outcome""")
     
-    job_desc_s = st.text_area("Job Description:", height=200)
+    job_desc_s = st.text_area("Job Description:", value=st.session_state.get('prep_job_desc', ""), height=200)
     
     if st.button("⭐ Generate", type="primary"):
         if job_desc_s:
-            with st.spinner("Creating..."):
-                examples = generate_star_examples(job_desc_s)
-                st.markdown("### 📋 Examples")
-                st.write(examples)
+            st.markdown("### 📋 Examples")
+            st.write_stream(PrepPackSection(job_desc_s, 'star_examples'))
+            st.session_state.prep_job_desc = job_desc_s
+
+elif page == "🩺 Diagnostics":
+    import time
+    from llm_metrics import get_metrics
+    
+    st.markdown("## 🩺 LLM Diagnostics")
+    metrics = get_metrics()
+    st.caption(f"LLM calls in this server process over the last {(time.time() - metrics.started) / 60:.0f} minutes")
+    
+    from startup_profile import first_paint
+    if first_paint and first_paint['process_age'] is not None:
+        st.caption(f"First paint {first_paint['process_age']:.2f}s after the server process started")
+    
+    totals = metrics.totals()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Requests", totals['requests'])
+    with col2:
+        st.metric("Cache Hit Rate", f"{totals['cache_hits'] / max(1, totals['requests']):.0%}")
+    with col3:
+        st.metric("Errors", totals['errors'])
+    with col4:
+        st.metric("Estimated Cost", f"${totals['cost_usd']:.4f}")
+    
+    def ms(seconds):
+        return None if seconds is None else round(seconds * 1000)
+    
+    rows = [{
+        'feature': feature,
+        'requests': m['requests'],
+        'cache hit rate': f"{m['cache_hit_rate']:.0%}",
+        'shared': m['coalesced'],
+        'errors': m['errors'],
+        'p50 ms': ms(m['latency_p50']),
+        'p95 ms': ms(m['latency_p95']),
+        'p50 first token ms': ms(m['ttft_p50']),
+        'prompt tokens': m['prompt_tokens'],
+        'completion tokens': m['completion_tokens'],
+        'cost $': round(m['cost_usd'], 4)
+    } for feature, m in metrics.snapshot().items()]
+    if rows:
+        st.dataframe(rows, hide_index=True)
+    else:
+        st.info("No LLM calls recorded yet")
+    
+    from llm_cache import cache_stats
+    stats = cache_stats()
+    flight = stats.pop('single_flight')
+    if stats:
+        st.markdown("#### Response Cache")
+        st.dataframe([{
+            'tier': tier,
+            'hits': s['hits'],
+            'misses': s['misses'],
+            'hit rate': f"{s['hit_rate']:.0%}",
+            'evictions': s['evictions'],
+            'entries': s.get('entries'),
+            'MB': round(s['bytes'] / 1e6, 2) if 'bytes' in s else None
+        } for tier, s in stats.items()], hide_index=True)
+    st.caption(f"{flight['followers']} requests shared an identical in-flight request "
+               f"({flight['coalesced_rate']:.0%}), {flight['in_flight']} in flight now")
+    
+    from llm_scheduler import scheduler_stats
+    scheduler = scheduler_stats()
+    if scheduler:
+        st.markdown("#### Request Queue")
+        st.dataframe([{
+            'feature': feature,
+            'waiting': scheduler['queued'].get(feature, 0),
+            'max waiting': scheduler['max_queued'].get(feature, 0),
+            'p95 wait ms': ms(wait['p95'])
+        } for feature, wait in sorted(scheduler['wait'].items())], hide_index=True)
+        st.dataframe(scheduler['lanes'], hide_index=True)
+    
+    with st.expander("Prometheus metrics"):
+        st.code(metrics.prometheus_text(), language="text")
+    if st.button("🔄 Reset Metrics"):
+        metrics.reset()
+        st.rerun()
 
 st.write("---")
-st.markdown("<div style='text-align: center; color: #888;'><p>🎯 AI Interview Coach | Built with Streamlit & OpenAI</p></div>", unsafe_allow_html=True)
\ No newline at end of file
+st.markdown("<div style='text-align: center; color: #888;'><p>🎯 AI Interview Coach | Built with Streamlit & OpenAI</p></div>", unsafe_allow_html=True)
+
+# The page is on screen: note the first paint, then, on pages that call the
+# LLM, load the OpenAI SDK in the background so the first AI request does
+# not wait for the import
+from startup_profile import note_first_paint
+note_first_paint()
+
+@st.cache_resource
+def warm_up_llm():
+    """Runs once per server process, not on every rerun"""
+    from utils import warm_up_client
+    warm_up_client()
+
+if page not in ("🏠 Home", "🔍 Browse Sample Jobs", "🩺 Diagnostics"):
+    warm_up_llm()
\ No newline at end of file
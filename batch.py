@@ -0,0 +1,201 @@
+"""
+Headless batch analysis of a job corpus
+Runs every job through preprocess_job_for_analysis -> extract_key_info ->
+analyze_job_description on a worker pool and appends results to a JSONL file.
+The output file doubles as the checkpoint: rerunning the same command skips
+jobs that already have a successful result.
+
+Usage:
+    python batch.py jobs.jsonl --output analyses.jsonl --workers 8
+    python batch.py --output analyses.jsonl          # the sample jobs
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from scraper import extract_key_info, get_sample_job_descriptions, preprocess_job_for_analysis
+
+STAGES = ("preprocess", "extract", "analyze")
+
+
+def job_id(job):
+    """Stable id for a job: its own 'id' field or a hash of its content"""
+    if job.get('id'):
+        return str(job['id'])
+    payload = json.dumps([job.get(k, "") for k in ('title', 'company', 'location', 'description')])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def read_jobs(path):
+    """Yield jobs from a JSONL file one line at a time"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def load_completed_ids(output_path):
+    """Ids of jobs that already have a successful result in the output file"""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A run killed mid-write can leave a partial last line
+                continue
+            if 'error' not in record:
+                completed.add(record['id'])
+    return completed
+
+
+class BatchReport:
+    """Throughput and per-stage latency for a batch run"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished = None
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+        self.stage_times = {stage: [] for stage in STAGES}
+        self._lock = threading.Lock()
+
+    def record(self, timings, ok):
+        with self._lock:
+            for stage, seconds in timings.items():
+                self.stage_times[stage].append(seconds)
+            if ok:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def jobs_per_minute(self):
+        processed = self.succeeded + self.failed
+        return processed / self.elapsed * 60 if self.elapsed else 0.0
+
+    def summary(self):
+        lines = [
+            f"Processed {self.succeeded + self.failed} jobs in {self.elapsed:.1f}s "
+            f"({self.succeeded} ok, {self.failed} failed, {self.skipped} already done)",
+            f"Throughput: {self.jobs_per_minute:.1f} jobs/minute"
+        ]
+        for stage in STAGES:
+            times = sorted(self.stage_times[stage])
+            if not times:
+                continue
+            mean = sum(times) / len(times)
+            p50 = times[len(times) // 2]
+            p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+            lines.append(f"  {stage:>10}: mean {mean * 1000:8.1f} ms  "
+                         f"p50 {p50 * 1000:8.1f} ms  p95 {p95 * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+
+def process_job(job, analyze):
+    """Run one job through the pipeline, returning (record, timings)"""
+    record = {
+        'id': job_id(job),
+        'title': job.get('title', ""),
+        'company': job.get('company', ""),
+        'location': job.get('location', "")
+    }
+    timings = {}
+    try:
+        start = time.perf_counter()
+        processed = preprocess_job_for_analysis(job)
+        timings['preprocess'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        record['key_info'] = extract_key_info(job['description'])
+        timings['extract'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        analysis = analyze(processed)
+        timings['analyze'] = time.perf_counter() - start
+
+        if analysis.startswith("Error"):
+            record['error'] = analysis
+        else:
+            record['analysis'] = analysis
+    except Exception as e:
+        # Any failure stays with its job, so the rest of the batch still runs and it is retried on resume
+        record['error'] = f"{type(e).__name__}: {e}"
+    return record, timings
+
+
+def run_batch(jobs, output_path, workers=4, analyze=None, report=None):
+    """
+    Analyze an iterable of jobs, appending one JSON line per job to output_path
+
+    Jobs are consumed lazily with at most 2 * workers in flight, so the
+    corpus never has to fit in memory. Jobs already present in the output
+    file are skipped; failed jobs are written with an 'error' field and
+    retried on the next run.
+    """
+    if analyze is None:
+        from utils import analyze_job_description
+
+        def analyze(text):
+            return analyze_job_description(text, feature='batch')
+
+    report = report or BatchReport()
+    completed = load_completed_ids(output_path)
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(output_path, "a", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+
+        def drain(return_when):
+            nonlocal pending
+            done, pending = wait(pending, return_when=return_when)
+            for future in done:
+                record, timings = future.result()
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                report.record(timings, 'error' not in record)
+
+        for job in jobs:
+            if job_id(job) in completed:
+                report.skipped += 1
+                continue
+            pending.add(pool.submit(process_job, job, analyze))
+            if len(pending) >= workers * 2:
+                drain(FIRST_COMPLETED)
+        if pending:
+            drain("ALL_COMPLETED")
+
+    report.finished = time.perf_counter()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-analyze job descriptions")
+    parser.add_argument("input", nargs="?", help="JSONL file of jobs (default: sample jobs)")
+    parser.add_argument("--output", "-o", default="analyses.jsonl", help="JSONL results / checkpoint file")
+    parser.add_argument("--workers", "-w", type=int, default=4, help="concurrent LLM calls")
+    args = parser.parse_args()
+
+    jobs = read_jobs(args.input) if args.input else get_sample_job_descriptions()
+    report = run_batch(jobs, args.output, workers=args.workers)
+    print(report.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1215 @@
+"""
+Performance benchmarks for the data pipeline
+Run all benchmarks with `python benchmarks.py` or pick some by name,
+e.g. `python benchmarks.py search`. Everything runs offline; LLM calls go
+to the local fake server in fake_openai.py.
+
+To catch regressions, save a run and compare a later one against it:
+    python benchmarks.py functions e2e --save baseline.json
+    python benchmarks.py functions e2e --compare baseline.json
+"""
+
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from scraper import (clean_job_description, extract_key_info, get_job_artifacts,
+                     get_sample_job_descriptions, preprocess_job_for_analysis)
+from job_index import JobIndex
+from skills import get_skill_matcher
+from fake_openai import FakeOpenAIServer
+
+BENCHMARKS = {}
+
+# Timings saved with --save and checked with --compare, keyed by "benchmark/case"
+RESULTS = {}
+
+
+def benchmark(name):
+    """Register a benchmark function under a name"""
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def time_call(func, *args, repeat=5, **kwargs):
+    """Return the best wall-clock time of several calls, in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(key, seconds):
+    """Keep a timing for --save / --compare"""
+    RESULTS[key] = seconds
+
+
+def make_synthetic_jobs(n, seed=42):
+    """Build n varied job postings by remixing the sample jobs"""
+    rng = random.Random(seed)
+    samples = get_sample_job_descriptions()
+    words = " ".join(job['description'] for job in samples).split()
+    titles = [job['title'] for job in samples]
+    locations = ["Remote", "San Francisco, CA", "New York, NY", "Austin, TX",
+                 "Seattle, WA", "Chicago, IL", "Boston, MA", "Denver, CO"]
+    seniority = ["Junior", "Senior", "Lead", "Staff", "Principal", ""]
+
+    jobs = []
+    for i in range(n):
+        start = rng.randrange(len(words) - 200)
+        jobs.append({
+            "title": f"{rng.choice(seniority)} {rng.choice(titles)}".strip(),
+            "company": f"Company{i}",
+            "location": rng.choice(locations),
+            "description": " ".join(words[start:start + rng.randint(80, 200)])
+        })
+    return jobs
+
+
+def linear_scan_search(all_jobs, query="", location=""):
+    """The original substring scan used by search_jobs, kept for comparison"""
+    if not query and not location:
+        return all_jobs
+
+    filtered_jobs = []
+    query_lower = query.lower()
+    location_lower = location.lower()
+
+    for job in all_jobs:
+        query_match = (
+            query_lower in job['title'].lower() or
+            query_lower in job['description'].lower() or
+            not query
+        )
+        location_match = (
+            location_lower in job['location'].lower() or
+            location_lower == "remote" and "remote" in job['location'].lower() or
+            not location
+        )
+        if query_match and location_match:
+            filtered_jobs.append(job)
+
+    return filtered_jobs if filtered_jobs else all_jobs[:2]
+
+
+@benchmark("search")
+def bench_search():
+    """Linear substring scan vs inverted index, top-10 results"""
+    queries = [("data analyst", "remote"), ("kubernetes", ""), ("product manager", "austin")]
+
+    for n in (1_000, 10_000, 100_000):
+        jobs = make_synthetic_jobs(n)
+
+        start = time.perf_counter()
+        index = JobIndex()
+        index.add_jobs(jobs)
+        build_time = time.perf_counter() - start
+
+        print(f"\n   {n:,} jobs (index built in {build_time:.2f}s)")
+        for query, location in queries:
+            scan = time_call(linear_scan_search, jobs, query, location)
+            # The first query for a term builds its impact-ordered postings
+            cold = time_call(index.search, query, location, top_k=10, repeat=1)
+            indexed = time_call(index.search, query, location, top_k=10)
+            print(f"   {query!r:>20} {location!r:>10}  scan {scan * 1000:8.2f} ms"
+                  f"  index cold {cold * 1000:7.2f} ms  warm {indexed * 1000:6.3f} ms"
+                  f"  ({scan / indexed:5.0f}x)")
+
+
+
+def legacy_clean_job_description(raw_text, strip_html=False):
+    """
+    The original multi-pass cleaner, kept for comparison
+    The original discards its HTML stripping; strip_html=True keeps it.
+    """
+    text = re.sub('<[^<]+?>', '', raw_text)
+    text = " ".join((text if strip_html else raw_text).split())
+    text = ''.join(char for char in text if char.isprintable() or char.isspace())
+    text = text.replace('\r\n', '\n')
+    text = text.replace('\r', '\n')
+    while '\n\n\n' in text:
+        text = text.replace('\n\n\n', '\n\n')
+    return text.strip()
+
+
+def make_scraped_page(size, seed=0):
+    """Build an HTML job page of roughly `size` characters"""
+    rng = random.Random(seed)
+    lines = [line for job in get_sample_job_descriptions()
+             for line in job['description'].splitlines() if line.strip()]
+    parts = ["<html><head><style>body { margin: 0; }</style>"
+             "<script>var tracking = 1 < 2;</script></head><body>\r\n"]
+    length = 0
+    while length < size:
+        line = rng.choice(lines).replace("&", "&amp;")
+        if line.startswith("- "):
+            chunk = f"<ul>\r\n  <li>{line[2:]}</li>\r\n</ul>\r\n"
+        else:
+            chunk = f"<p class=\"job\">{line}&nbsp;&nbsp;  </p>\r\n\r\n\r\n"
+        parts.append(chunk)
+        length += len(chunk)
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+@benchmark("clean")
+def bench_clean():
+    """Original clean_job_description vs the precompiled single-pass cleaner"""
+    for size in (10_000, 100_000, 1_000_000):
+        page = make_scraped_page(size)
+        repeat = 5 if size < 1_000_000 else 2
+        legacy = time_call(legacy_clean_job_description, page, repeat=repeat)
+        fixed = time_call(legacy_clean_job_description, page, strip_html=True, repeat=repeat)
+        current = time_call(clean_job_description, page, repeat=repeat)
+        print(f"   {len(page) // 1000:>5} KB page  original {legacy * 1000:7.2f} ms"
+              f"  original+HTML {fixed * 1000:7.2f} ms  current {current * 1000:7.2f} ms"
+              f"  ({legacy / current:3.1f}x / {fixed / current:3.1f}x)")
+
+
+LEGACY_SKILLS = ['python', 'sql', 'java', 'javascript', 'react', 'aws',
+                 'machine learning', 'data analysis', 'tableau', 'excel']
+
+
+def legacy_skill_scan(text, skills=LEGACY_SKILLS):
+    """The original extract_key_info loop: one substring scan per skill"""
+    text_lower = text.lower()
+    return [skill.title() for skill in skills if skill in text_lower]
+
+
+def per_skill_regex_scan(text, patterns):
+    """One word-boundary regex search per taxonomy term"""
+    return [skill for skill, pattern in patterns if pattern.search(text)]
+
+
+@benchmark("skills")
+def bench_skills():
+    """Per-skill scans vs the Aho-Corasick skill matcher"""
+    matcher = get_skill_matcher()
+    terms = [(skill, term) for skill, details in matcher.skills.items()
+             for term in [skill] + details['aliases']]
+    patterns = [(skill, re.compile(r'(?<![\w+#])' + re.escape(term) + r'(?![\w+#])', re.I))
+                for skill, term in terms]
+    print(f"\n   Taxonomy: {len(matcher.skills)} skills, {len(matcher)} terms")
+
+    base = " ".join(job['description'] for job in get_sample_job_descriptions())
+    for size in (1_000, 10_000, 100_000):
+        text = (base * (size // len(base) + 1))[:size]
+        legacy = time_call(legacy_skill_scan, text)
+        per_skill = time_call(per_skill_regex_scan, text, patterns, repeat=2)
+        automaton = time_call(matcher.extract, text)
+        print(f"   {size // 1000:>4} KB text  10-skill loop {legacy * 1000:7.2f} ms"
+              f"  {len(terms)}-term regex loop {per_skill * 1000:8.2f} ms"
+              f"  automaton {automaton * 1000:7.2f} ms")
+
+
+@benchmark("reruns")
+def bench_reruns():
+    """Browse page text processing over 100 Streamlit reruns of 1,000 jobs"""
+    jobs = make_synthetic_jobs(1_000)
+    reruns = 100
+
+    def uncached_rerun():
+        for job in jobs:
+            preprocess_job_for_analysis(job)
+            extract_key_info(job['description'])
+
+    def cached_rerun():
+        for job in jobs:
+            get_job_artifacts(job)
+
+    start = time.perf_counter()
+    for _ in range(reruns):
+        uncached_rerun()
+    uncached = time.perf_counter() - start
+
+    first = time_call(cached_rerun, repeat=1)
+    start = time.perf_counter()
+    for _ in range(reruns - 1):
+        cached_rerun()
+    cached = first + time.perf_counter() - start
+
+    print(f"\n   {reruns} reruns x {len(jobs):,} jobs")
+    print(f"   uncached: {uncached:7.2f}s total  {uncached / reruns * 1000:8.2f} ms/rerun")
+    print(f"     cached: {cached:7.2f}s total  {cached / reruns * 1000:8.2f} ms/rerun"
+          f"  (first rerun {first * 1000:.0f} ms, then"
+          f" {(cached - first) / (reruns - 1) * 1000:.2f} ms)")
+
+
+def use_fake_server(server):
+    """Point the utils OpenAI clients at a local fake server, returning the utils module"""
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ.setdefault("OPENAI_API_KEY", "fake-key")
+    import utils
+    from llm_scheduler import set_scheduler
+
+    # Lanes build new clients, which read OPENAI_BASE_URL
+    set_scheduler(None)
+    return utils
+
+
+@benchmark("concurrency")
+def bench_concurrency():
+    """Sequential call_gpt vs threads vs acall_gpt against a fake API (200 ms latency)"""
+    n_sessions = 32
+    prompts = [f"Evaluate answer {i}" for i in range(n_sessions)]
+
+    with FakeOpenAIServer(latency=0.2, failure_rate=0.1) as server:
+        utils = use_fake_server(server)
+
+        def sequential():
+            for prompt in prompts:
+                utils.call_gpt(prompt, use_cache=False)
+
+        def threaded():
+            with ThreadPoolExecutor(max_workers=utils.MAX_CONCURRENCY) as pool:
+                list(pool.map(lambda p: utils.call_gpt(p, use_cache=False), prompts))
+
+        async def gathered():
+            await asyncio.gather(*(utils.acall_gpt(p, use_cache=False) for p in prompts))
+
+        print(f"\n   {n_sessions} sessions, concurrency limit {utils.MAX_CONCURRENCY}, "
+              f"10% injected 429s")
+        for name, run in [("sequential call_gpt", sequential),
+                          ("thread pool call_gpt", threaded),
+                          ("asyncio acall_gpt", lambda: asyncio.run(gathered()))]:
+            server.max_in_flight = 0
+            elapsed = time_call(run, repeat=1)
+            print(f"   {name:>22}: {elapsed:6.2f}s  {n_sessions / elapsed:6.1f} req/s"
+                  f"  (max in flight {server.max_in_flight})")
+        print(f"   Server saw {server.request_count} requests, {server.failure_count} injected failures")
+
+
+BOILERPLATE = """About Us:
+{company} is a global leader in its industry with offices in 40 countries. Founded in 1998, we
+have grown to more than 20,000 employees who share a passion for customers and innovation.
+
+Benefits:
+- Medical, dental and vision insurance from day one
+- 401(k) with company match and financial planning resources
+- Generous parental leave, family planning support and childcare stipends
+- Wellness allowance, gym membership discounts and mental health programs
+- Commuter benefits, home office stipend and annual company retreat
+
+Equal Opportunity:
+{company} is an equal opportunity employer. All qualified applicants will receive consideration
+for employment without regard to race, color, religion, sex, sexual orientation, gender identity,
+national origin, disability, or veteran status. We provide reasonable accommodations on request.
+
+How to Apply:
+Submit your resume and a short cover letter through our careers portal. Applications are reviewed
+on a rolling basis and only shortlisted candidates will be contacted.
+"""
+
+
+def make_long_job(job, copies=6):
+    """A sample job padded with the boilerplate real postings carry"""
+    extra = "\n".join(BOILERPLATE.format(company=job['company']) for _ in range(copies))
+    return dict(job, description=job['description'] + "\n\n" + extra)
+
+
+def make_long_resume(pages=12):
+    """A multi-page resume with hobbies and references padding"""
+    jobs = get_sample_job_descriptions()
+    parts = ["Jane Doe\njane@example.com\n", "Summary:\nAnalyst with 8 years of experience.\n"]
+    for i in range(pages):
+        job = jobs[i % len(jobs)]
+        parts.append(f"Experience:\n{job['title']} at {job['company']} (201{i % 10})\n"
+                     + job['description'].split("Responsibilities:")[-1][:600])
+    parts.append("Education:\nB.S. Statistics, State University\n")
+    parts.append("Hobbies:\n" + "Hiking, photography, chess, cooking and volunteering. " * 40)
+    parts.append("References:\n" + "Available on request from former managers and peers. " * 20)
+    return "\n".join(parts)
+
+
+@benchmark("budget")
+def bench_budget():
+    """Prompt tokens and latency before/after token budgeting (fake API, 1 s per 1k prompt tokens)"""
+    import prompt_budget
+    from prompt_budget import FIELD_BUDGETS, compress_text, count_tokens, split_sections
+
+    job = make_long_job(get_sample_job_descriptions()[0])
+    resume = make_long_resume()
+    raw_job = job['description']
+    cases = [
+        ("analyze_job_description", lambda u: u.analyze_job_description(raw_job)),
+        ("generate_interview_questions", lambda u: u.generate_interview_questions(raw_job)),
+        ("analyze_resume", lambda u: u.analyze_resume(resume, raw_job)),
+        ("generate_cover_letter", lambda u: u.generate_cover_letter(resume, raw_job, job['company'])),
+        ("generate_star_examples", lambda u: u.generate_star_examples(raw_job)),
+    ]
+    print(f"\n   Job description: {count_tokens(raw_job)} tokens, resume: {count_tokens(resume)} tokens")
+
+    with FakeOpenAIServer(token_latency=1.0) as server:
+        utils = use_fake_server(server)
+        from llm_cache import set_response_cache
+        set_response_cache(None)
+        original_budgets = dict(FIELD_BUDGETS)
+        for template, run in cases:
+            results = []
+            for budgets in ({name: {f: 10 ** 9 for f in fields} for name, fields in original_budgets.items()},
+                            original_budgets):
+                prompt_budget.FIELD_BUDGETS = budgets
+                before = server.prompt_tokens
+                elapsed = time_call(run, utils, repeat=1)
+                results.append((server.prompt_tokens - before, elapsed))
+            prompt_budget.FIELD_BUDGETS = original_budgets
+            (full_tokens, full_time), (fit_tokens, fit_time) = results
+            print(f"   {template:>28}: {full_tokens:6} -> {fit_tokens:5} prompt tokens"
+                  f"  {full_time:5.2f}s -> {fit_time:5.2f}s")
+
+    kept = dict.fromkeys(h for h, _ in split_sections(compress_text(raw_job, 1000)) if h)
+    print(f"   Sections kept in a 1,000-token job description: {', '.join(kept)}")
+
+
+def python_cosine_rank(jobs, resume_text, top_k=5):
+    """Per-job dict vectors and a Python cosine loop, for comparison"""
+    from job_index import tokenize
+    from resume_matcher import job_text
+
+    def vector(text):
+        counts = {}
+        for token in tokenize(text):
+            counts[token] = counts.get(token, 0) + 1
+        norm = sum(c * c for c in counts.values()) ** 0.5 or 1
+        return {t: c / norm for t, c in counts.items()}
+
+    query = vector(resume_text)
+    scored = [(sum(w * query.get(t, 0) for t, w in vector(job_text(job)).items()), i)
+              for i, job in enumerate(jobs)]
+    return sorted(scored, reverse=True)[:top_k]
+
+
+@benchmark("match")
+def bench_match():
+    """Ranking a resume against the job corpus locally vs one LLM call per job"""
+    from resume_matcher import ResumeMatcher
+
+    resume = make_long_resume(pages=3)
+    for n in (10_000, 100_000):
+        jobs = make_synthetic_jobs(n)
+        matcher = ResumeMatcher()
+        start = time.perf_counter()
+        matcher.add_jobs(jobs)
+        matcher.match(resume, 1)
+        build = time.perf_counter() - start
+        query = time_call(matcher.match, resume, 5)
+        print(f"\n   {n:,} jobs: build {build:6.2f}s, top-5 query {query * 1000:7.1f} ms")
+        if n <= 10_000:
+            loop = time_call(python_cosine_rank, jobs, resume, repeat=1)
+            print(f"   Python cosine loop (re-vectorizes every job): {loop * 1000:8.1f} ms")
+        rows, weights, column_starts, idf, _ = matcher._matrix
+        size = sum(a.nbytes for a in (rows, weights, column_starts, idf))
+        print(f"   Matrix: {len(weights):,} non-zeros, {size / 2 ** 20:.0f} MB")
+
+    with FakeOpenAIServer(latency=0.2) as server:
+        utils = use_fake_server(server)
+        from llm_cache import set_response_cache
+        from resume_matcher import analyze_top_matches
+        set_response_cache(None)
+        corpus = get_sample_job_descriptions()
+
+        start = time.perf_counter()
+        for job in corpus:
+            utils.analyze_resume(resume, preprocess_job_for_analysis(job))
+        every_job = time.perf_counter() - start
+        calls = server.request_count
+
+        start = time.perf_counter()
+        analyze_top_matches(resume, top_k=2, analyze=utils.analyze_resume)
+        top_matches = time.perf_counter() - start
+        print(f"\n   Sample corpus ({len(corpus)} jobs, 200 ms per LLM call):")
+        print(f"   analyze_resume on every job: {calls} calls, {every_job:.2f}s")
+        print(f"   rank locally + top 2:        {server.request_count - calls} calls, {top_matches:.2f}s")
+
+
+@benchmark("store")
+def bench_store():
+    """Bulk import, cold start and lookups for a 100k-job store"""
+    import json
+    import tempfile
+    from job_store import JobStore, content_hash
+
+    jobs = make_synthetic_jobs(100_000)
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "jobs.jsonl")
+        with open(source, "w", encoding="utf-8") as f:
+            for job in jobs + jobs[:10_000]:
+                f.write(json.dumps(job) + "\n")
+
+        store = JobStore(os.path.join(directory, "jobs.sqlite3"))
+        start = time.perf_counter()
+        report = store.import_file(source)
+        print(f"\n   Import of 110k JSONL lines: {time.perf_counter() - start:5.2f}s ({report})")
+
+        for label in ("first start (build + save index)", "cold start (cached index)  "):
+            start = time.perf_counter()
+            index = store.load_index()
+            print(f"   {label}: {time.perf_counter() - start:5.2f}s for {len(index):,} jobs")
+
+        ids = [content_hash(job)[:16] for job in jobs[::1000]]
+        lookup = time_call(lambda: [store.get(i) for i in ids]) / len(ids)
+        search = time_call(store.search, "senior data analyst sql", 10)
+        print(f"   Lookup by id: {lookup * 1e6:6.1f} us, FTS5 top-10 search: {search * 1000:5.1f} ms")
+        store.close()
+
+
+def sequential_crawl(start_url, max_pages):
+    """One requests.get at a time, no connection reuse or caching, for comparison"""
+    import requests
+    from urllib.parse import urlsplit
+    from crawler import parse_page
+
+    host = urlsplit(start_url).netloc
+    frontier, seen, jobs, transferred = [start_url], {start_url}, [], 0
+    while frontier and len(seen) - len(frontier) < max_pages:
+        response = requests.get(frontier.pop(0), timeout=15)
+        transferred += len(response.content)
+        page_jobs, links = parse_page(response.url, response.text)
+        jobs.extend(page_jobs)
+        for link in links:
+            if link not in seen and urlsplit(link).netloc == host and "/private/" not in link:
+                seen.add(link)
+                frontier.append(link)
+    return jobs, transferred
+
+
+@benchmark("crawl")
+def bench_crawl():
+    """Crawling a local job board (20 ms per response) sequentially vs with the crawler"""
+    import tempfile
+    from crawler import crawl_jobs
+    from fixture_site import FixtureJobSite
+
+    with FixtureJobSite(n_jobs=300, latency=0.02) as site, tempfile.TemporaryDirectory() as cache_dir:
+        start = time.perf_counter()
+        jobs, transferred = sequential_crawl(site.start_url, max_pages=1000)
+        elapsed = time.perf_counter() - start
+        pages = site.request_count
+        print(f"\n   {'sequential requests.get':>28}: {len(jobs)} jobs, {pages / elapsed:6.1f} pages/sec, "
+              f"{transferred / 1024:7.1f} KiB")
+
+        for label in ("crawler, cold cache", "crawler, revalidating cache"):
+            site.max_in_flight = 0
+            jobs, stats = crawl_jobs([site.start_url], max_pages=1000, workers=16, per_host=8,
+                                     cache_dir=cache_dir)
+            print(f"   {label:>28}: {len(jobs)} jobs, {stats.pages_per_second:6.1f} pages/sec, "
+                  f"{stats.bytes / 1024:7.1f} KiB ({stats.not_modified} not modified, "
+                  f"max {site.max_in_flight} in flight)")
+
+
+def legacy_score_answer_quality(answer):
+    """The original per-answer scorer, kept for comparison"""
+    score = 5  # Base score
+    
+    # Check length
+    word_count = len(answer.split())
+    if word_count < 20:
+        score -= 2
+    elif word_count > 50:
+        score += 1
+    
+    # Check for specific examples
+    if any(word in answer.lower() for word in ['example', 'instance', 'specifically', 'when i']):
+        score += 1
+    
+    # Check for metrics/numbers
+    if re.search(r'\d+', answer):
+        score += 1
+    
+    # Check for structure
+    if any(word in answer.lower() for word in ['first', 'then', 'finally', 'resulted']):
+        score += 1
+    
+    return min(max(score, 1), 10)  # Keep between 1-10
+
+
+def make_answers(n, seed=7):
+    """Interview answers of varied length, with and without the scored markers"""
+    rng = random.Random(seed)
+    words = " ".join(job['description'] for job in get_sample_job_descriptions()).split()
+    extras = ["For example,", "When I", "SPECIFICALLY", "then", "Finally", "resulted in 30%",
+              "counterexample", "ſpecifically", "İnstance", "١٢٣", "strengthen", ""]
+    answers = []
+    for _ in range(n):
+        start = rng.randrange(len(words) - 120)
+        text = words[start:start + rng.randint(0, 120)]
+        for _ in range(rng.randint(0, 3)):
+            text.insert(rng.randint(0, len(text)), rng.choice(extras))
+        answers.append(" ".join(text))
+    return answers
+
+
+@benchmark("scoring")
+def bench_scoring():
+    """Per-answer cost of score_answer_quality vs the batch scorer"""
+    from answer_scoring import AnswerScorer, score_answers
+
+    answers = make_answers(10_000)
+    expected = [legacy_score_answer_quality(a) for a in answers]
+    assert score_answers(answers) == expected, "batch scores differ from the original"
+    print(f"\n   Scores identical to the original on {len(answers):,} answers")
+
+    legacy = time_call(lambda: [legacy_score_answer_quality(a) for a in answers])
+    batch = time_call(score_answers, answers)
+    scorer = AnswerScorer()
+    matrix = time_call(scorer.feature_matrix, answers)
+    print(f"   original, one at a time: {legacy / len(answers) * 1e6:5.2f} us/answer")
+    print(f"   batch score_answers:     {batch / len(answers) * 1e6:5.2f} us/answer "
+          f"({legacy / batch:.1f}x, feature matrix {matrix / batch:.0%} of it)")
+
+
+@benchmark("session")
+def bench_session():
+    """A 20-question mock interview: evaluate each answer vs evaluate all in the background"""
+    from interview_session import EvaluationSession
+
+    questions = [f"Tell me about a time you handled challenge number {i}." for i in range(20)]
+    answers = make_answers(len(questions))
+    think_time = 0.1  # seconds the user spends on the next answer
+
+    with FakeOpenAIServer(latency=0.5) as server:
+        utils = use_fake_server(server)
+        from llm_cache import set_response_cache
+        set_response_cache(None)
+
+        start = time.perf_counter()
+        for question, answer in zip(questions, answers):
+            utils.evaluate_answer(question, answer)
+            time.sleep(think_time)
+        one_by_one = time.perf_counter() - start
+
+        server.max_in_flight = 0
+        session = EvaluationSession(evaluate=utils.evaluate_answer)
+        start = time.perf_counter()
+        for index, (question, answer) in enumerate(zip(questions, answers)):
+            session.submit(index, question, answer)
+            time.sleep(think_time)
+        last_answer = time.perf_counter()
+        session.wait()
+        evaluate_all = time.perf_counter() - start
+
+    print(f"\n   {len(questions)} answers, 500 ms per evaluation, {think_time * 1000:.0f} ms per answer typed")
+    print(f"   evaluate each answer:   {one_by_one:5.2f}s")
+    print(f"   evaluate all:           {evaluate_all:5.2f}s (waiting {evaluate_all - (last_answer - start):.2f}s "
+          f"after the last answer, max {server.max_in_flight} in flight)")
+
+
+@benchmark("rubric")
+def bench_rubric():
+    """Mock interview feedback wait with and without rubrics prefetched while the user types"""
+    from fake_openai import stub_reply
+    from interview_session import prefetch_rubrics
+
+    skills = ("SQL", "Python", "Tableau", "AWS", "React")
+    questions = [f"Tell me about a time you used {skill} under a tight deadline." for skill in skills]
+    answers = make_answers(len(questions))
+    think_time = 1.0  # seconds the user spends typing each answer
+
+    with FakeOpenAIServer(latency=0.3, completion_latency=10.0, reply=stub_reply) as server:
+        utils = use_fake_server(server)
+        from llm_cache import set_response_cache
+        set_response_cache(None)
+
+        def interview(prefetch):
+            utils._rubric_cache.clear()
+            waits, tokens = [], 0
+            for index, answer in enumerate(answers):
+                if prefetch:
+                    prefetch_rubrics(questions, index)
+                time.sleep(think_time)
+                start = time.perf_counter()
+                text, _ = drain(utils.stream_evaluate_answer(questions[index], answer))
+                waits.append(time.perf_counter() - start)
+                tokens += len(text) // 4
+            return sum(waits) / len(waits), tokens // len(answers)
+
+        print(f"\n   {len(questions)} answers, {think_time:.0f}s typing each, 300 ms latency + 10 ms per output token")
+        for name, prefetch in [("no prefetch", False), ("rubric prefetch", True)]:
+            before = server.request_count
+            wait, tokens = interview(prefetch)
+            report(f"rubric/{name.replace(' ', '_')}", wait)
+            print(f"   {name:>15}: feedback after {wait * 1000:4.0f} ms on average, ~{tokens} output tokens, "
+                  f"{server.request_count - before} requests")
+
+
+def prep_pack_reply(messages):
+    """Fake completions that answer prep pack prompts with valid JSON"""
+    from fake_openai import default_reply
+
+    prompt = messages[-1]["content"]
+    if '"star_examples"' not in prompt:
+        return default_reply(messages) + " " + "Detailed coaching text. " * 150
+    return json.dumps({
+        "analysis": "1. KEY SKILLS REQUIRED: SQL, Python\n" + "Detailed analysis. " * 150,
+        "questions": [{"text": f"Interview question number {i}?", "category": "technical",
+                       "difficulty": "medium"} for i in range(1, 11)],
+        "star_examples": "**Question:** Tell me about a time...\n" + "STAR detail. " * 150
+    })
+
+
+@benchmark("prep")
+def bench_prep():
+    """Three separate calls vs one prep pack for analysis, questions and STAR examples"""
+    job_desc = preprocess_job_for_analysis(make_long_job(get_sample_job_descriptions()[0]))
+
+    with FakeOpenAIServer(latency=0.3, token_latency=1.0, reply=prep_pack_reply) as server:
+        utils = use_fake_server(server)
+        from llm_cache import set_response_cache
+        set_response_cache(None)
+
+        start = time.perf_counter()
+        utils.analyze_job_description(job_desc)
+        utils.generate_interview_questions(job_desc)
+        utils.generate_star_examples(job_desc)
+        separate = time.perf_counter() - start
+        separate_tokens, separate_calls = server.prompt_tokens, server.request_count
+
+        start = time.perf_counter()
+        pack = utils.get_prep_pack(job_desc)
+        first_page = time.perf_counter() - start
+        assert isinstance(pack, dict), pack
+        utils.get_prep_pack(job_desc)
+        utils.get_prep_pack(job_desc)
+        combined = time.perf_counter() - start
+
+    print(f"\n   separate calls: {separate_calls} requests, {separate_tokens:5} prompt tokens, {separate:5.2f}s")
+    print(f"   prep pack:      {server.request_count - separate_calls} request,  "
+          f"{server.prompt_tokens - separate_tokens:5} prompt tokens, {combined:5.2f}s "
+          f"(other two pages {(combined - first_page) * 1000:.2f} ms)")
+    print("   (the fake server charges 300 ms plus 1 s per 1k prompt tokens; output time is not modelled)")
+
+
+def question_lines_reply(messages):
+    """
+    Fake question generator output: JSON Lines for the structured prompt,
+    numbered text with headings (as models often answer) for the legacy one
+    In every first structured reply two questions are replaced by a
+    heading, a duplicate and an item with an unknown category.
+    """
+    prompt = messages[-1]["content"]
+    count = int(re.search(r"generate (\d+) interview questions", prompt).group(1))
+    categories = ["technical", "behavioral", "culture", "problem-solving"]
+    if "JSON Lines" not in prompt:
+        lines = ["Here are your interview questions:", "", "**Technical Questions:**"]
+        lines += [f"{i}. Describe a project where you used skill number {i} in depth." for i in range(1, count + 1)]
+        lines[6:6] = ["", "**Behavioral Questions:**", "   - Follow-up: what went wrong?"]
+        return "\n".join(lines)
+
+    offset = 100 if "Do not repeat" in prompt else 0
+    items = [json.dumps({"text": f"Describe a project where you used skill number {offset + i} in depth.",
+                         "category": categories[i % 4], "difficulty": "medium"}) for i in range(count)]
+    if not offset:
+        items[2:4] = ["```json", "Technical Questions:", items[1],
+                      json.dumps({"text": "What is your favourite colour and why?", "category": "trivia",
+                                  "difficulty": "easy"})]
+        items.append("```")
+    return "\n".join(items)
+
+
+@benchmark("questions")
+def bench_questions():
+    """Line-split question parsing vs streamed JSON Lines with a top-up request"""
+    job_desc = get_sample_job_descriptions()[0]["description"]
+    num_questions = 10
+
+    with FakeOpenAIServer(latency=0.3, chunk_delay=0.01, reply=question_lines_reply) as server:
+        utils = use_fake_server(server)
+        from llm_cache import set_response_cache
+        set_response_cache(None)
+
+        start = time.perf_counter()
+        text = "".join(utils.stream_generate_interview_questions(job_desc, num_questions))
+        legacy = [q.strip() for q in text.split('\n') if q.strip() and len(q.strip()) > 10]
+        legacy_time = time.perf_counter() - start
+        junk = [q for q in legacy if "skill number" not in q]
+
+        requests_before = server.request_count
+        start = time.perf_counter()
+        stream = utils.stream_question_items(job_desc, num_questions)
+        first = None
+        for question in stream:
+            if first is None:
+                first = time.perf_counter() - start
+        structured_time = time.perf_counter() - start
+
+    print(f"\n   line split:  {len(legacy)} \"questions\" ({len(junk)} headings or fragments), "
+          f"usable after {legacy_time:.2f}s")
+    print(f"   JSON Lines:  {len(stream.questions)} questions, {stream.rejected} invalid lines rejected, "
+          f"{server.request_count - requests_before} requests (incl. top-up)")
+    print(f"                first question after {first:.2f}s, all after {structured_time:.2f}s")
+
+
+@benchmark("metrics")
+def bench_metrics():
+    """Overhead of per-call LLM metrics, and a per-feature report from a fake session"""
+    from llm_metrics import LLMMetrics
+
+    metrics = LLMMetrics()
+    n = 100_000
+    start = time.perf_counter()
+    for i in range(n):
+        metrics.record("evaluate", "gpt-3.5-turbo", 0.5 + i % 7 * 0.3, ttft=0.2,
+                       prompt_tokens=400, completion_tokens=300)
+    per_call = (time.perf_counter() - start) / n
+    start = time.perf_counter()
+    metrics.prometheus_text()
+    export = time.perf_counter() - start
+    print(f"\n   record(): {per_call * 1e6:.2f} us per call, Prometheus export {export * 1000:.2f} ms")
+
+    job_desc = get_sample_job_descriptions()[0]["description"]
+    with FakeOpenAIServer(latency=0.05, chunk_delay=0.002) as server:
+        utils = use_fake_server(server)
+        from llm_cache import LRUCache, set_response_cache
+        from llm_metrics import get_metrics
+        set_response_cache(LRUCache(ttl=None))
+        get_metrics().reset()
+        for _ in range(2):
+            "".join(utils.stream_analyze_job_description(job_desc))
+            utils.generate_interview_questions(job_desc)
+            for i in range(5):
+                "".join(utils.stream_evaluate_answer(f"Question {i}?", make_answers(1, seed=i)[0]))
+        for feature, m in get_metrics().snapshot().items():
+            ttft = f"{m['ttft_p50'] * 1000:4.0f} ms" if m['ttft_p50'] is not None else "      -"
+            print(f"   {feature:>10}: {m['requests']:3} calls, {m['cache_hit_rate']:4.0%} cached, "
+                  f"p50 {m['latency_p50'] * 1000:4.0f} ms, first token {ttft}, "
+                  f"{m['prompt_tokens'] + m['completion_tokens']:5} tokens")
+
+
+def make_pdf(pages, lines_per_page=45, seed=0):
+    """A text-only PDF with `pages` pages of resume-like lines, built by hand"""
+    rng = random.Random(seed)
+    words = " ".join(job['description'] for job in get_sample_job_descriptions()).split()
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>",
+               None,  # page tree, filled in below
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for _ in range(pages):
+        lines = []
+        for _ in range(lines_per_page):
+            start = rng.randrange(len(words) - 12)
+            line = " ".join(words[start:start + 12])
+            lines.append("(" + line.replace("\\", "").replace("(", "").replace(")", "") + ") Tj T*")
+        content = "BT /F1 10 Tf 14 TL 50 780 Td\n" + "\n".join(lines) + "\nET"
+        objects.append(f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        page_ids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {pages} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+@benchmark("functions")
+def bench_functions():
+    """Pipeline functions at several input sizes (use --save / --compare to track regressions)"""
+    import io
+    import scraper
+    import utils
+
+    def row(name, size, seconds):
+        report(f"functions/{name}/{size}", seconds)
+        print(f"   {name:>28} {size:>15}  {seconds * 1000:9.3f} ms")
+
+    print()
+    for size in (1_000, 10_000, 100_000):
+        row("clean_job_description", f"{size // 1000} KB page", time_call(clean_job_description, make_scraped_page(size)))
+    for copies in (0, 6, 24):
+        job = make_long_job(get_sample_job_descriptions()[0], copies)
+        row("preprocess_job_for_analysis", f"{len(job['description']) // 1000} KB job",
+            time_call(preprocess_job_for_analysis, job))
+    for size in (1_000, 10_000, 100_000):
+        text = clean_job_description(make_scraped_page(size))
+        row("extract_key_info", f"{size // 1000} KB text", time_call(extract_key_info, text))
+
+    saved_index = scraper._job_index
+    try:
+        for n in (1_000, 10_000, 50_000):
+            index = JobIndex()
+            index.add_jobs(make_synthetic_jobs(n))
+            scraper._job_index = index
+            scraper.search_jobs("data analyst", "remote", limit=10)  # build the postings once
+            row("search_jobs", f"{n:,} jobs", time_call(scraper.search_jobs, "data analyst", "remote", limit=10))
+    finally:
+        scraper._job_index = saved_index
+
+    for words in (20, 200, 2_000):
+        answer = " ".join(make_answers(words // 20 + 1, seed=words))
+        answer = " ".join(answer.split()[:words])
+        row("score_answer_quality", f"{words} words", time_call(utils.score_answer_quality, answer))
+
+    for pages in (1, 10, 50):
+        data = make_pdf(pages)
+
+        def cold():
+            utils._pdf_text_cache.clear()
+            return utils.extract_text_from_pdf(io.BytesIO(data))
+
+        text = cold()
+        assert len(text.split()) > pages * 400, text[:200]
+        label = f"{pages} page" + ("s" if pages > 1 else "")
+        row("extract_text_from_pdf", label, time_call(cold, repeat=3))
+        row("extract_text_from_pdf", label + ", cached", time_call(utils.extract_text_from_pdf, io.BytesIO(data)))
+
+
+def drain(result):
+    """Consume a stream, returning (text, seconds to first chunk)"""
+    start = time.perf_counter()
+    first = None
+    chunks = []
+    for chunk in result:
+        if first is None:
+            first = time.perf_counter() - start
+        chunks.append(chunk)
+    return "".join(chunks), first
+
+
+@benchmark("e2e")
+def bench_e2e():
+    """Every utils LLM function end to end against the stub API (BENCH_LLM_LATENCY, BENCH_LLM_CHUNK_DELAY)"""
+    from fake_openai import stub_reply
+
+    latency = float(os.getenv("BENCH_LLM_LATENCY", 0.1))
+    chunk_delay = float(os.getenv("BENCH_LLM_CHUNK_DELAY", 0.002))
+    job_desc = preprocess_job_for_analysis(get_sample_job_descriptions()[0])
+    resume = make_long_resume(2)
+    question = "Tell me about a time you used SQL to answer a business question."
+    answer = make_answers(1)[0]
+
+    with FakeOpenAIServer(latency=latency, chunk_delay=chunk_delay, reply=stub_reply) as server:
+        utils = use_fake_server(server)
+        from llm_cache import set_response_cache
+        set_response_cache(None)
+        utils._prep_pack_cache.clear()
+
+        cases = [
+            ("analyze_job_description", lambda: utils.analyze_job_description(job_desc)),
+            ("generate_interview_questions", lambda: utils.generate_interview_questions(job_desc)),
+            ("evaluate_answer", lambda: utils.evaluate_answer(question, answer)),
+            ("analyze_resume", lambda: utils.analyze_resume(resume, job_desc)),
+            ("generate_cover_letter", lambda: utils.generate_cover_letter(resume, job_desc, "DataCorp")),
+            ("generate_star_examples", lambda: utils.generate_star_examples(job_desc)),
+            ("get_prep_pack", lambda: utils.get_prep_pack(job_desc)),
+            ("acall_gpt", lambda: asyncio.run(utils.acall_gpt(f"Analyze this job description\n{job_desc}"))),
+        ]
+        streams = [
+            ("stream_analyze_job_description", lambda: utils.stream_analyze_job_description(job_desc)),
+            ("stream_generate_interview_questions", lambda: utils.stream_generate_interview_questions(job_desc)),
+            ("stream_question_items", lambda: (json.dumps(q) for q in utils.stream_question_items(job_desc))),
+            ("stream_evaluate_answer", lambda: utils.stream_evaluate_answer(question, answer)),
+            ("stream_analyze_resume", lambda: utils.stream_analyze_resume(resume, job_desc)),
+            ("stream_generate_cover_letter", lambda: utils.stream_generate_cover_letter(resume, job_desc, "DataCorp")),
+            ("stream_generate_star_examples", lambda: utils.stream_generate_star_examples(job_desc)),
+        ]
+
+        print(f"\n   stub API: {latency * 1000:.0f} ms latency, {chunk_delay * 1000:.0f} ms per streamed word")
+        for name, call in cases:
+            start = time.perf_counter()
+            result = call()
+            elapsed = time.perf_counter() - start
+            assert result and not str(result).startswith("Error"), (name, result)
+            report(f"e2e/{name}", elapsed)
+            print(f"   {name:>36}  {elapsed * 1000:7.1f} ms")
+        for name, call in streams:
+            start = time.perf_counter()
+            text, first = drain(call())
+            elapsed = time.perf_counter() - start
+            assert text and not text.startswith("Error"), (name, text)
+            report(f"e2e/{name}", elapsed)
+            print(f"   {name:>36}  {elapsed * 1000:7.1f} ms  (first chunk {first * 1000:5.1f} ms)")
+
+        from interview_session import EvaluationSession
+        questions = [q['text'] for q in utils.stream_question_items(job_desc, 8)]
+        answers = make_answers(len(questions))
+        start = time.perf_counter()
+        for q, a in zip(questions, answers):
+            utils.evaluate_answer(q, a)
+        one_by_one = time.perf_counter() - start
+        session = EvaluationSession(evaluate=utils.evaluate_answer)
+        start = time.perf_counter()
+        for index, (q, a) in enumerate(zip(questions, answers)):
+            session.submit(index, q, a)
+        session.wait()
+        background = time.perf_counter() - start
+        assert all(r['status'] == 'done' for r in session.results())
+        report("e2e/mock_interview_sequential", one_by_one)
+        report("e2e/mock_interview_background", background)
+        print(f"   mock interview, {len(questions)} answers: sequential {one_by_one:.2f}s, "
+              f"background {background:.2f}s ({one_by_one / background:.1f}x)")
+        print(f"   server saw {server.request_count} requests")
+
+
+class PassThroughFlight:
+    """Stand-in for llm_cache.in_flight that never coalesces"""
+
+    def do(self, key, func):
+        return func(), False
+
+    def stream(self, key, open_stream):
+        return open_stream(), False
+
+
+@benchmark("shared")
+def bench_shared():
+    """200 sessions opening the same posting at once, with and without single-flight (500 ms API)"""
+    from fake_openai import stub_reply
+    from llm_cache import LRUCache, cache_stats, in_flight, set_response_cache
+
+    n_sessions = 200
+    job_desc = preprocess_job_for_analysis(get_sample_job_descriptions()[0])
+
+    with FakeOpenAIServer(latency=0.5, chunk_delay=0.002, reply=stub_reply) as server:
+        utils = use_fake_server(server)
+        cases = [
+            ("analysis stream", lambda: not drain(utils.stream_analyze_job_description(job_desc))[0].startswith("Error")),
+            ("prep pack", lambda: isinstance(utils.get_prep_pack(job_desc), dict)),
+        ]
+
+        print(f"\n   {n_sessions} sessions asking at the same moment")
+        for flight_name, flight in [("no coalescing", PassThroughFlight()), ("single-flight", in_flight)]:
+            set_response_cache(LRUCache(ttl=None))
+            utils._prep_pack_cache.clear()
+            utils.in_flight = flight
+            for name, call in cases:
+                barrier = threading.Barrier(n_sessions)
+
+                def session():
+                    barrier.wait()
+                    return call()
+
+                before = server.request_count
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=n_sessions) as pool:
+                    ok = list(pool.map(lambda _: session(), range(n_sessions)))
+                elapsed = time.perf_counter() - start
+                assert all(ok), name
+                report(f"shared/{flight_name}/{name}", elapsed)
+                print(f"   {flight_name:>14} {name:>16}: {server.request_count - before:4} upstream requests, "
+                      f"{elapsed:5.2f}s")
+        utils.in_flight = in_flight
+        stats = cache_stats()
+        print(f"   single-flight followers: {stats['single_flight']['followers']}, "
+              f"memory tier {stats['LRUCache']['bytes'] / 1000:.1f} kB")
+
+
+@benchmark("scheduler")
+def bench_scheduler():
+    """Batch analyses plus interactive evaluations against a rate-limited fake API (40 req/s per key)"""
+    import llm_scheduler
+    from fake_openai import stub_reply
+    from llm_cache import set_response_cache
+    from openai import OpenAI
+    from llm_scheduler import LLMScheduler, Lane, set_scheduler
+
+    rate = 40
+    job = get_sample_job_descriptions()[0]["description"]
+    analyses = [f"{job}\nPosting #{i}" for i in range(60)]
+    answers = make_answers(20)
+    question = "Tell me about a time you used SQL to answer a business question."
+
+    with FakeOpenAIServer(latency=0.2, rate_limit=rate, reply=stub_reply) as server:
+        utils = use_fake_server(server)
+        set_response_cache(None)
+        sdk_client = OpenAI(api_key="key-1", base_url=server.base_url)
+
+        def unscheduled(prompt):
+            # The old path: every call goes out at once and relies on the SDK's own retries
+            try:
+                return sdk_client.chat.completions.create(
+                    model=utils.MODEL, messages=utils._messages(utils.DEFAULT_SYSTEM_MESSAGE, prompt),
+                    max_tokens=utils.MAX_TOKENS).choices[0].message.content
+            except Exception as e:
+                return f"Error: {e}"
+
+        def lanes(*keys, rpm=rate * 60):
+            # Each mode gets fresh keys, so the server's limits start full too
+            return LLMScheduler([Lane(key, key, utils.MODEL, rpm=rpm, max_in_flight=16) for key in keys])
+
+        modes = [
+            ("no scheduler", None, None),
+            ("1 key, FIFO", lambda: lanes("key-2"), {}),
+            ("1 key", lambda: lanes("key-3"), llm_scheduler.FEATURE_PRIORITY),
+            ("2 keys", lambda: lanes("key-4", "key-5"), llm_scheduler.FEATURE_PRIORITY),
+        ]
+        priorities = llm_scheduler.FEATURE_PRIORITY
+        print(f"\n   {len(analyses)} analyses at t=0, {len(answers)} answer evaluations at t=0.5s, "
+              f"{rate} req/s per key")
+        for name, build, priority in modes:
+            if build:
+                set_scheduler(build())
+                llm_scheduler.FEATURE_PRIORITY = priority
+                analyze = utils.analyze_job_description
+                evaluate = lambda answer: utils.evaluate_answer(question, answer)
+            else:
+                analyze = lambda job_desc: unscheduled(utils._analyze_job_description_prompt(job_desc))
+                evaluate = lambda answer: unscheduled(utils._evaluate_answer_prompt(question, answer))
+            before, limited_before = server.request_count, server.rate_limited_count
+
+            def timed(call, arg, delay, t0):
+                time.sleep(max(0.0, t0 + delay - time.perf_counter()))
+                start = time.perf_counter()
+                result = call(arg)
+                return time.perf_counter() - start, result.startswith("Error")
+
+            t0 = time.perf_counter() + 0.05
+            with ThreadPoolExecutor(max_workers=len(analyses) + len(answers)) as pool:
+                analysis_runs = [pool.submit(timed, analyze, job_desc, 0.0, t0) for job_desc in analyses]
+                evaluation_runs = [pool.submit(timed, evaluate, answer, 0.5, t0) for answer in answers]
+                analysis_runs = [f.result() for f in analysis_runs]
+                evaluation_runs = [f.result() for f in evaluation_runs]
+            elapsed = time.perf_counter() - t0
+            failed = sum(error for _, error in analysis_runs + evaluation_runs)
+
+            def p50(runs):
+                return sorted(seconds for seconds, _ in runs)[len(runs) // 2]
+
+            report(f"scheduler/{name}", elapsed)
+            print(f"   {name:>13}: {elapsed:5.2f}s, {server.request_count - before:3} requests, "
+                  f"{server.rate_limited_count - limited_before:3} got 429, {failed:2} failed | "
+                  f"p50 evaluation {p50(evaluation_runs):5.2f}s, analysis {p50(analysis_runs):5.2f}s")
+        llm_scheduler.FEATURE_PRIORITY = priorities
+        set_scheduler(None)
+
+        scheduler = lanes("key-6", rpm=0)
+        n = 20_000
+        start = time.perf_counter()
+        for _ in range(n):
+            scheduler.release(scheduler.acquire("evaluate", 500))
+        print(f"   acquire + release: {(time.perf_counter() - start) / n * 1e6:.1f} us")
+
+
+@benchmark("routing")
+def bench_routing():
+    """Per-feature latency and cost with every feature on one model vs routed by model_router"""
+    import model_router
+    from fake_openai import stub_reply
+    from llm_cache import set_response_cache
+    from llm_metrics import get_metrics
+
+    job_desc = preprocess_job_for_analysis(get_sample_job_descriptions()[0])
+    resume = make_long_resume(2)
+    skills = ("SQL", "Python", "Tableau", "AWS", "React", "Excel")
+    questions = [f"Tell me about a time you used {skill} under a tight deadline." for skill in skills]
+    answers = make_answers(len(questions) * 2)
+    fast = model_router.FAST_MODEL
+
+    # The fast model generates output about 3x faster than the standard one
+    with FakeOpenAIServer(latency=0.2, completion_latency=6.0, model_latency={fast: 2.0},
+                          reply=stub_reply) as server:
+        utils = use_fake_server(server)
+        set_response_cache(None)
+        # Build both models' clients first so neither mode pays for the SDK import
+        for model in {model_router.STANDARD_MODEL, fast}:
+            utils.call_gpt("Warm up", model=model, use_cache=False)
+
+        def session():
+            utils._rubric_cache.clear()
+            timings = {}
+
+            def timed(feature, call):
+                start = time.perf_counter()
+                result = call()
+                timings.setdefault(feature, []).append(time.perf_counter() - start)
+                return result
+
+            timed('analyze', lambda: utils.analyze_job_description(job_desc))
+            timed('questions', lambda: list(utils.stream_question_items(job_desc, 8)))
+            timed('resume', lambda: utils.analyze_resume(resume, job_desc))
+            timed('cover_letter', lambda: utils.generate_cover_letter(resume, job_desc, "DataCorp"))
+            timed('star', lambda: utils.generate_star_examples(job_desc))
+            for index, question in enumerate(questions):
+                timed('rubric', lambda: utils.generate_rubric(question))
+                for answer in answers[index * 2:index * 2 + 2]:
+                    feedback = timed('evaluate', lambda: utils.evaluate_answer(question, answer))
+                    assert not feedback.startswith("Error"), feedback
+            return timings
+
+        print(f"\n   stub API: 200 ms latency + 6 ms per output token (2 ms on {fast}); "
+              f"{len(answers)} answers, {sum(len(a.split()) < model_router.MIN_LLM_ANSWER_WORDS for a in answers)}"
+              f" under {model_router.MIN_LLM_ANSWER_WORDS} words")
+        routing = model_router.ROUTING
+        results = {}
+        for name, enabled in [("one model", False), ("routed", True)]:
+            model_router.ROUTING = enabled
+            get_metrics().reset()
+            before = server.request_count
+            timings = session()
+            snapshot = get_metrics().snapshot()
+            results[name] = {feature: (sum(times) / len(times), snapshot[feature]['cost_usd'])
+                             for feature, times in timings.items()}
+            total = sum(sum(times) for times in timings.values())
+            cost = sum(m['cost_usd'] for m in snapshot.values())
+            report(f"routing/{name.replace(' ', '_')}", total)
+            print(f"   {name:>9}: {total:5.2f}s, {server.request_count - before} requests, ${cost * 1000:.3f} per 1k sessions")
+        model_router.ROUTING = routing
+
+        print(f"   {'feature':>12}  {'one model':>18}  {'routed':>18}")
+        for feature, (latency, cost) in results["one model"].items():
+            routed_latency, routed_cost = results["routed"][feature]
+            print(f"   {feature:>12}  {latency * 1000:6.0f} ms ${cost * 1000:7.4f}"
+                  f"  {routed_latency * 1000:6.0f} ms ${routed_cost * 1000:7.4f}")
+        print("   (mean latency per call; cost per 1k sessions from llm_metrics)")
+
+def compare_results(path, tolerance):
+    """Print timings that got slower than a saved run; return how many regressed"""
+    with open(path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = 0
+    for key, seconds in sorted(RESULTS.items()):
+        before = baseline.get(key)
+        if not before:
+            continue
+        change = seconds / before - 1
+        if change > tolerance:
+            regressions += 1
+            print(f"   REGRESSION {key}: {before * 1000:.3f} ms -> {seconds * 1000:.3f} ms ({change:+.0%})")
+    print(f"   {len(RESULTS)} timings compared with {path}, {regressions} slower than {tolerance:.0%}")
+    return regressions
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run performance benchmarks")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run (default: all): {', '.join(BENCHMARKS)}")
+    parser.add_argument("--save", metavar="PATH", help="write the recorded timings to a JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="fail if timings are slower than a saved run")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown for --compare")
+    args = parser.parse_args()
+
+    selected = args.names or list(BENCHMARKS)
+    unknown = [name for name in selected if name not in BENCHMARKS]
+    if unknown:
+        sys.exit(f"Unknown benchmark(s): {', '.join(unknown)}. Available: {', '.join(BENCHMARKS)}")
+
+    for name in selected:
+        print("=" * 60)
+        print(f"{name.upper()}: {BENCHMARKS[name].__doc__}")
+        print("=" * 60)
+        BENCHMARKS[name]()
+        print()
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(RESULTS, f, indent=2, sort_keys=True)
+        print(f"Saved {len(RESULTS)} timings to {args.save}")
+    if args.compare and compare_results(args.compare, args.tolerance):
+        sys.exit(1)
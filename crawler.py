@@ -0,0 +1,400 @@
+"""
+Polite, concurrent job board crawler
+Fetches pages over one pooled HTTP session with a per-host concurrency
+limit, honours robots.txt, revalidates pages it has seen before with
+ETag / Last-Modified conditional requests against an on-disk cache, and
+turns schema.org JobPosting markup into jobs cleaned by
+clean_job_description.
+
+Usage:
+    python crawler.py https://example.com/jobs --max-pages 500 --output jobs.jsonl
+    python crawler.py https://example.com/jobs --follow "/jobs" --store
+    python fixture_site.py &  python crawler.py http://127.0.0.1:8002/jobs?page=1
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urldefrag, urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from scraper import clean_job_description
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "http")
+USER_AGENT = "ai-interview-coach-crawler/1.0"
+
+# lxml is several times faster than the pure-Python parser when installed
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# Only these tags are needed, the rest of the page is never built into a tree
+PAGE_STRAINER = SoupStrainer(["script", "a"])
+
+
+class CrawlStats:
+    """Counters for one crawl"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished = None
+        self.pages = 0
+        self.not_modified = 0
+        self.errors = 0
+        self.disallowed = 0
+        self.jobs = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def pages_per_second(self):
+        fetched = self.pages + self.not_modified
+        return fetched / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        return (f"{self.pages} pages fetched, {self.not_modified} not modified, {self.errors} errors, "
+                f"{self.disallowed} disallowed by robots.txt\n"
+                f"{self.jobs} jobs in {self.elapsed:.1f}s: {self.pages_per_second:.1f} pages/sec, "
+                f"{self.bytes / 1024:.1f} KiB transferred")
+
+
+class HTTPCache:
+    """
+    Response bodies and validators on disk, one JSON file per URL
+    Used to send conditional requests and to reuse the body on a 304.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, url):
+        try:
+            with open(self._path(url), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, url, etag, last_modified, body):
+        path = self._path(url)
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump({'url': url, 'etag': etag, 'last_modified': last_modified, 'body': body}, f)
+        os.replace(temporary, path)
+
+
+class Crawler:
+    """
+    Breadth-first crawler over a thread pool
+
+    workers:     pages fetched concurrently in total
+    per_host:    pages fetched concurrently from any one host
+    host_delay:  minimum seconds between request starts to the same host
+    cache_dir:   on-disk HTTP cache for conditional requests (None disables it)
+    """
+
+    def __init__(self, workers=8, per_host=2, host_delay=0.0, cache_dir=DEFAULT_CACHE_DIR,
+                 timeout=15, respect_robots=True, user_agent=USER_AGENT):
+        self.workers = workers
+        self.per_host = per_host
+        self.host_delay = host_delay
+        self.timeout = timeout
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+        self.cache = HTTPCache(cache_dir) if cache_dir else None
+        self.stats = CrawlStats()
+
+        # One keep-alive pool per host, sized for the concurrency we allow
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = user_agent
+        adapter = HTTPAdapter(
+            pool_connections=16, pool_maxsize=max(workers, per_host),
+            max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                              respect_retry_after_header=True)
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._host_slots = {}
+        self._host_next_start = {}
+        self._robots = {}
+        self._robots_locks = {}
+
+    def _host_slot(self, host):
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            return slot
+
+    def _wait_for_turn(self, host):
+        """Space out request starts to a host by host_delay seconds"""
+        if not self.host_delay:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._host_next_start.get(host, now))
+            self._host_next_start[host] = start + self.host_delay
+        time.sleep(start - now)
+
+    def allowed(self, url):
+        """
+        Check robots.txt for url, fetching it once per host
+        Workers needing the same host's robots.txt wait for one fetch; the
+        crawl loop never calls this, so a slow host only holds up its own pages.
+        """
+        if not self.respect_robots:
+            return True
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            robots = self._robots.get(host)
+            host_lock = self._robots_locks.setdefault(host, threading.Lock())
+        if robots is None:
+            with host_lock:
+                with self._lock:
+                    robots = self._robots.get(host)
+                if robots is None:
+                    robots = self._fetch_robots(host)
+                    with self._lock:
+                        self._robots[host] = robots
+        return robots.can_fetch(self.user_agent, url)
+
+    def _fetch_robots(self, host):
+        """Parsed robots.txt for host; errors allow everything, 401/403 nothing"""
+        robots = RobotFileParser(host + "/robots.txt")
+        try:
+            response = self.session.get(robots.url, timeout=self.timeout)
+            if response.status_code in (401, 403):
+                robots.disallow_all = True
+            elif response.ok:
+                robots.parse(response.text.splitlines())
+            else:
+                robots.allow_all = True
+        except requests.RequestException:
+            robots.allow_all = True
+        return robots
+
+    def fetch(self, url):
+        """
+        Return the body of url, revalidating a cached copy if there is one
+        Returns None for errors and non-200 responses.
+        """
+        cached = self.cache.get(url) if self.cache else None
+        headers = {}
+        if cached:
+            if cached.get('etag'):
+                headers["If-None-Match"] = cached['etag']
+            if cached.get('last_modified'):
+                headers["If-Modified-Since"] = cached['last_modified']
+
+        host = urlsplit(url).netloc
+        with self._host_slot(host):
+            self._wait_for_turn(host)
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except requests.RequestException:
+                self.stats.add(errors=1)
+                return None
+
+        # Bytes read off the wire, before any gzip decoding
+        received = response.raw.tell() if response.raw is not None else len(response.content)
+        if response.status_code == 304 and cached:
+            self.stats.add(not_modified=1, bytes=received)
+            return cached['body']
+        if response.status_code != 200:
+            self.stats.add(errors=1, bytes=received)
+            return None
+
+        self.stats.add(pages=1, bytes=received or len(response.content))
+        body = response.text
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        if self.cache and (etag or last_modified):
+            self.cache.set(url, etag, last_modified, body)
+        return body
+
+    def _process(self, url):
+        """(jobs, links) found at url, or None when robots.txt disallows it"""
+        if not self.allowed(url):
+            self.stats.add(disallowed=1)
+            return None
+        body = self.fetch(url)
+        if body is None:
+            return [], []
+        jobs, links = parse_page(url, body)
+        self.stats.add(jobs=len(jobs))
+        return jobs, links
+
+    def crawl(self, seed_urls, max_pages=100, follow=None):
+        """
+        Yield jobs found by crawling from seed_urls
+
+        Only links on the seed hosts are followed, and only those matching
+        the `follow` regex when one is given. At most max_pages pages are
+        requested.
+        """
+        follow = re.compile(follow) if isinstance(follow, str) else follow
+        hosts = {urlsplit(url).netloc for url in seed_urls}
+        frontier = deque()
+        seen = set()
+
+        def enqueue(url, is_seed=False):
+            url = urldefrag(url)[0]
+            parts = urlsplit(url)
+            if url in seen or parts.scheme not in ("http", "https") or parts.netloc not in hosts:
+                return
+            seen.add(url)
+            if not is_seed and follow is not None and not follow.search(url):
+                return
+            # robots.txt is checked on the worker, so a slow host does not stall this loop
+            frontier.append(url)
+
+        for url in seed_urls:
+            enqueue(url, is_seed=True)
+
+        requested = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = set()
+            while frontier or pending:
+                while frontier and len(pending) < self.workers * 2 and requested < max_pages:
+                    pending.add(pool.submit(self._process, frontier.popleft()))
+                    requested += 1
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if result is None:
+                        # Disallowed pages were never requested
+                        requested -= 1
+                        continue
+                    jobs, links = result
+                    for link in links:
+                        enqueue(link)
+                    yield from jobs
+        self.stats.finished = time.perf_counter()
+
+
+def _text(value):
+    if isinstance(value, dict):
+        return value.get('name') or value.get('value') or ""
+    return str(value or "")
+
+
+def _location(value):
+    """Flatten a schema.org jobLocation (Place, PostalAddress or a list of them)"""
+    if isinstance(value, list):
+        return " / ".join(filter(None, (_location(v) for v in value)))
+    if isinstance(value, dict):
+        address = value.get('address', value)
+        if isinstance(address, dict):
+            parts = [address.get(k) for k in ('addressLocality', 'addressRegion', 'addressCountry')]
+            return ", ".join(_text(p) for p in parts if p)
+        return _text(address)
+    return _text(value)
+
+
+def _job_postings(data):
+    """JobPosting objects in a JSON-LD document, including lists and @graph"""
+    if isinstance(data, list):
+        for item in data:
+            yield from _job_postings(item)
+    elif isinstance(data, dict):
+        types = data.get('@type')
+        if types == 'JobPosting' or (isinstance(types, list) and 'JobPosting' in types):
+            yield data
+        yield from _job_postings(data.get('@graph', []))
+
+
+def parse_page(url, body):
+    """
+    Extract (jobs, links) from an HTML page
+    Jobs come from schema.org JobPosting JSON-LD, the markup job boards
+    publish for search engines; descriptions go through clean_job_description.
+    """
+    soup = BeautifulSoup(body, HTML_PARSER, parse_only=PAGE_STRAINER)
+    jobs = []
+    for script in soup.find_all("script", type="application/ld+json"):
+        try:
+            data = json.loads(script.string or "")
+        except ValueError:
+            continue
+        for posting in _job_postings(data):
+            job = {
+                'title': _text(posting.get('title')).strip(),
+                'company': _text(posting.get('hiringOrganization')).strip(),
+                'location': _location(posting.get('jobLocation')) or
+                            ("Remote" if posting.get('jobLocationType') == "TELECOMMUTE" else ""),
+                'description': clean_job_description(_text(posting.get('description'))),
+                'url': url
+            }
+            if posting.get('identifier'):
+                job['id'] = _text(posting['identifier'])
+            if job['title'] and job['description']:
+                jobs.append(job)
+    links = [urljoin(url, a['href']) for a in soup.find_all("a", href=True)]
+    return jobs, links
+
+
+def crawl_jobs(seed_urls, max_pages=100, follow=None, **options):
+    """Crawl from seed_urls and return (jobs, stats)"""
+    crawler = Crawler(**options)
+    jobs = list(crawler.crawl(seed_urls, max_pages=max_pages, follow=follow))
+    return jobs, crawler.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl job boards for JobPosting pages")
+    parser.add_argument("urls", nargs="+", help="seed URLs")
+    parser.add_argument("--max-pages", type=int, default=100)
+    parser.add_argument("--follow", help="only follow links matching this regex")
+    parser.add_argument("--workers", "-w", type=int, default=8, help="concurrent requests in total")
+    parser.add_argument("--per-host", type=int, default=2, help="concurrent requests per host")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds between requests to a host")
+    parser.add_argument("--no-cache", action="store_true", help="skip the on-disk HTTP cache")
+    parser.add_argument("--output", "-o", help="write jobs to this JSONL file")
+    parser.add_argument("--store", action="store_true", help="import jobs into the job store")
+    args = parser.parse_args()
+
+    crawler = Crawler(workers=args.workers, per_host=args.per_host, host_delay=args.delay,
+                      cache_dir=None if args.no_cache else DEFAULT_CACHE_DIR)
+    jobs = list(crawler.crawl(args.urls, max_pages=args.max_pages, follow=args.follow))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            for job in jobs:
+                f.write(json.dumps(job, ensure_ascii=False) + "\n")
+    if args.store:
+        from job_store import get_job_store
+        print(f"Job store: {get_job_store(create=True).import_jobs(jobs, source='crawler')}")
+    print(crawler.stats.summary())
+
+
+if __name__ == "__main__":
+    main()
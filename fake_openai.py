@@ -0,0 +1,386 @@
+"""
+Local stand-in for the OpenAI chat completions API
+Lets the LLM code paths run without network access, with configurable
+latency and injected failures, e.g. for throughput benchmarks:
+
+    with FakeOpenAIServer(latency=0.2) as server:
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        ...
+"""
+
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Benchmarks open hundreds of connections at once; the default backlog is 5
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        # Clients hang up (closing surplus keep-alive connections, giving up); not a server error
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FakeOpenAIServer:
+    """
+    Serves /v1/chat/completions on a background thread
+
+    latency:        seconds to wait before answering each request
+    token_latency:  extra seconds per 1,000 prompt tokens (~4 characters each)
+    completion_latency: extra seconds per 1,000 completion tokens, spread over
+                    the chunks of a stream
+    model_latency:  {model: completion_latency} for models that generate
+                    faster or slower than the default
+    chunk_delay:    seconds between streamed chunks
+    failure_rate:   fraction of requests answered with `failure_status`
+    rate_limit:     requests per second allowed per API key (0 = no limit);
+                    requests over it get an immediate 429 with Retry-After
+    reply:          callable(messages) -> str producing the completion text;
+                    replies longer than the request's max_tokens are cut
+                    off with finish_reason "length"
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, chunk_delay=0.0,
+                 failure_rate=0.0, failure_status=429, reply=None, seed=0, token_latency=0.0,
+                 rate_limit=0.0, completion_latency=0.0, model_latency=None):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.completion_latency = completion_latency
+        self.model_latency = model_latency or {}
+        self.chunk_delay = chunk_delay
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.reply = reply or default_reply
+        self.rate_limit = rate_limit
+        self.request_count = 0
+        self.failure_count = 0
+        self.rate_limited_count = 0
+        self.requests_by_key = {}
+        self.prompt_tokens = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._server = _HTTPServer((host, port), self._make_handler())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _check_rate_limit(self, key):
+        """Seconds until `key` may send another request (0.0 if it may now)"""
+        with self._lock:
+            self.request_count += 1
+            self.requests_by_key[key] = self.requests_by_key.get(key, 0) + 1
+            if not self.rate_limit:
+                return 0.0
+            # Token bucket holding one second of requests
+            now = time.monotonic()
+            tokens, updated = self._buckets.get(key, (self.rate_limit, now))
+            tokens = min(self.rate_limit, tokens + (now - updated) * self.rate_limit)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                self.rate_limited_count += 1
+                return (1 - tokens) / self.rate_limit
+            self._buckets[key] = (tokens - 1, now)
+            return 0.0
+
+    def _reply(self, request):
+        """(text, finish_reason, seconds per 1,000 completion tokens) for a request"""
+        text, finish_reason = self.reply(request["messages"]), "stop"
+        max_tokens = request.get("max_tokens")
+        if max_tokens and count_tokens(text) > max_tokens:
+            text, finish_reason = text[:max_tokens * 4], "length"
+        return text, finish_reason, self.model_latency.get(request.get("model"), self.completion_latency)
+
+    def _begin_request(self):
+        """Count the request and decide whether it should fail"""
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            fail = self._random.random() < self.failure_rate
+            if fail:
+                self.failure_count += 1
+            return fail
+
+    def _end_request(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status, payload, headers=None):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": "Not found"}})
+                    return
+
+                retry_after = server._check_rate_limit(self.headers.get("Authorization", ""))
+                if retry_after:
+                    self._send_json(
+                        429,
+                        {"error": {"message": "Rate limit reached", "type": "requests",
+                                   "code": "rate_limit_exceeded"}},
+                        {"Retry-After": f"{retry_after:.3f}"}
+                    )
+                    return
+
+                fail = server._begin_request()
+                try:
+                    prompt_tokens = prompt_token_count(request)
+                    with server._lock:
+                        server.prompt_tokens += prompt_tokens
+                    time.sleep(server.latency + server.token_latency * prompt_tokens / 1000)
+                    if fail:
+                        self._send_json(
+                            server.failure_status,
+                            {"error": {"message": "Injected failure", "type": "fake_error"}},
+                            {"Retry-After": "0"}
+                        )
+                    elif request.get("stream"):
+                        self._stream(request)
+                    else:
+                        text, finish_reason, completion_latency = server._reply(request)
+                        time.sleep(completion_latency * count_tokens(text) / 1000)
+                        self._send_json(200, completion(request, text, finish_reason))
+                finally:
+                    server._end_request()
+
+            def _stream(self, request):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                text, finish_reason, completion_latency = server._reply(request)
+                # Stream word by word, keeping the whitespace attached
+                pieces = [word + " " for word in text.split(" ")]
+                pieces[-1] = pieces[-1][:-1]
+                for piece in pieces:
+                    self._write_event(completion_chunk(request, piece))
+                    delay = server.chunk_delay + completion_latency * count_tokens(piece) / 1000
+                    if delay:
+                        time.sleep(delay)
+                self._write_event(completion_chunk(request, None, finish_reason=finish_reason))
+                if (request.get("stream_options") or {}).get("include_usage"):
+                    self._write_event(usage_chunk(request, text))
+                self._write_chunk(b"data: [DONE]\n\n")
+                self._write_chunk(b"")
+
+            def _write_event(self, payload):
+                self._write_chunk(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+
+            def _write_chunk(self, data):
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+def default_reply(messages):
+    """Deterministic reply derived from the prompt"""
+    prompt = messages[-1]["content"]
+    first_line = prompt.strip().splitlines()[0] if prompt.strip() else ""
+    return f"Fake response to: {first_line[:80]}"
+
+
+def stub_reply(messages):
+    """
+    Deterministic reply shaped like a real answer to each app prompt
+    Numbers and picks are derived from a hash of the prompt, so a prompt
+    always gets the same reply and parsers see realistic structure.
+    """
+    prompt = messages[-1]["content"]
+    seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+    rng = random.Random(seed)
+    categories = ["technical", "behavioral", "culture", "problem-solving"]
+    skills = ["SQL", "Python", "Tableau", "stakeholder management", "A/B testing", "AWS", "React"]
+    count = re.search(r"generate (\d+) interview questions", prompt)
+    count = int(count.group(1)) if count else 10
+
+    def question(i):
+        return {"text": f"How have you applied {rng.choice(skills)} to solve problem {i} in a past role?",
+                "category": categories[i % 4], "difficulty": rng.choice(["easy", "medium", "hard"])}
+
+    def analysis():
+        return (f"1. KEY SKILLS REQUIRED: {', '.join(rng.sample(skills, 5))}\n"
+                f"2. EXPERIENCE LEVEL: {rng.choice(['entry', 'mid', 'senior'])}\n"
+                "3. COMPANY CULTURE: Collaborative and data-driven.\n"
+                "4. MAIN RESPONSIBILITIES: Build dashboards, run analyses, present findings.\n"
+                "5. POTENTIAL CHALLENGES: Broad scope for a single role.")
+
+    def star_examples():
+        return "\n\n".join(
+            f"**Question {i}:** Tell me about a time you used {rng.choice(skills)}.\n"
+            "- Situation: Our weekly report took two days to build.\n"
+            "- Task: Automate it before the quarterly review.\n"
+            "- Action: I rebuilt the pipeline and added tests.\n"
+            f"- Result: Report time dropped by {rng.randint(30, 90)}%."
+            for i in range(1, 4))
+
+    if "scoring rubric" in prompt:
+        picked = rng.sample(skills, 3)
+        return ("1. MUST COVER: " + "; ".join(f"a concrete example using {skill}" for skill in picked) + "\n"
+                "2. STRONG SIGNALS: Quantified results and trade-offs explained.\n"
+                "3. RED FLAGS: Vague team-level claims with no personal contribution.\n"
+                "4. MODEL ANSWER OUTLINE: Situation; goal; what you did; measurable result.")
+    if "against the rubric" in prompt:
+        return (f"1. SCORE: {rng.randint(4, 9)}/10\n"
+                "2. STRENGTHS: Covers the concrete example.\n"
+                "3. WEAKNESSES: No measurable result.\n"
+                "4. IMPROVED VERSION: I led the migration and cut costs by 20%.")
+    if '"star_examples"' in prompt:
+        return json.dumps({"analysis": analysis(),
+                           "questions": [question(i) for i in range(1, 11)],
+                           "star_examples": star_examples()})
+    if "JSON Lines" in prompt:
+        return "\n".join(json.dumps(question(i)) for i in range(1, count + 1))
+    if "interview questions" in prompt:
+        return "\n".join(f"{i}. {question(i)['text']}" for i in range(1, count + 1))
+    if "Evaluate this answer" in prompt:
+        return (f"1. SCORE: {rng.randint(4, 9)}/10\n"
+                "2. STRENGTHS: Clear structure and a concrete example.\n"
+                "3. WEAKNESSES: The result is not quantified.\n"
+                "4. IMPROVED VERSION: " + "In my last role I led the migration and cut costs by 20%. " * 3)
+    if "MATCH SCORE" in prompt:
+        picked = rng.sample(skills, 4)
+        return (f"1. MATCH SCORE: {rng.randint(40, 95)}%\n"
+                f"2. MATCHING SKILLS: {', '.join(picked[:2])}\n"
+                f"3. MISSING SKILLS: {', '.join(picked[2:])}\n"
+                "4. RESUME STRENGTHS: Quantified achievements and relevant projects.\n"
+                "5. IMPROVEMENT SUGGESTIONS: Mirror the job's keywords in the summary.")
+    if "cover letter" in prompt:
+        return "\n\n".join(["Dear Hiring Manager,",
+                             "I am excited to apply for this role. " * 4,
+                             f"My experience with {rng.choice(skills)} has prepared me well. " * 4,
+                             "Thank you for your consideration. " * 2, "Sincerely,\nA Candidate"])
+    if "STAR method answer examples" in prompt:
+        return star_examples()
+    if "Analyze this job description" in prompt:
+        return analysis()
+    return default_reply(messages)
+
+
+def count_tokens(text):
+    """Rough token count used for the usage block"""
+    return max(1, len(text) // 4)
+
+
+def prompt_token_count(request):
+    return sum(count_tokens(m.get("content") or "") for m in request.get("messages", []))
+
+
+def usage(request, text):
+    prompt_tokens = prompt_token_count(request)
+    completion_tokens = count_tokens(text)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens
+    }
+
+
+def completion(request, text, finish_reason="stop"):
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", "fake"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": text},
+            "finish_reason": finish_reason
+        }],
+        "usage": usage(request, text)
+    }
+
+
+def completion_chunk(request, text, finish_reason=None):
+    delta = {"content": text} if text is not None else {}
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": request.get("model", "fake"),
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+    }
+
+
+def usage_chunk(request, text):
+    """Last chunk of a stream when stream_options.include_usage is set"""
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": request.get("model", "fake"),
+        "choices": [],
+        "usage": usage(request, text)
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a fake OpenAI chat completions server")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--chunk-delay", type=float, default=0.02)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--stub", action="store_true", help="answer with realistic stub replies")
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(port=args.port, latency=args.latency,
+                              chunk_delay=args.chunk_delay, failure_rate=args.failure_rate,
+                              reply=stub_reply if args.stub else None)
+    print(f"Fake OpenAI server on {server.base_url} (set OPENAI_BASE_URL to use it)")
+    server.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
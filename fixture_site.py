@@ -0,0 +1,217 @@
+"""
+Local job board for exercising the crawler without network access
+Serves paginated listing pages that link to job pages. Job pages carry
+schema.org JobPosting JSON-LD, ETag and Last-Modified headers, and answer
+conditional requests with 304 Not Modified:
+
+    with FixtureJobSite(n_jobs=200, latency=0.02) as site:
+        crawl_jobs([site.start_url])
+"""
+
+import hashlib
+import html
+import json
+import socket
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from scraper import SAMPLE_JOBS
+
+PAGE_SIZE = 20
+ROBOTS_TXT = "User-agent: *\nDisallow: /private/\n"
+
+
+def fixture_job(i):
+    """The i-th job of the site, remixed from the sample jobs"""
+    sample = SAMPLE_JOBS[i % len(SAMPLE_JOBS)]
+    return dict(sample, company=f"{sample['company']} {i}", id=f"fixture-{i}")
+
+
+def description_html(description):
+    """Render a plain-text description the way job boards do, with lists"""
+    parts = []
+    in_list = False
+    for line in description.split("\n"):
+        text = html.escape(line.strip())
+        if text.startswith("- "):
+            if not in_list:
+                parts.append("<ul>")
+                in_list = True
+            parts.append(f"<li>{text[2:]}</li>")
+            continue
+        if in_list:
+            parts.append("</ul>")
+            in_list = False
+        if text:
+            parts.append(f"<p>{text}</p>")
+    if in_list:
+        parts.append("</ul>")
+    return "\n".join(parts)
+
+
+def job_page(i):
+    job = fixture_job(i)
+    body = description_html(job['description'])
+    posting = {
+        "@context": "https://schema.org",
+        "@type": "JobPosting",
+        "identifier": job['id'],
+        "title": job['title'],
+        "hiringOrganization": {"@type": "Organization", "name": job['company']},
+        "jobLocation": {"@type": "Place", "address": job['location']},
+        "description": body
+    }
+    return f"""<!DOCTYPE html>
+<html><head><title>{html.escape(job['title'])}</title>
+<script type="application/ld+json">{json.dumps(posting)}</script>
+<style>.job {{ font-family: sans-serif; }}</style></head>
+<body><nav><a href="/jobs?page=1">All jobs</a></nav>
+<div class="job"><h1>{html.escape(job['title'])}</h1>
+<div class="company">{html.escape(job['company'])}</div>
+<div class="location">{html.escape(job['location'])}</div>
+<div class="description">{body}</div></div></body></html>"""
+
+
+def listing_page(page, n_jobs):
+    first = (page - 1) * PAGE_SIZE
+    links = [f'<li><a href="/jobs/{i}">{html.escape(fixture_job(i)["title"])}</a></li>'
+             for i in range(first, min(first + PAGE_SIZE, n_jobs))]
+    next_link = f'<a rel="next" href="/jobs?page={page + 1}">Next</a>' if first + PAGE_SIZE < n_jobs else ""
+    return f"""<!DOCTYPE html>
+<html><body><h1>Jobs</h1><ul>{"".join(links)}</ul>
+{next_link} <a href="/private/admin">Admin</a></body></html>"""
+
+
+class FixtureJobSite:
+    """
+    Serves the job board on a background thread
+
+    n_jobs:   number of job pages
+    latency:  seconds to wait before answering each request
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, n_jobs=100, latency=0.0):
+        self.n_jobs = n_jobs
+        self.latency = latency
+        self.last_modified = formatdate(time.time() - 3600, usegmt=True)
+        self.request_count = 0
+        self.not_modified_count = 0
+        self.bytes_sent = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.paths = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def start_url(self):
+        return f"{self.base_url}/jobs?page=1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _make_handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                # Headers and body go out in separate writes; without this,
+                # Nagle's algorithm and delayed ACKs stall every response ~40 ms
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def _send(self, status, body=b"", content_type="text/html; charset=utf-8", headers=None):
+                self.send_response(status)
+                if status != 304:
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if status != 304:
+                    self.wfile.write(body)
+                with site._lock:
+                    site.bytes_sent += len(body)
+                    if status == 304:
+                        site.not_modified_count += 1
+
+            def do_GET(self):
+                with site._lock:
+                    site.request_count += 1
+                    site.in_flight += 1
+                    site.max_in_flight = max(site.max_in_flight, site.in_flight)
+                    site.paths.append(self.path)
+                try:
+                    time.sleep(site.latency)
+                    self._route()
+                finally:
+                    with site._lock:
+                        site.in_flight -= 1
+
+            def _route(self):
+                url = urlparse(self.path)
+                if url.path == "/robots.txt":
+                    self._send(200, ROBOTS_TXT.encode(), "text/plain")
+                elif url.path == "/jobs":
+                    page = int(parse_qs(url.query).get("page", ["1"])[0])
+                    self._send(200, listing_page(page, site.n_jobs).encode("utf-8"))
+                elif url.path.startswith("/jobs/") and url.path[6:].isdigit() \
+                        and int(url.path[6:]) < site.n_jobs:
+                    body = job_page(int(url.path[6:])).encode("utf-8")
+                    etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                    headers = {"ETag": etag, "Last-Modified": site.last_modified}
+                    if self.headers.get("If-None-Match") == etag or \
+                            self.headers.get("If-Modified-Since") == site.last_modified:
+                        self._send(304, headers=headers)
+                    else:
+                        self._send(200, body, headers=headers)
+                else:
+                    self._send(404, b"Not found", "text/plain")
+
+        return Handler
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a local job board for the crawler")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--jobs", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    site = FixtureJobSite(port=args.port, n_jobs=args.jobs, latency=args.latency)
+    print(f"Fixture job board on {site.start_url}")
+    site.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        site.stop()
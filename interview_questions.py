@@ -0,0 +1,154 @@
+"""
+Structured interview questions
+The generator is asked for one JSON object per line (text, category,
+difficulty). Lines are parsed as they stream in, so the first questions are
+usable while the rest are still being generated; items that are not valid
+questions are dropped, and a single top-up request replaces them instead of
+regenerating the whole list.
+"""
+
+import json
+import re
+
+CATEGORIES = ('technical', 'behavioral', 'culture', 'problem-solving')
+DIFFICULTIES = ('easy', 'medium', 'hard')
+MIN_QUESTION_CHARS = 15
+
+CATEGORY_ALIASES = {
+    'skills': 'technical',
+    'technical/skills': 'technical',
+    'behavioural': 'behavioral',
+    'culture fit': 'culture',
+    'company/culture fit': 'culture',
+    'company culture': 'culture',
+    'problem solving': 'problem-solving',
+    'problem-solving scenario': 'problem-solving',
+    'scenario': 'problem-solving',
+}
+
+# List markers and numbering a model may put in front of a JSON line
+LINE_PREFIX = re.compile(r'^\s*(?:[-*•]|\d+[.)])?\s*')
+
+
+def _label(value, allowed, aliases=None):
+    if not isinstance(value, str):
+        return None
+    value = " ".join(value.lower().replace('_', ' ').split())
+    value = (aliases or {}).get(value, value)
+    value = value if value in allowed else value.replace(' ', '-')
+    return value if value in allowed else None
+
+
+def validate_question(item):
+    """Return a clean question dict, or None when the item is not a usable question"""
+    if not isinstance(item, dict):
+        return None
+    text = item.get('text')
+    if not isinstance(text, str):
+        return None
+    text = " ".join(text.split())
+    # Headings and fragments ("Technical Questions:") are not questions
+    if len(text) < MIN_QUESTION_CHARS or text.endswith(':'):
+        return None
+    category = _label(item.get('category'), CATEGORIES, CATEGORY_ALIASES)
+    difficulty = _label(item.get('difficulty'), DIFFICULTIES)
+    if category is None or difficulty is None:
+        return None
+    return {'text': text, 'category': category, 'difficulty': difficulty}
+
+
+def parse_question_line(line):
+    """Parse one line of generator output, returning a question dict or None"""
+    line = LINE_PREFIX.sub('', line, count=1).rstrip().rstrip(',')
+    if not line.startswith('{'):
+        return None
+    try:
+        return validate_question(json.loads(line))
+    except ValueError:
+        return None
+
+
+class QuestionParser:
+    """
+    Incremental parser for JSON Lines question output
+
+    feed() takes text chunks as they stream in and returns the questions
+    completed by that chunk; close() flushes a final line without a newline.
+    Duplicate questions count as rejected.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.rejected = 0
+        self._seen = set()
+
+    def _parse(self, line):
+        if not line.strip() or line.lstrip().startswith('```'):
+            return None
+        question = parse_question_line(line)
+        key = question['text'].lower() if question else None
+        if question is None or key in self._seen:
+            self.rejected += 1
+            return None
+        self._seen.add(key)
+        return question
+
+    def feed(self, chunk):
+        self.buffer += chunk
+        if '\n' not in chunk:
+            return []
+        *lines, self.buffer = self.buffer.split('\n')
+        return [q for q in map(self._parse, lines) if q is not None]
+
+    def close(self):
+        line, self.buffer = self.buffer, ""
+        question = self._parse(line)
+        return [question] if question else []
+
+
+class QuestionStream:
+    """
+    Iterate to receive up to num_questions question dicts as they are parsed
+
+    generate(count, exclude) returns an iterable of text chunks asking for
+    `count` questions that differ from the `exclude` texts. If the first
+    stream yields too few valid questions, one top-up request asks for the
+    missing ones. After iteration, `questions`, `rejected`, `requests` and
+    `error` (an "Error: ..." string or None) describe the result.
+    """
+
+    def __init__(self, generate, num_questions):
+        self.generate = generate
+        self.num_questions = num_questions
+        self.questions = []
+        self.requests = 0
+        self.error = None
+        self._parser = QuestionParser()
+
+    @property
+    def rejected(self):
+        return self._parser.rejected
+
+    def _accept(self, questions):
+        for question in questions:
+            if len(self.questions) < self.num_questions:
+                self.questions.append(question)
+                yield question
+
+    def _run(self, count, exclude):
+        self.requests += 1
+        for chunk in self.generate(count, exclude):
+            if chunk.startswith("Error: "):
+                self.error = chunk
+                return
+            # Keep reading past the last question needed so the full reply is cached
+            yield from self._accept(self._parser.feed(chunk))
+        yield from self._accept(self._parser.close())
+
+    def __iter__(self):
+        yield from self._run(self.num_questions, ())
+        missing = self.num_questions - len(self.questions)
+        if missing > 0 and self.error is None:
+            yield from self._run(missing, [q['text'] for q in self.questions])
+        if not self.questions and self.error is None:
+            self.error = "Error: No valid questions were generated"
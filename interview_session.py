@@ -0,0 +1,175 @@
+"""
+Background answer evaluation for mock interview sessions
+Answers are queued as the user submits them and evaluated on a shared
+thread pool while the user keeps answering, so a whole session waits for
+about one LLM round trip instead of one per question.
+
+Scoring rubrics for the current and upcoming questions are prefetched while
+the user types, so evaluations can use the shorter rubric-anchored prompt.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from answer_scoring import score_answers
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Questions after the current one whose rubrics are prefetched
+PREFETCH_AHEAD = int(os.getenv("RUBRIC_PREFETCH_AHEAD", 2))
+PREFETCH_WORKERS = 2
+_prefetch_executor = None
+_prefetching = {}
+
+
+def get_executor():
+    """
+    Thread pool shared by every session in the process
+    Sized by LLM_MAX_CONCURRENCY, so many open sessions cannot flood the API.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            from utils import MAX_CONCURRENCY
+            _executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="evaluate")
+        return _executor
+
+
+def prefetch_rubrics(questions, current=0, ahead=PREFETCH_AHEAD):
+    """
+    Start generating rubrics for questions[current] and the `ahead` after it
+    Runs on a small pool of its own so prefetching never delays queued
+    evaluations; questions whose rubric is cached or already being generated
+    are skipped. Returns the futures started.
+    """
+    global _prefetch_executor
+    from utils import cached_rubric, generate_rubric, question_hash
+
+    started = []
+    for question in questions[current:current + ahead + 1]:
+        if cached_rubric(question) is not None:
+            continue
+        key = question_hash(question)
+        with _executor_lock:
+            if key in _prefetching:
+                continue
+            if _prefetch_executor is None:
+                _prefetch_executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch")
+            future = _prefetching[key] = _prefetch_executor.submit(generate_rubric, question)
+        future.add_done_callback(lambda _, key=key: _prefetch_done(key))
+        started.append(future)
+    return started
+
+
+def _prefetch_done(key):
+    with _executor_lock:
+        _prefetching.pop(key, None)
+
+
+class EvaluationSession:
+    """
+    Evaluations of one mock interview, keyed by question number
+
+    The quick local score is computed on submit; the LLM feedback runs in
+    the background. Resubmitting a question replaces its earlier answer.
+    """
+
+    def __init__(self, evaluate=None):
+        self.evaluate = evaluate
+        self.entries = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _run(self, question, answer):
+        evaluate = self.evaluate
+        if evaluate is None:
+            from utils import evaluate_answer as evaluate
+        return evaluate(question, answer)
+
+    def submit(self, index, question, answer):
+        """Queue an answer for evaluation and return immediately"""
+        entry = {
+            'question': question,
+            'answer': answer,
+            'score': score_answers([answer])[0],
+            'submitted': time.time(),
+            'future': get_executor().submit(self._run, question, answer)
+        }
+        with self._lock:
+            previous = self.entries.get(index)
+            self.entries[index] = entry
+        if previous is not None:
+            previous['future'].cancel()
+
+    def _futures(self):
+        with self._lock:
+            return [entry['future'] for entry in self.entries.values()]
+
+    @property
+    def pending(self):
+        return sum(not future.done() for future in self._futures())
+
+    @property
+    def completed(self):
+        return len(self) - self.pending
+
+    def wait(self, timeout=None):
+        """Block until every queued evaluation has finished (or timeout)"""
+        wait(self._futures(), timeout=timeout)
+        return self.pending == 0
+
+    def results(self):
+        """One dict per answered question, in question order"""
+        with self._lock:
+            entries = sorted(self.entries.items())
+        results = []
+        for index, entry in entries:
+            future = entry['future']
+            if not future.done():
+                status, feedback = 'pending', None
+            elif future.exception() is not None:
+                status, feedback = 'error', f"Error: {future.exception()}"
+            else:
+                feedback = future.result()
+                status = 'error' if feedback.startswith("Error") else 'done'
+            results.append({
+                'index': index,
+                'question': entry['question'],
+                'answer': entry['answer'],
+                'score': entry['score'],
+                'feedback': feedback,
+                'status': status
+            })
+        return results
+
+    def average_score(self):
+        scores = [entry['score'] for entry in self.entries.values()]
+        return sum(scores) / len(scores) if scores else 0.0
+
+    def report(self):
+        """Markdown report of the whole session"""
+        results = self.results()
+        lines = [
+            "# Mock Interview Report",
+            "",
+            f"Questions answered: {len(results)}",
+            f"Average quick score: {self.average_score():.1f}/10",
+        ]
+        for result in results:
+            lines += [
+                "",
+                f"## Question {result['index'] + 1} (score {result['score']}/10)",
+                result['question'],
+                "",
+                "**Your answer:**",
+                result['answer'],
+                "",
+                "**Feedback:**",
+                result['feedback'] or "_Still evaluating..._",
+            ]
+        return "\n".join(lines)
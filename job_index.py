@@ -0,0 +1,246 @@
+"""
+Inverted index for job search
+Tokenizes title, description and location once and ranks matches with BM25
+"""
+
+import heapq
+import math
+import pickle
+import re
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+STOP_WORDS = frozenset([
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in',
+    'is', 'it', 'of', 'on', 'or', 'our', 'the', 'to', 'we', 'with', 'you'
+])
+
+INDEXED_FIELDS = ('title', 'description', 'location')
+
+# Field weights used when combining per-field BM25 scores
+# (location is only used for filtering, not ranking)
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'description': 1.0
+}
+
+
+def tokenize(text):
+    """Lowercase text and split it into searchable terms"""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOP_WORDS]
+
+
+class JobIndex:
+    """
+    In-memory inverted index over job postings
+
+    Each field keeps its own postings lists ({term: {doc_id: term_frequency}})
+    so a query only touches the documents that contain its terms.
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.jobs = []
+        self.postings = {field: {} for field in INDEXED_FIELDS}
+        self.field_lengths = {field: [] for field in INDEXED_FIELDS}
+        self.total_lengths = {field: 0 for field in INDEXED_FIELDS}
+        self._norm_cache = {}
+        self._impact_cache = {}
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def add_job(self, job):
+        """Index a single job and return its document id"""
+        doc_id = len(self.jobs)
+        self.jobs.append(job)
+        self._norm_cache.clear()
+        self._impact_cache.clear()
+
+        for field in INDEXED_FIELDS:
+            terms = tokenize(job.get(field, ""))
+            self.field_lengths[field].append(len(terms))
+            self.total_lengths[field] += len(terms)
+
+            field_postings = self.postings[field]
+            for term in terms:
+                doc_counts = field_postings.setdefault(term, {})
+                doc_counts[doc_id] = doc_counts.get(doc_id, 0) + 1
+
+        return doc_id
+
+    def add_jobs(self, jobs):
+        """Index several jobs incrementally"""
+        return [self.add_job(job) for job in jobs]
+
+    def _docs_with_all(self, terms, fields):
+        """Return ids of documents containing every term in any of the fields"""
+        if len(fields) == 1 and len(set(terms)) == 1:
+            # Single-term filters can use the postings keys without copying
+            return self.postings[fields[0]].get(terms[0], {}).keys()
+
+        candidates = None
+        # Intersect rarest terms first so the working set stays small
+        term_docs = []
+        for term in set(terms):
+            docs = set()
+            for field in fields:
+                docs.update(self.postings[field].get(term, ()))
+            if not docs:
+                return set()
+            term_docs.append(docs)
+
+        for docs in sorted(term_docs, key=len):
+            candidates = docs if candidates is None else candidates & docs
+            if not candidates:
+                break
+        return candidates or set()
+
+    def _length_norms(self, field):
+        """Per-document BM25 length normalisation for a field"""
+        avg_length = self.total_lengths[field] / len(self.jobs) or 1.0
+        return [self.k1 * (1 - self.b + self.b * length / avg_length)
+                for length in self.field_lengths[field]]
+
+    def _term_impacts(self, term):
+        """
+        BM25 contribution of a term to every document that contains it
+
+        Returns ({doc_id: score}, [(score, doc_id), ...] best first). Both are
+        cached per term and dropped whenever the corpus changes.
+        """
+        cached = self._impact_cache.get(term)
+        if cached is not None:
+            return cached
+
+        n_docs = len(self.jobs)
+        scores = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            doc_counts = self.postings[field].get(term)
+            if not doc_counts:
+                continue
+            norms = self._norm_cache.get(field)
+            if norms is None:
+                norms = self._norm_cache[field] = self._length_norms(field)
+            df = len(doc_counts)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            scale = weight * idf * (self.k1 + 1)
+            for doc_id, tf in doc_counts.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + scale * tf / (tf + norms[doc_id])
+
+        ranked = sorted(((score, -doc_id) for doc_id, score in scores.items()), reverse=True)
+        cached = (scores, [(score, -neg_id) for score, neg_id in ranked])
+        self._impact_cache[term] = cached
+        return cached
+
+    def _top_k(self, impacts, allowed, k):
+        """
+        Threshold-algorithm top-k over impact-ordered postings
+
+        Walks every term's postings from the highest score down and stops as
+        soon as no unseen document can beat the current k-th best.
+        """
+        heap = []
+        seen = set()
+        longest = max(len(ranked) for _, ranked in impacts)
+        for depth in range(longest):
+            threshold = 0.0
+            for _, ranked in impacts:
+                if depth >= len(ranked):
+                    # Every document containing this term has been seen already
+                    return heap
+                score, doc_id = ranked[depth]
+                threshold += score
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                if allowed is not None and doc_id not in allowed:
+                    continue
+                total = 0.0
+                for scores, _ in impacts:
+                    term_score = scores.get(doc_id)
+                    if term_score is None:
+                        break
+                    total += term_score
+                else:
+                    entry = (total, -doc_id)
+                    if len(heap) < k:
+                        heapq.heappush(heap, entry)
+                    elif entry > heap[0]:
+                        heapq.heapreplace(heap, entry)
+            if len(heap) == k and heap[0][0] > threshold:
+                break
+        return heap
+
+    def _prepare(self, query, location):
+        """Tokenize a query into (query_terms, impacts, allowed) for search and count"""
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        location_terms = tokenize(location)
+        allowed = self._docs_with_all(location_terms, ('location',)) if location_terms else None
+        impacts = [self._term_impacts(term) for term in query_terms]
+        # Drive intersections and the top-k walk from the rarest terms
+        impacts.sort(key=lambda item: len(item[0]))
+        return query_terms, location_terms, impacts, allowed
+
+    @staticmethod
+    def _intersect(impacts, allowed):
+        """Ids of documents containing every query term (and the location, if any)"""
+        if not impacts[0][0]:
+            return set()
+        candidates = set(impacts[0][0])
+        for scores, _ in impacts[1:]:
+            candidates.intersection_update(scores)
+        if allowed is not None:
+            candidates &= allowed
+        return candidates
+
+    def search_ids(self, query="", location="", top_k=None):
+        """Return matching document ids, best match first"""
+        if top_k is not None and top_k <= 0:
+            return []
+        query_terms, location_terms, impacts, allowed = self._prepare(query, location)
+
+        if not query_terms and not location_terms:
+            ids = range(len(self.jobs))
+            return list(ids if top_k is None else ids[:top_k])
+
+        if not query_terms:
+            # Location-only searches keep the corpus order
+            ids = sorted(allowed)
+            return ids if top_k is None else ids[:top_k]
+
+        if not all(scores for scores, _ in impacts) or (allowed is not None and not allowed):
+            return []
+
+        if top_k is None:
+            ranked = sorted(((sum(scores[d] for scores, _ in impacts), -d)
+                             for d in self._intersect(impacts, allowed)), reverse=True)
+        else:
+            ranked = sorted(self._top_k(impacts, allowed, top_k), reverse=True)
+        return [-neg_id for _, neg_id in ranked]
+
+    def count(self, query="", location=""):
+        """Number of documents matching a query, without ranking them"""
+        query_terms, location_terms, impacts, allowed = self._prepare(query, location)
+        if not query_terms:
+            return len(allowed) if location_terms else len(self.jobs)
+        return len(self._intersect(impacts, allowed))
+
+    def search(self, query="", location="", top_k=None):
+        """Return matching jobs, best match first"""
+        return [self.jobs[doc_id] for doc_id in self.search_ids(query, location, top_k)]
+
+    def save(self, path):
+        """Persist the index to disk"""
+        with open(path, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path):
+        """Load an index previously written with save()"""
+        with open(path, 'rb') as f:
+            index = pickle.load(f)
+        if not isinstance(index, cls):
+            raise ValueError(f"{path} does not contain a JobIndex")
+        return index
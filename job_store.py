@@ -0,0 +1,327 @@
+"""
+Persistent job corpus
+Jobs live in a SQLite database with an FTS5 full-text table, are imported in
+bulk from JSONL or CSV files and deduplicated by a hash of their content.
+The search index is built from the store once and cached next to it, so a
+restart loads a large corpus in seconds.
+
+Usage:
+    python job_store.py import jobs.jsonl more_jobs.csv --source indeed
+    python job_store.py stats
+    python job_store.py search "data analyst"
+    python job_store.py get <job id>
+"""
+
+import argparse
+import csv
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+from job_index import JobIndex
+
+DEFAULT_STORE_PATH = os.path.join("data", "jobs.sqlite3")
+
+JOB_COLUMNS = ('title', 'company', 'location', 'description')
+IMPORT_BATCH_SIZE = 5000
+
+
+def content_hash(job):
+    """Hash of a job's text fields, ignoring case and whitespace differences"""
+    normalized = [" ".join(str(job.get(k) or "").lower().split()) for k in JOB_COLUMNS]
+    return hashlib.sha256("\x1f".join(normalized).encode("utf-8")).hexdigest()
+
+
+def read_job_file(path):
+    """
+    Yield jobs from a JSONL or CSV file one record at a time
+    Malformed JSONL lines are yielded as None, so an import can count them
+    and carry on.
+    """
+    if path.lower().endswith(".csv"):
+        csv.field_size_limit(sys.maxsize)
+        with open(path, encoding="utf-8", newline="") as f:
+            yield from csv.DictReader(f)
+    else:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        yield None
+
+
+class ImportReport:
+    """Counts from one bulk import"""
+
+    def __init__(self):
+        self.added = 0
+        self.duplicates = 0
+        self.invalid = 0
+
+    def __str__(self):
+        return f"{self.added} added, {self.duplicates} duplicates skipped, {self.invalid} invalid"
+
+
+class JobStore:
+    """
+    SQLite-backed job corpus
+
+    Each job gets a stable id (its own 'id' field or a prefix of its content
+    hash); lookups by id use the primary key. Fields other than the standard
+    columns are kept as JSON. An external-content FTS5 table over title,
+    description and location is filled once per import batch, which is
+    several times faster than indexing row by row from a trigger.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                rowid INTEGER PRIMARY KEY,
+                id TEXT NOT NULL UNIQUE,
+                content_hash TEXT NOT NULL UNIQUE,
+                title TEXT NOT NULL,
+                company TEXT NOT NULL,
+                location TEXT NOT NULL,
+                description TEXT NOT NULL,
+                source TEXT,
+                extra TEXT
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+                title, description, location, content='jobs', content_rowid='rowid'
+            );
+            CREATE TRIGGER IF NOT EXISTS jobs_fts_delete AFTER DELETE ON jobs BEGIN
+                INSERT INTO jobs_fts (jobs_fts, rowid, title, description, location)
+                VALUES ('delete', old.rowid, old.title, old.description, old.location);
+            END;
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+        """)
+        self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    @property
+    def version(self):
+        """Increases with every import that adds jobs"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row else 0
+
+    def _row(self, job, source):
+        if not isinstance(job, dict):
+            return None
+        if not isinstance(job.get('title'), str) or not isinstance(job.get('description'), str):
+            return None
+        if not job['title'] or not job['description']:
+            return None
+        digest = content_hash(job)
+        extra = {k: v for k, v in job.items() if k not in JOB_COLUMNS and k != 'id'}
+        return (
+            str(job.get('id') or digest[:16]), digest,
+            job['title'], job.get('company') or "", job.get('location') or "", job['description'],
+            source, json.dumps(extra, ensure_ascii=False) if extra else None
+        )
+
+    def import_jobs(self, jobs, source=None, report=None):
+        """
+        Bulk insert an iterable of job dicts, skipping duplicates
+        Records that are not dicts (e.g. None for a malformed line) or lack
+        a text title or description are counted as invalid and skipped.
+        """
+        report = report or ImportReport()
+        batch = []
+
+        def flush():
+            with self._lock:
+                last_rowid = self._conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM jobs").fetchone()[0]
+                cursor = self._conn.executemany(
+                    "INSERT OR IGNORE INTO jobs (id, content_hash, title, company, location, "
+                    "description, source, extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch
+                )
+                added = max(cursor.rowcount, 0)
+                if added:
+                    self._conn.execute(
+                        "INSERT INTO jobs_fts (rowid, title, description, location) "
+                        "SELECT rowid, title, description, location FROM jobs WHERE rowid > ?",
+                        (last_rowid,)
+                    )
+                    self._conn.execute(
+                        "INSERT INTO meta (key, value) VALUES ('version', 1) "
+                        "ON CONFLICT (key) DO UPDATE SET value = value + 1"
+                    )
+                self._conn.commit()
+            report.added += added
+            report.duplicates += len(batch) - added
+            batch.clear()
+
+        for job in jobs:
+            row = self._row(job, source)
+            if row is None:
+                report.invalid += 1
+                continue
+            batch.append(row)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                flush()
+        if batch:
+            flush()
+        return report
+
+    def import_file(self, path, source=None, report=None):
+        """Import a JSONL or CSV file; source defaults to the file name"""
+        return self.import_jobs(read_job_file(path), source or os.path.basename(path), report)
+
+    @staticmethod
+    def _job(row):
+        job = {'id': row[0], 'title': row[1], 'company': row[2], 'location': row[3], 'description': row[4]}
+        if row[5]:
+            job.update(json.loads(row[5]))
+        return job
+
+    def get(self, job_id):
+        """Return the job with this id, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, title, company, location, description, extra FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        return self._job(row) if row else None
+
+    def iter_jobs(self, batch_size=10000):
+        """Yield every job in import order, reading batch_size rows at a time"""
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT rowid, id, title, company, location, description, extra FROM jobs "
+                    "WHERE rowid > ? ORDER BY rowid LIMIT ?", (last_rowid, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield self._job(row[1:])
+            last_rowid = rows[-1][0]
+
+    def search(self, query, limit=10):
+        """
+        Full-text search with FTS5, ranked by bm25 with titles weighted 3x
+        Every query word must appear; returns a list of jobs.
+        """
+        terms = [t.replace('"', '""') for t in query.split()]
+        if not terms:
+            return []
+        match = " ".join(f'"{t}"' for t in terms)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT j.id, j.title, j.company, j.location, j.description, j.extra "
+                "FROM jobs_fts JOIN jobs j ON j.rowid = jobs_fts.rowid "
+                "WHERE jobs_fts MATCH ? ORDER BY bm25(jobs_fts, 3.0, 1.0, 0.0) LIMIT ?",
+                (match, limit)
+            ).fetchall()
+        return [self._job(row) for row in rows]
+
+    def index_path(self, version=None):
+        version = self.version if version is None else version
+        return f"{self.path}.index-{version}.pickle"
+
+    def load_index(self):
+        """
+        Return a JobIndex over the whole corpus
+        The index is pickled next to the database and rebuilt only after
+        an import changed the corpus.
+        """
+        version = self.version
+        path = self.index_path(version)
+        if os.path.exists(path):
+            try:
+                return JobIndex.load(path)
+            except (OSError, ValueError, EOFError):
+                pass
+
+        index = JobIndex()
+        index.add_jobs(self.iter_jobs())
+        try:
+            index.save(path)
+            for stale in glob.glob(f"{glob.escape(self.path)}.index-*.pickle"):
+                if stale != path:
+                    os.remove(stale)
+        except OSError:
+            # A read-only filesystem only costs a rebuild on the next start
+            pass
+        return index
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_job_store = None
+
+
+def get_job_store(create=False):
+    """
+    Return the shared store at JOB_STORE_PATH (default data/jobs.sqlite3)
+    Returns None when no store exists yet, unless create is set.
+    """
+    global _job_store
+    if _job_store is None:
+        path = os.getenv("JOB_STORE_PATH", DEFAULT_STORE_PATH)
+        if not create and not os.path.exists(path):
+            return None
+        _job_store = JobStore(path)
+    return _job_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the job corpus")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="import JSONL or CSV files")
+    import_parser.add_argument("files", nargs="+")
+    import_parser.add_argument("--source", help="source label (default: file name)")
+    commands.add_parser("stats", help="show corpus size")
+    search_parser = commands.add_parser("search", help="full-text search")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--limit", type=int, default=10)
+    get_parser = commands.add_parser("get", help="show one job by id")
+    get_parser.add_argument("id")
+    args = parser.parse_args()
+
+    store = get_job_store(create=args.command == "import")
+    if store is None:
+        sys.exit("No job store yet, import some jobs first")
+
+    if args.command == "import":
+        report = ImportReport()
+        for path in args.files:
+            store.import_file(path, args.source, report)
+        print(f"{report} ({len(store)} jobs in {store.path})")
+    elif args.command == "stats":
+        print(f"{len(store)} jobs in {store.path} (version {store.version})")
+    elif args.command == "search":
+        for job in store.search(args.query, args.limit):
+            print(f"{job['id']}  {job['title']} at {job['company']} - {job['location']}")
+    elif args.command == "get":
+        job = store.get(args.id)
+        if job is None:
+            sys.exit(f"No job with id {args.id}")
+        print(json.dumps(job, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Incremental reading of one field of a JSON object that is still streaming in
+A string field is decoded as its characters arrive, so its text can be shown
+before the object is complete; an array field yields each element once it
+has fully arrived.
+"""
+
+import json
+import re
+
+ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+WHITESPACE = " \t\r\n"
+
+
+class JSONFieldReader:
+    """
+    Read the top-level field `name` of a streamed JSON object
+
+    feed() takes text chunks and returns what they completed: decoded text
+    pieces for a string field, elements for an array field. `done` is set
+    once the field's closing quote or bracket has been read.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.text = ""
+        self.done = False
+        self._pattern = re.compile(r'"%s"\s*:\s*([\["])' % re.escape(name))
+        self._kind = None
+        self._pos = 0
+        self._decoder = json.JSONDecoder()
+
+    def feed(self, chunk):
+        self.text += chunk
+        if self.done:
+            return []
+        if self._kind is None:
+            # The key may arrive split across chunks, so look back a little
+            match = self._pattern.search(self.text, max(0, self._pos - len(self.name) - 8))
+            if match is None:
+                self._pos = len(self.text)
+                return []
+            self._kind, self._pos = match.group(1), match.end()
+        return self._string() if self._kind == '"' else self._array()
+
+    def _string(self):
+        text, pos, pieces = self.text, self._pos, []
+        start = pos
+        while pos < len(text):
+            char = text[pos]
+            if char == '"':
+                self.done = True
+                break
+            if char != '\\':
+                pos += 1
+                continue
+            pieces.append(text[start:pos])
+            start = pos
+            escape = text[pos + 1:pos + 2]
+            if not escape:
+                break
+            if escape != 'u':
+                pieces.append(ESCAPES.get(escape, escape))
+                pos += 2
+            else:
+                # A high surrogate waits for its low half
+                end = pos + 12 if text[pos + 2:pos + 4].lower() in ('d8', 'd9', 'da', 'db') else pos + 6
+                if len(text) < end:
+                    break
+                try:
+                    pieces.append(json.loads('"%s"' % text[pos:end]))
+                except ValueError:
+                    end = pos + 6
+                    pieces.append(json.loads('"%s"' % text[pos:end]))
+                pos = end
+            start = pos
+        pieces.append(text[start:pos])
+        self._pos = pos + 1 if self.done else pos
+        return [piece for piece in pieces if piece]
+
+    def _array(self):
+        items = []
+        text = self.text
+        while True:
+            pos = self._pos
+            while pos < len(text) and (text[pos] in WHITESPACE or text[pos] == ','):
+                pos += 1
+            if pos == len(text):
+                break
+            if text[pos] == ']':
+                self.done = True
+                break
+            try:
+                item, pos = self._decoder.raw_decode(text, pos)
+            except ValueError:
+                break
+            items.append(item)
+            self._pos = pos
+        return items
@@ -0,0 +1,506 @@
+"""
+Response cache for LLM calls
+Identical requests (same model, messages and sampling settings) are answered
+from an in-process LRU tier, an on-disk SQLite tier or an optional Redis tier
+shared by every replica, instead of the API. Concurrent identical requests
+are coalesced into one upstream call by `in_flight` (see SingleFlight).
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "llm_responses.sqlite3")
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MEMORY_MB = 64
+
+# SQLite hits refresh an entry's access time at most this often, and the
+# refreshes are written with the next set() (or once TOUCH_BATCH pile up),
+# so reads do not take the database write lock
+ACCESS_REFRESH_SECONDS = 300
+TOUCH_BATCH = 256
+
+# Calls sampled above this temperature are meant to vary, so they skip the cache
+MAX_CACHEABLE_TEMPERATURE = 0.7
+
+
+def make_cache_key(model, system_message, prompt, temperature, max_tokens):
+    """Content hash identifying one completion request"""
+    payload = json.dumps(
+        [model, system_message, prompt, temperature, max_tokens],
+        ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CacheStats:
+    """Hit/miss counters shared by every cache tier"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hit_rate, 4)
+        }
+
+
+def value_size(value):
+    """Approximate memory used by a cached value, in bytes"""
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """
+    Thread-safe in-process cache with LRU eviction and optional TTL
+    Bounded by entry count and, when max_bytes is set, by the total size
+    of the cached values.
+    """
+
+    def __init__(self, max_entries=256, ttl=DEFAULT_TTL_SECONDS, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self.stats = CacheStats()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        value, _, size = self._entries.pop(key)
+        self.size -= size
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, _ = entry
+                if expires_at is None or expires_at > time.time():
+                    self._entries.move_to_end(key)
+                    self.stats.hits += 1
+                    return value
+                self._remove(key)
+            self.stats.misses += 1
+            return None
+
+    def set(self, key, value):
+        expires_at = time.time() + self.ttl if self.ttl else None
+        size = value_size(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at, size)
+            self.size += size
+            while len(self._entries) > self.max_entries or \
+                    (self.max_bytes and self.size > self.max_bytes and len(self._entries) > 1):
+                self._remove(next(iter(self._entries)))
+                self.stats.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+class SQLiteCache:
+    """
+    On-disk cache that survives restarts and can be shared by processes
+    Entries expire after `ttl` seconds; the least recently used entries are
+    evicted once the table grows past `max_entries`. Access times are only
+    as fresh as ACCESS_REFRESH_SECONDS, which is plenty for LRU eviction.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=10000, ttl=DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._touched = {}  # key -> access time not yet written
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)"
+        )
+        self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at, last_access FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and (row[1] is None or row[1] > now):
+                if now - row[2] >= ACCESS_REFRESH_SECONDS:
+                    self._touched[key] = now
+                    if len(self._touched) >= TOUCH_BATCH:
+                        self._write_touched()
+                        self._conn.commit()
+                self.stats.hits += 1
+                return row[0]
+            if row is not None:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+            self.stats.misses += 1
+            return None
+
+    def set(self, key, value):
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, now)
+            )
+            self._touched.pop(key, None)
+            self._write_touched()
+            self._evict(now)
+            self._conn.commit()
+
+    def _write_touched(self):
+        """Write pending access times (in the caller's transaction)"""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE responses SET last_access = ? WHERE key = ?",
+                [(at, key) for key, at in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def _evict(self, now):
+        """Drop expired rows, then the least recently used rows over the limit"""
+        removed = self._conn.execute(
+            "DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+        ).rowcount
+        count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count > self.max_entries:
+            removed += self._conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY last_access LIMIT ?)",
+                (count - self.max_entries,)
+            ).rowcount
+        self.stats.evictions += removed
+
+    def clear(self):
+        with self._lock:
+            self._touched.clear()
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+
+class RedisCache:
+    """
+    Cache shared by every replica through Redis or a Redis-compatible server
+    Needs the optional `redis` package. Entries expire with Redis' own TTL,
+    and the server's maxmemory policy bounds its memory. A Redis outage
+    turns into cache misses instead of failed requests.
+    """
+
+    def __init__(self, url, ttl=DEFAULT_TTL_SECONDS, prefix="llm:"):
+        import redis
+
+        self.url = url
+        self.ttl = ttl
+        self.prefix = prefix
+        self.stats = CacheStats()
+        self._errors = redis.RedisError
+        self._client = redis.Redis.from_url(url, socket_timeout=1.0, decode_responses=True)
+        self._client.ping()
+
+    def get(self, key):
+        try:
+            value = self._client.get(self.prefix + key)
+        except self._errors:
+            value = None
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    def set(self, key, value):
+        try:
+            self._client.set(self.prefix + key, value, ex=int(self.ttl) if self.ttl else None)
+        except self._errors:
+            pass
+
+    def clear(self):
+        try:
+            keys = list(self._client.scan_iter(match=self.prefix + "*", count=1000))
+            if keys:
+                self._client.delete(*keys)
+        except self._errors:
+            pass
+
+
+class TieredCache:
+    """
+    Looks keys up in each tier in order (fastest first)
+    Hits in a slower tier are copied into the faster ones.
+    """
+
+    def __init__(self, *tiers):
+        self.tiers = list(tiers)
+        self.stats = CacheStats()
+
+    def get(self, key):
+        for i, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not None:
+                for faster in self.tiers[:i]:
+                    faster.set(key, value)
+                self.stats.hits += 1
+                return value
+        self.stats.misses += 1
+        return None
+
+    def set(self, key, value):
+        for tier in self.tiers:
+            tier.set(key, value)
+
+    def clear(self):
+        for tier in self.tiers:
+            tier.clear()
+
+    def stats_by_tier(self):
+        """Counters for the whole cache and for each tier"""
+        stats = {'total': self.stats.as_dict()}
+        for tier in self.tiers:
+            stats[type(tier).__name__] = tier.stats.as_dict()
+        return stats
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def build_response_cache():
+    """
+    Build the default cache from environment settings
+
+    LLM_CACHE=0 disables caching, LLM_CACHE_PATH sets the SQLite file
+    (empty for memory only; processes on one host can share it), and
+    LLM_CACHE_REDIS_URL adds a Redis tier shared across replicas.
+    LLM_CACHE_TTL is in seconds, and LLM_CACHE_MEMORY_ENTRIES,
+    LLM_CACHE_MEMORY_MB and LLM_CACHE_DISK_ENTRIES bound the local tiers.
+    """
+    if os.getenv("LLM_CACHE", "1").lower() in ("0", "false", "no", "off"):
+        return None
+
+    ttl = float(os.getenv("LLM_CACHE_TTL", DEFAULT_TTL_SECONDS))
+    max_bytes = int(float(os.getenv("LLM_CACHE_MEMORY_MB", DEFAULT_MEMORY_MB)) * 1024 * 1024)
+    tiers = [LRUCache(int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", 256)), ttl, max_bytes)]
+
+    path = os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH)
+    if path:
+        try:
+            tiers.append(SQLiteCache(path, int(os.getenv("LLM_CACHE_DISK_ENTRIES", 10000)), ttl))
+        except sqlite3.Error:
+            # A read-only or locked filesystem should not break the app
+            pass
+
+    redis_url = os.getenv("LLM_CACHE_REDIS_URL")
+    if redis_url:
+        try:
+            tiers.append(RedisCache(redis_url, ttl))
+        except Exception:
+            # Missing redis package or unreachable server: run with the local tiers
+            pass
+
+    return TieredCache(*tiers)
+
+
+def get_response_cache():
+    """Return the process-wide response cache, creating it on first use"""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = build_response_cache() or False
+    # An empty LRUCache is falsy (it has __len__), so compare with False
+    return None if _response_cache is False else _response_cache
+
+
+def set_response_cache(cache):
+    """Replace the process-wide cache (any object with get/set), or None to disable"""
+    global _response_cache
+    _response_cache = cache if cache is not None else False
+
+
+class Flight:
+    """One in-flight call: its streamed chunks so far, then its result or error"""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.value = None
+        self.error = None
+        self._changed = threading.Condition()
+
+    def add(self, chunk):
+        with self._changed:
+            self.chunks.append(chunk)
+            self._changed.notify_all()
+
+    def finish(self, value=None, error=None):
+        with self._changed:
+            self.value, self.error, self.done = value, error, True
+            self._changed.notify_all()
+
+    def wait(self):
+        with self._changed:
+            self._changed.wait_for(lambda: self.done)
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+    def iter_chunks(self):
+        """Every chunk from the first, waiting for new ones until the call finishes"""
+        position = 0
+        while True:
+            with self._changed:
+                self._changed.wait_for(lambda: self.done or len(self.chunks) > position)
+                new, done, error = self.chunks[position:], self.done, self.error
+            position += len(new)
+            yield from new
+            if done and position == len(self.chunks):
+                if error is not None:
+                    raise error
+                return
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical work into one upstream call
+    While a call for a key is running, later callers for the same key wait
+    for (or stream along with) that call instead of repeating it. Nothing is
+    kept once the call finishes; completed results belong in the cache.
+    """
+
+    def __init__(self):
+        self.leaders = 0
+        self.followers = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._flights)
+
+    def _join(self, key):
+        """(flight, True if the caller must run the call)"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.followers += 1
+                return flight, False
+            flight = self._flights[key] = Flight()
+            self.leaders += 1
+            return flight, True
+
+    def _land(self, key):
+        with self._lock:
+            self._flights.pop(key, None)
+
+    def do(self, key, func):
+        """Return (func() or the running call's result, True if it was shared)"""
+        flight, leader = self._join(key)
+        if not leader:
+            return flight.wait(), True
+        try:
+            value = func()
+        except BaseException as e:
+            self._land(key)
+            flight.finish(error=e)
+            raise
+        self._land(key)
+        flight.finish(value)
+        return value, False
+
+    def stream(self, key, open_stream):
+        """
+        Return (chunk iterator, True if shared) for the stream open_stream() returns
+        The stream is consumed on a background thread, so a caller that
+        stops reading early does not cut the other callers off.
+        """
+        flight, leader = self._join(key)
+        if leader:
+            def produce():
+                try:
+                    for chunk in open_stream():
+                        flight.add(chunk)
+                except BaseException as e:
+                    self._land(key)
+                    flight.finish(error=e)
+                    return
+                self._land(key)
+                flight.finish()
+
+            threading.Thread(target=produce, daemon=True, name="single-flight").start()
+        return flight.iter_chunks(), not leader
+
+    def stats(self):
+        total = self.leaders + self.followers
+        return {
+            'leaders': self.leaders,
+            'followers': self.followers,
+            'in_flight': len(self),
+            'coalesced_rate': round(self.followers / total, 4) if total else 0.0
+        }
+
+
+# Process-wide: every Streamlit session in this server shares it
+in_flight = SingleFlight()
+
+
+def cache_stats():
+    """
+    Hit ratios of the response cache tiers and single-flight counters
+    Does not create the cache; the tiers are empty until the first LLM call.
+    """
+    stats = {}
+    cache = _response_cache
+    if cache is not None and cache is not False:
+        stats.update(cache.stats_by_tier() if hasattr(cache, "stats_by_tier")
+                     else {type(cache).__name__: cache.stats.as_dict()})
+        for tier in getattr(cache, "tiers", [cache]):
+            if isinstance(tier, LRUCache):
+                stats[type(tier).__name__]['bytes'] = tier.size
+                stats[type(tier).__name__]['entries'] = len(tier)
+    stats['single_flight'] = in_flight.stats()
+    return stats
@@ -0,0 +1,373 @@
+"""
+Latency, token and cost metrics for LLM calls
+Every call_gpt / stream_gpt / acall_gpt call is recorded under its feature
+(analyze, questions, evaluate, ...): API latency and time-to-first-token
+histograms, prompt/completion tokens, estimated cost, cache hits, calls that
+shared another session's in-flight request, and errors. The Prometheus
+export also includes the response cache tiers (see llm_cache.cache_stats)
+and the request queue and lanes (see llm_scheduler).
+
+Metrics are kept in memory and can be exported three ways:
+    LLM_METRICS_LOG=metrics.jsonl   append one JSON line per call
+    LLM_METRICS_PORT=9464           serve Prometheus text on /metrics
+    app.py?diagnostics=1            hidden diagnostics page
+"""
+
+import json
+import os
+import threading
+import time
+
+# Upper bounds in seconds; the last bucket is +Inf
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# USD per million (prompt, completion) tokens, matched by model name prefix
+MODEL_PRICES = {
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+
+
+def token_cost(model, prompt_tokens, completion_tokens):
+    """Estimated USD cost of a call, 0.0 for models without a known price"""
+    for prefix in sorted(MODEL_PRICES, key=len, reverse=True):
+        if model.startswith(prefix):
+            prompt_price, completion_price = MODEL_PRICES[prefix]
+            return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1e6
+    return 0.0
+
+
+class Histogram:
+    """Fixed-bucket histogram in the Prometheus style"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating inside its bucket (like histogram_quantile)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def merge(self, other):
+        """Add the observations of a histogram with the same buckets"""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.sum += other.sum
+        self.count += other.count
+        return self
+
+    def cumulative(self):
+        """(upper bound label, cumulative count) pairs, ending with +Inf"""
+        total = 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            total += count
+            yield str(bound), total
+
+
+class FeatureMetrics:
+    """Counters and histograms for one feature"""
+
+    def __init__(self):
+        self.requests = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.latency = Histogram()
+        self.ttft = Histogram()
+
+    @property
+    def cache_hit_rate(self):
+        return self.cache_hits / self.requests if self.requests else 0.0
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'cache_hits': self.cache_hits,
+            'cache_hit_rate': round(self.cache_hit_rate, 4),
+            'coalesced': self.coalesced,
+            'errors': self.errors,
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'cost_usd': round(self.cost, 6),
+            'latency_p50': self.latency.quantile(0.5),
+            'latency_p95': self.latency.quantile(0.95),
+            'ttft_p50': self.ttft.quantile(0.5),
+            'ttft_p95': self.ttft.quantile(0.95),
+        }
+
+
+# (metric name, FeatureMetrics attribute, help text) for the counters
+COUNTERS = (
+    ("llm_requests_total", "requests", "LLM calls, including cache hits"),
+    ("llm_cache_hits_total", "cache_hits", "LLM calls answered from the response cache"),
+    ("llm_coalesced_total", "coalesced", "LLM calls that shared an identical in-flight request"),
+    ("llm_errors_total", "errors", "LLM calls that failed"),
+    ("llm_prompt_tokens_total", "prompt_tokens", "Prompt tokens reported by the API"),
+    ("llm_completion_tokens_total", "completion_tokens", "Completion tokens reported by the API"),
+    ("llm_cost_usd_total", "cost", "Estimated API cost in USD"),
+)
+HISTOGRAMS = (
+    ("llm_request_duration_seconds", "latency", "API call latency, cache hits and coalesced calls excluded"),
+    ("llm_time_to_first_token_seconds", "ttft", "Time to the first streamed token"),
+)
+
+
+class LLMMetrics:
+    """Thread-safe per-feature metrics, with an optional JSONL sink"""
+
+    def __init__(self, log_path=None):
+        self.log_path = log_path
+        self.features = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._log = None
+
+    def record(self, feature, model, latency, ttft=None, prompt_tokens=0, completion_tokens=0,
+               cache_hit=False, coalesced=False, error=None):
+        """
+        Record one call; error is the exception or error text of a failed call
+        A coalesced call waited for another session's identical request.
+        """
+        cost = token_cost(model, prompt_tokens, completion_tokens)
+        with self._lock:
+            metrics = self.features.get(feature)
+            if metrics is None:
+                metrics = self.features[feature] = FeatureMetrics()
+            metrics.requests += 1
+            if cache_hit:
+                metrics.cache_hits += 1
+            elif coalesced:
+                metrics.coalesced += 1
+            else:
+                metrics.latency.observe(latency)
+            if ttft is not None:
+                metrics.ttft.observe(ttft)
+            if error is not None:
+                metrics.errors += 1
+            metrics.prompt_tokens += prompt_tokens
+            metrics.completion_tokens += completion_tokens
+            metrics.cost += cost
+            if self.log_path:
+                self._write({
+                    'time': round(time.time(), 3), 'feature': feature, 'model': model,
+                    'latency_ms': round(latency * 1000, 1),
+                    'ttft_ms': round(ttft * 1000, 1) if ttft is not None else None,
+                    'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                    'cost_usd': round(cost, 6), 'cache_hit': cache_hit, 'coalesced': coalesced,
+                    'error': str(error) if error is not None else None
+                })
+
+    def _write(self, entry):
+        try:
+            if self._log is None:
+                directory = os.path.dirname(self.log_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._log = open(self.log_path, "a", encoding="utf-8", buffering=1)
+            self._log.write(json.dumps(entry) + "\n")
+        except OSError:
+            # Metrics must never break a call; keep the in-memory numbers only
+            self.log_path = None
+
+    def snapshot(self):
+        """{feature: metrics dict}, sorted by feature name"""
+        with self._lock:
+            return {name: self.features[name].as_dict() for name in sorted(self.features)}
+
+    def totals(self):
+        with self._lock:
+            features = list(self.features.values())
+        return {
+            'requests': sum(m.requests for m in features),
+            'cache_hits': sum(m.cache_hits for m in features),
+            'coalesced': sum(m.coalesced for m in features),
+            'errors': sum(m.errors for m in features),
+            'prompt_tokens': sum(m.prompt_tokens for m in features),
+            'completion_tokens': sum(m.completion_tokens for m in features),
+            'cost_usd': round(sum(m.cost for m in features), 6),
+        }
+
+    def prometheus_text(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            features = sorted(self.features.items())
+            lines = []
+            for name, attribute, help_text in COUNTERS:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                for feature, metrics in features:
+                    value = getattr(metrics, attribute)
+                    value = round(value, 6) if isinstance(value, float) else value
+                    lines.append(f'{name}{{feature="{feature}"}} {value}')
+            for name, attribute, help_text in HISTOGRAMS:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for feature, metrics in features:
+                    histogram = getattr(metrics, attribute)
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{name}_bucket{{feature="{feature}",le="{bound}"}} {count}')
+                    lines.append(f'{name}_sum{{feature="{feature}"}} {histogram.sum:.6f}')
+                    lines.append(f'{name}_count{{feature="{feature}"}} {histogram.count}')
+        return "\n".join(lines + cache_lines() + scheduler_lines()) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self.features = {}
+            self.started = time.time()
+
+
+def cache_lines():
+    """Prometheus lines for the response cache tiers and request coalescing"""
+    from llm_cache import cache_stats
+
+    stats = cache_stats()
+    flight = stats.pop('single_flight')
+    lines = []
+    for name, key, kind, help_text in CACHE_METRICS:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for tier, values in sorted(stats.items()):
+            if key in values:
+                value = round(values[key], 6) if isinstance(values[key], float) else values[key]
+                lines.append(f'{name}{{tier="{tier}"}} {value}')
+    lines += [
+        "# HELP llm_singleflight_leaders_total Requests that called the API for their key",
+        "# TYPE llm_singleflight_leaders_total counter",
+        f"llm_singleflight_leaders_total {flight['leaders']}",
+        "# HELP llm_singleflight_followers_total Requests that waited for an identical in-flight request",
+        "# TYPE llm_singleflight_followers_total counter",
+        f"llm_singleflight_followers_total {flight['followers']}",
+    ]
+    return lines
+
+
+def scheduler_lines():
+    """Prometheus lines for the request queue per feature and the scheduler lanes"""
+    from llm_scheduler import scheduler_stats
+
+    stats = scheduler_stats()
+    if stats is None:
+        return []
+    lines = ["# HELP llm_queue_depth Requests waiting for a lane",
+             "# TYPE llm_queue_depth gauge"]
+    lines += [f'llm_queue_depth{{feature="{feature}"}} {depth}' for feature, depth in sorted(stats['queued'].items())]
+    name = "llm_queue_wait_seconds"
+    lines += [f"# HELP {name} Time requests waited for a lane", f"# TYPE {name} histogram"]
+    for feature, wait in sorted(stats['wait'].items()):
+        for bound, count in wait['buckets']:
+            lines.append(f'{name}_bucket{{feature="{feature}",le="{bound}"}} {count}')
+        lines.append(f'{name}_sum{{feature="{feature}"}} {wait["sum"]:.6f}')
+        lines.append(f'{name}_count{{feature="{feature}"}} {wait["count"]}')
+    for name, key, kind, help_text in LANE_METRICS:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        lines += [f'{name}{{lane="{lane["lane"]}"}} {lane[key]}' for lane in stats['lanes']]
+    return lines
+
+
+# (metric name, scheduler lane key, type, help text) for the scheduler lanes
+LANE_METRICS = (
+    ("llm_lane_in_flight", "in_flight", "gauge", "Requests running on a lane"),
+    ("llm_lane_window", "window", "gauge", "Requests a lane may run at once after backoff"),
+    ("llm_lane_requests_total", "started", "counter", "Requests started on a lane, retries included"),
+    ("llm_lane_throttled_total", "throttled", "counter", "Rate-limit and server errors on a lane"),
+    ("llm_lane_paused_seconds", "paused_for", "gauge", "Seconds until a backed-off lane resumes"),
+)
+
+
+# (metric name, cache_stats tier key, type, help text) for the cache tiers
+CACHE_METRICS = (
+    ("llm_cache_tier_hits_total", "hits", "counter", "Response cache hits per tier"),
+    ("llm_cache_tier_misses_total", "misses", "counter", "Response cache misses per tier"),
+    ("llm_cache_tier_evictions_total", "evictions", "counter", "Entries evicted from a bounded tier"),
+    ("llm_cache_tier_hit_ratio", "hit_rate", "gauge", "Hits / (hits + misses) per tier"),
+    ("llm_cache_tier_bytes", "bytes", "gauge", "Approximate size of an in-memory tier"),
+    ("llm_cache_tier_entries", "entries", "gauge", "Entries held by an in-memory tier"),
+)
+
+
+def serve_metrics(metrics, port, host="127.0.0.1"):
+    """Serve metrics.prometheus_text() on /metrics from a background thread"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """
+    Return the process-wide metrics, created on first use
+    LLM_METRICS_LOG sets the JSONL sink and LLM_METRICS_PORT starts the
+    /metrics endpoint (skipped if the port is taken, e.g. by another worker).
+    """
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = LLMMetrics(os.getenv("LLM_METRICS_LOG") or None)
+            port = os.getenv("LLM_METRICS_PORT")
+            if port:
+                try:
+                    serve_metrics(_metrics, int(port), os.getenv("LLM_METRICS_HOST", "127.0.0.1"))
+                except OSError:
+                    pass
+        return _metrics
+
+
+def record_call(feature, model, start, first_token=None, usage=None, cache_hit=False, coalesced=False,
+                error=None):
+    """
+    Record a call that started at time.perf_counter() value `start`
+    first_token is the perf_counter value when the first streamed token
+    arrived; usage is the API's usage object (or None).
+    """
+    now = time.perf_counter()
+    get_metrics().record(
+        feature or "other", model, now - start,
+        ttft=first_token - start if first_token is not None else None,
+        prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+        completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+        cache_hit=cache_hit, coalesced=coalesced, error=error
+    )
@@ -0,0 +1,433 @@
+"""
+Rate-limited scheduling of LLM requests
+Every call_gpt / stream_gpt / acall_gpt request waits here until a lane
+(one API key and model) has a free slot and rate-limit budget for it:
+
+    LLM_API_KEYS=key1,key2         keys to spread load over (default OPENAI_API_KEY)
+    LLM_MODELS=gpt-3.5-turbo,...   models that may serve each other's requests
+    LLM_RPM=3500 LLM_TPM=200000    requests / tokens per minute per lane (0 = no limit)
+    LLM_MAX_CONCURRENCY=8          requests in flight per lane
+
+Waiting requests run by feature priority (interactive answer evaluation
+first, batch.py's job analysis last), then in arrival order. A 429 or 5xx pauses
+the lane it came from (honouring Retry-After) and halves how many
+requests it runs at once, growing back by one per window of successes, so
+queued requests wait for the limit to reset instead of each retrying into
+it, even when LLM_RPM / LLM_TPM are set higher than the real limits.
+"""
+
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+import weakref
+
+from llm_metrics import Histogram
+
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 4))
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 20.0
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# Seconds of quota a lane may save up and spend in one burst
+BURST_SECONDS = float(os.getenv("LLM_RATE_BURST_SECONDS", 1.0))
+
+# Lower runs first; other features get DEFAULT_PRIORITY
+FEATURE_PRIORITY = {
+    'evaluate': 0,
+    'questions': 1,
+    'star': 1,
+    'prep_pack': 1,
+    'analyze': 2,
+    'resume': 2,
+    'cover_letter': 2,
+    # Speculative prefetch, then headless batch analysis (batch.py)
+    'rubric': 3,
+    'batch': 4,
+}
+DEFAULT_PRIORITY = 1
+
+# How often a waiting coroutine checks the queue while every lane is busy
+ASYNC_POLL_INTERVAL = 0.01
+
+
+def is_retryable_error(error):
+    """Rate limits, server errors and dropped connections are worth retrying"""
+    from openai import APIConnectionError, APIStatusError
+
+    if isinstance(error, APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, APIConnectionError)
+
+
+def retry_delay(attempt, error=None):
+    """Seconds to wait before retry number `attempt` (0-based), with full jitter"""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), RETRY_MAX_DELAY)
+        except ValueError:
+            pass
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+class TokenBucket:
+    """
+    Rate limit of `per_minute` units (0 = no limit)
+
+    A request may overdraw the bucket once it holds enough for the request
+    or is full, so requests larger than the burst size are not starved and
+    the sustained rate still matches the limit.
+    """
+
+    def __init__(self, per_minute, burst_seconds=BURST_SECONDS):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until `amount` can be taken"""
+        if not self.rate:
+            return 0.0
+        self._refill(now)
+        shortfall = min(amount, self.capacity) - self.level
+        return shortfall / self.rate if shortfall > 1e-9 else 0.0
+
+    def take(self, amount, now):
+        if self.rate:
+            self._refill(now)
+            self.level -= amount
+
+    def drain(self, now):
+        """Spend the saved-up burst, e.g. after the API has rejected requests"""
+        self._refill(now)
+        self.level = min(self.level, 0.0)
+
+
+class Lane:
+    """One API key and model, with its own limits and clients"""
+
+    def __init__(self, name, api_key, model, rpm=0, tpm=0, max_in_flight=MAX_CONCURRENCY):
+        self.name = name
+        self.api_key = api_key
+        self.model = model
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_in_flight = max_in_flight
+        # Current concurrency window: halved on errors, +1 per window of successes
+        self.window = float(max_in_flight)
+        self.in_flight = 0
+        self.started = 0
+        self.throttled = 0
+        self.errors = 0
+        self.failures = 0
+        self.paused_until = 0.0
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    @property
+    def client(self):
+        """OpenAI client for this lane; retries go through the scheduler"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from openai import OpenAI
+                    self._client = OpenAI(api_key=self.api_key, max_retries=0)
+        return self._client
+
+    def async_client(self):
+        """AsyncOpenAI client for the running event loop (one connection pool per loop)"""
+        import asyncio
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = AsyncOpenAI(api_key=self.api_key, http_client=DefaultAsyncHttpxClient(), max_retries=0)
+            self._async_clients[loop] = client
+        return client
+
+    def wait_time(self, tokens, now):
+        """Seconds until the lane can start a request of `tokens`, or None while it is full"""
+        if self.in_flight >= max(1, int(self.window)):
+            return None
+        return max(self.paused_until - now, self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+
+    def stats(self, now):
+        return {
+            'lane': self.name,
+            'model': self.model,
+            'in_flight': self.in_flight,
+            'window': int(self.window),
+            'started': self.started,
+            'throttled': self.throttled,
+            'errors': self.errors,
+            'paused_for': round(max(0.0, self.paused_until - now), 3),
+        }
+
+
+class Ticket:
+    """A request waiting for a lane"""
+
+    def __init__(self, feature, tokens):
+        self.feature = feature
+        self.tokens = tokens
+        self.enqueued = time.perf_counter()
+        self.cancelled = False
+
+
+class LLMScheduler:
+    """
+    Priority queue of LLM requests in front of one or more lanes
+
+    acquire() (or acquire_async()) blocks until the request is first in
+    line and a lane can take it; release() returns the lane. call() and
+    acall() wrap both around a request function, with retries.
+    """
+
+    def __init__(self, lanes):
+        self.lanes = list(lanes)
+        self.queued = {}
+        self.max_queued = {}
+        self.wait_times = {}
+        self._queue = []
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+
+    def _enqueue(self, feature, tokens, priority):
+        feature = feature or "other"
+        if priority is None:
+            priority = FEATURE_PRIORITY.get(feature, DEFAULT_PRIORITY)
+        ticket = Ticket(feature, tokens)
+        with self._cond:
+            heapq.heappush(self._queue, (priority, next(self._order), ticket))
+            depth = self.queued[ticket.feature] = self.queued.get(ticket.feature, 0) + 1
+            self.max_queued[ticket.feature] = max(self.max_queued.get(ticket.feature, 0), depth)
+        return ticket
+
+    def _dequeued(self, ticket):
+        self.queued[ticket.feature] -= 1
+        histogram = self.wait_times.get(ticket.feature)
+        if histogram is None:
+            histogram = self.wait_times[ticket.feature] = Histogram()
+        histogram.observe(time.perf_counter() - ticket.enqueued)
+
+    def _dispatch(self, ticket):
+        """
+        Give `ticket` a lane if it is first in line and one can take it
+        Returns (lane, None), or (None, seconds to wait) where None means
+        until another request moves. Call with the lock held.
+        """
+        while self._queue and self._queue[0][2].cancelled:
+            heapq.heappop(self._queue)
+        if not self._queue or self._queue[0][2] is not ticket:
+            return None, None
+        now = time.monotonic()
+        best = wait = None
+        for lane in self.lanes:
+            lane_wait = lane.wait_time(ticket.tokens, now)
+            if lane_wait is None:
+                continue
+            if lane_wait > 0:
+                wait = lane_wait if wait is None else min(wait, lane_wait)
+            elif best is None or (lane.in_flight, lane.started) < (best.in_flight, best.started):
+                best = lane
+        if best is None:
+            return None, wait
+        heapq.heappop(self._queue)
+        best.requests.take(1, now)
+        best.tokens.take(ticket.tokens, now)
+        best.in_flight += 1
+        best.started += 1
+        self._dequeued(ticket)
+        # The next request in line may be able to start too
+        self._cond.notify_all()
+        return best, None
+
+    def acquire(self, feature=None, tokens=0, priority=None):
+        """Block until a lane can take a request of about `tokens` tokens"""
+        ticket = self._enqueue(feature, tokens, priority)
+        with self._cond:
+            while True:
+                lane, wait = self._dispatch(ticket)
+                if lane is not None:
+                    return lane
+                self._cond.wait(wait)
+
+    async def acquire_async(self, feature=None, tokens=0, priority=None):
+        """acquire() for coroutines: waits without blocking the event loop"""
+        import asyncio
+
+        ticket = self._enqueue(feature, tokens, priority)
+        try:
+            while True:
+                with self._cond:
+                    lane, wait = self._dispatch(ticket)
+                if lane is not None:
+                    return lane
+                await asyncio.sleep(ASYNC_POLL_INTERVAL if wait is None else wait)
+        except BaseException:
+            with self._cond:
+                ticket.cancelled = True
+                self.queued[ticket.feature] -= 1
+                self._cond.notify_all()
+            raise
+
+    def release(self, lane, error=None):
+        """
+        Return a lane; a retryable error pauses it with exponential backoff
+        and halves its concurrency window
+        """
+        with self._cond:
+            lane.in_flight -= 1
+            if error is None:
+                lane.failures = 0
+                lane.window = min(lane.max_in_flight, lane.window + 1 / lane.window)
+            elif is_retryable_error(error):
+                lane.throttled += 1
+                now = time.monotonic()
+                # Requests that were in flight together fail together; back off once for them
+                if now >= lane.paused_until:
+                    lane.paused_until = now + retry_delay(lane.failures, error)
+                    lane.failures += 1
+                    lane.window = max(1.0, lane.window / 2)
+                    lane.requests.drain(now)
+                    lane.tokens.drain(now)
+            else:
+                lane.errors += 1
+            self._cond.notify_all()
+
+    def call(self, request, feature=None, tokens=0, max_retries=MAX_RETRIES, keep_lane=False):
+        """
+        Run request(lane) on the next free lane, retrying retryable errors
+        Returns (result, lane) or raises the last error. With keep_lane the
+        lane stays taken (e.g. while a stream is read) until release().
+        """
+        attempt = 0
+        while True:
+            lane = self.acquire(feature, tokens)
+            try:
+                result = request(lane)
+            except Exception as e:
+                self.release(lane, e)
+                if attempt >= max_retries or not is_retryable_error(e):
+                    raise
+                attempt += 1
+                continue
+            if not keep_lane:
+                self.release(lane)
+            return result, lane
+
+    async def acall(self, request, feature=None, tokens=0, max_retries=MAX_RETRIES):
+        """call() for a coroutine function request(lane)"""
+        attempt = 0
+        while True:
+            lane = await self.acquire_async(feature, tokens)
+            try:
+                result = await request(lane)
+            except Exception as e:
+                self.release(lane, e)
+                if attempt >= max_retries or not is_retryable_error(e):
+                    raise
+                attempt += 1
+                continue
+            self.release(lane)
+            return result, lane
+
+    def stats(self):
+        """Queue depth and wait times per feature, and the state of each lane"""
+        now = time.monotonic()
+        with self._cond:
+            return {
+                'queued': dict(self.queued),
+                'max_queued': dict(self.max_queued),
+                'wait': {feature: {
+                    'p50': histogram.quantile(0.5),
+                    'p95': histogram.quantile(0.95),
+                    'sum': histogram.sum,
+                    'count': histogram.count,
+                    'buckets': list(histogram.cumulative()),
+                } for feature, histogram in self.wait_times.items()},
+                'lanes': [lane.stats(now) for lane in self.lanes],
+            }
+
+
+def _env_list(name):
+    return [item.strip() for item in os.getenv(name, "").split(",") if item.strip()]
+
+
+def build_scheduler(models):
+    """Scheduler with one lane per API key and model, configured from the environment"""
+    keys = _env_list("LLM_API_KEYS") or [os.getenv("OPENAI_API_KEY")]
+    rpm = float(os.getenv("LLM_RPM", 0))
+    tpm = float(os.getenv("LLM_TPM", 0))
+    return LLMScheduler([
+        Lane(f"{name}/key{index + 1}", key, name, rpm, tpm)
+        for name in models for index, key in enumerate(keys)
+    ])
+
+
+_schedulers = {}
+_override = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler(model="gpt-3.5-turbo"):
+    """
+    Return the process-wide scheduler for `model`, created on first use
+    Models listed together in LLM_MODELS share one scheduler and serve each
+    other's requests; any other model gets a queue and lanes of its own.
+    """
+    if _override is not None:
+        return _override
+    scheduler = _schedulers.get(model)
+    if scheduler is None:
+        with _scheduler_lock:
+            scheduler = _schedulers.get(model)
+            if scheduler is None:
+                models = _env_list("LLM_MODELS")
+                group = models if model in models else [model]
+                scheduler = build_scheduler(group)
+                for name in group:
+                    _schedulers[name] = scheduler
+    return scheduler
+
+
+def set_scheduler(scheduler):
+    """Serve every model from `scheduler` (None rebuilds them from the environment on next use)"""
+    global _override
+    with _scheduler_lock:
+        _override = scheduler
+        _schedulers.clear()
+
+
+def scheduler_stats():
+    """LLMScheduler.stats() combined over every scheduler, or None before the first LLM request"""
+    if _override is not None:
+        return _override.stats()
+    schedulers = list({id(s): s for s in _schedulers.values()}.values())
+    if not schedulers:
+        return None
+    if len(schedulers) == 1:
+        return schedulers[0].stats()
+    combined = LLMScheduler([])
+    for scheduler in schedulers:
+        with scheduler._cond:
+            combined.lanes += scheduler.lanes
+            for feature, depth in scheduler.queued.items():
+                combined.queued[feature] = combined.queued.get(feature, 0) + depth
+            for feature, depth in scheduler.max_queued.items():
+                combined.max_queued[feature] = max(combined.max_queued.get(feature, 0), depth)
+            for feature, histogram in scheduler.wait_times.items():
+                combined.wait_times.setdefault(feature, Histogram()).merge(histogram)
+    return combined.stats()
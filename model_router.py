@@ -0,0 +1,107 @@
+"""
+Per-feature model routing
+Each LLM feature gets a model tier, max_tokens and temperature: features
+with short, bounded output go to the fast model unless their prompt is
+long, the rest stay on the standard model. Answer feedback can also skip
+the LLM: local_feedback scores an answer and checks it against the
+question's cached rubric instantly.
+
+    LLM_MODEL=gpt-3.5-turbo       standard tier
+    LLM_FAST_MODEL=gpt-4o-mini    fast tier ('' = use the standard model)
+    LLM_ROUTING=0                 every feature on the standard model with
+                                  max_tokens 1500 and temperature 0.7
+"""
+
+import os
+import re
+
+STANDARD_MODEL = os.getenv("LLM_MODEL", "gpt-3.5-turbo")
+FAST_MODEL = os.getenv("LLM_FAST_MODEL", "gpt-4o-mini") or STANDARD_MODEL
+ROUTING = os.getenv("LLM_ROUTING", "1") != "0"
+
+# What every feature used before routing, and still uses for unlisted features
+DEFAULT_MAX_TOKENS = 1500
+DEFAULT_TEMPERATURE = 0.7
+
+# Fast-tier prompts longer than this go to the standard model
+FAST_MAX_PROMPT_TOKENS = 2000
+
+# feature: (tier, max_tokens, temperature)
+ROUTES = {
+    'evaluate': ('fast', 800, 0.4),
+    'rubric': ('fast', 300, 0.3),
+    'questions': ('fast', 1500, 0.7),
+    'analyze': ('standard', 800, 0.4),
+    # batch.py's analyze_job_description requests, scheduled behind the app's
+    'batch': ('standard', 800, 0.4),
+    'resume': ('standard', 900, 0.4),
+    'cover_letter': ('standard', 1000, 0.8),
+    'star': ('standard', 1200, 0.7),
+    # Standard only: the pack is a long structured JSON reply covering three
+    # features; utils caps its max_tokens at PREP_PACK_MAX_TOKENS
+    'prep_pack': ('standard', 3000, 0.7),
+}
+
+# Answers shorter than this get local feedback instead of an LLM evaluation
+MIN_LLM_ANSWER_WORDS = 10
+
+# Model name recorded in llm_metrics for requests answered locally
+LOCAL_MODEL = "local"
+
+STOPWORDS = {
+    'about', 'answer', 'based', 'candidate', 'concrete', 'from', 'have', 'into', 'that',
+    'their', 'them', 'they', 'this', 'what', 'when', 'where', 'which', 'with', 'your',
+}
+
+
+def route(feature, prompt_tokens=0):
+    """{'model', 'max_tokens', 'temperature'} for a request of `feature`"""
+    if not ROUTING or feature not in ROUTES:
+        return {'model': STANDARD_MODEL, 'max_tokens': DEFAULT_MAX_TOKENS, 'temperature': DEFAULT_TEMPERATURE}
+    tier, max_tokens, temperature = ROUTES[feature]
+    fast = tier == 'fast' and prompt_tokens <= FAST_MAX_PROMPT_TOKENS
+    return {'model': FAST_MODEL if fast else STANDARD_MODEL, 'max_tokens': max_tokens, 'temperature': temperature}
+
+
+def needs_llm_evaluation(answer):
+    """False for answers too short for an LLM evaluation to add anything"""
+    return not ROUTING or len(answer.split()) >= MIN_LLM_ANSWER_WORDS
+
+
+def rubric_points(rubric):
+    """The MUST COVER points of a rubric from utils.generate_rubric"""
+    match = re.search(r"MUST COVER:?(.*?)(?:\n\s*\d+\.\s*[A-Z][A-Z ]+:|\Z)", rubric, re.S)
+    if not match:
+        return []
+    points = (p.strip(" -*•\t()") for p in re.split(r"[\n;•]", match.group(1)))
+    return [p for p in points if len(p) > 3]
+
+
+def _stems(text):
+    """Word stems (first five letters) of the content words in text"""
+    return {w[:5] for w in re.findall(r"[a-z0-9+#/]+", text.lower()) if len(w) > 3 and w not in STOPWORDS}
+
+
+def local_feedback(answer, rubric=None):
+    """
+    Instant feedback without an LLM call: (score, markdown)
+    The score comes from answer_scoring; with a rubric, the markdown lists
+    which of its points the answer covers (at least half their words).
+    """
+    from answer_scoring import score_answers
+
+    score = score_answers([answer])[0]
+    lines = []
+    words = len(answer.split())
+    if words < MIN_LLM_ANSWER_WORDS:
+        lines.append(f"- Your answer has {words} words. Expand it with a specific example: "
+                     "the situation, your task, the actions you took and the result.")
+    if rubric:
+        answer_stems = _stems(answer)
+        for point in rubric_points(rubric):
+            point_stems = _stems(point)
+            covered = point_stems and len(point_stems & answer_stems) * 2 >= len(point_stems)
+            lines.append(f"- {'✅' if covered else '⬜'} {point}")
+    elif not lines:
+        lines.append("- No rubric for this question yet; ask for AI feedback for a detailed review.")
+    return score, "\n".join(lines)
@@ -0,0 +1,201 @@
+"""
+Token budgeting for LLM prompts
+Counts tokens, gives each prompt template a budget per input field, and
+compresses text that is over budget section by section: requirements and
+responsibilities are kept, boilerplate such as benefits is dropped first.
+"""
+
+import math
+import re
+
+try:
+    import tiktoken
+except ImportError:  # optional dependency, fall back to an estimate
+    tiktoken = None
+
+CONTEXT_WINDOWS = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-4o-mini": 128000,
+    "gpt-4o": 128000,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Input token budget per prompt template and field. Fields shorter than their
+# budget pass their unused tokens on to the other fields of the same prompt.
+FIELD_BUDGETS = {
+    'analyze_job_description': {'job_desc': 1200},
+    'generate_interview_questions': {'job_desc': 1000},
+    'evaluate_answer': {'question': 200, 'user_answer': 1200},
+    'generate_rubric': {'question': 200},
+    'evaluate_with_rubric': {'question': 200, 'rubric': 300, 'user_answer': 1200},
+    'analyze_resume': {'job_desc': 1000, 'resume_text': 2000},
+    'generate_cover_letter': {'company_name': 30, 'job_desc': 800, 'resume_text': 1200},
+    'generate_star_examples': {'job_desc': 1000},
+    'generate_prep_pack': {'job_desc': 1200},
+}
+
+# Section priorities: low-priority sections are dropped first when compressing
+HIGH, MEDIUM, LOW = 3, 2, 1
+HIGH_PRIORITY_HEADINGS = re.compile(
+    r"requirement|qualification|responsibilit|what you('|’)?ll do|what you will do|duties|"
+    r"skills|experience|must have|you have|the role|about the job|projects", re.I
+)
+LOW_PRIORITY_HEADINGS = re.compile(
+    r"benefit|perk|what we offer|compensation|salary|equal opportunity|\beeo\b|"
+    r"how to apply|legal|privacy|hobbies|interests|references", re.I
+)
+HEADING_PATTERN = re.compile(r"^\s*(?:#{1,6}\s*\S.{0,60}|[^\s\-•*].{0,58}:)\s*$")
+
+_encodings = {}
+
+
+def _encoding(model):
+    if tiktoken is None:
+        return None
+    encoding = _encodings.get(model)
+    if encoding is None:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+        _encodings[model] = encoding
+    return encoding
+
+
+def count_tokens(text, model="gpt-3.5-turbo"):
+    """Token count for text (exact with tiktoken, otherwise ~4 characters per token)"""
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text, max_tokens, model="gpt-3.5-turbo"):
+    """Cut text to at most max_tokens tokens"""
+    encoding = _encoding(model)
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+
+def context_window(model):
+    return CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+
+
+def split_sections(text):
+    """
+    Split text into [heading, lines] sections at heading-like lines
+    Text before the first heading forms a section with heading None.
+    """
+    sections = [[None, []]]
+    for line in text.split("\n"):
+        if HEADING_PATTERN.match(line) and not line.lstrip().startswith(("-", "•", "*")):
+            sections.append([line.strip(), []])
+        else:
+            sections[-1][1].append(line)
+    if sections[0][1] == [] or sections[0][1] == [""]:
+        sections.pop(0)
+    return sections
+
+
+def section_priority(heading):
+    if heading is None:
+        return MEDIUM
+    if LOW_PRIORITY_HEADINGS.search(heading):
+        return LOW
+    if HIGH_PRIORITY_HEADINGS.search(heading):
+        return HIGH
+    return MEDIUM
+
+
+def compress_text(text, max_tokens, model="gpt-3.5-turbo"):
+    """
+    Shrink text to fit max_tokens while keeping the sections that matter
+
+    1. Drop whole sections, lowest priority and latest first, never
+       dropping requirements/responsibilities-style sections.
+    2. Trim lines from the end of the longest remaining sections.
+    3. As a last resort, cut the text at the token limit.
+    """
+    if count_tokens(text, model) <= max_tokens:
+        return text
+
+    sections = []
+    for order, (heading, lines) in enumerate(split_sections(text)):
+        line_tokens = [count_tokens(line, model) + 1 for line in lines]
+        sections.append({
+            'heading': heading,
+            'lines': lines,
+            'line_tokens': line_tokens,
+            'tokens': count_tokens(heading, model) + 1 + sum(line_tokens) if heading else sum(line_tokens),
+            'priority': section_priority(heading),
+            'order': order
+        })
+
+    # Reserve room for the note listing what was left out
+    budget = max_tokens - 20
+    total = sum(s['tokens'] for s in sections)
+    dropped = []
+    for section in sorted(sections, key=lambda s: (s['priority'], -s['order'])):
+        if total <= budget or section['priority'] == HIGH:
+            break
+        sections.remove(section)
+        total -= section['tokens']
+        dropped.append(section['heading'] or "introduction")
+
+    while total > budget:
+        longest = max(sections, key=lambda s: s['tokens'], default=None)
+        if longest is None or len(longest['lines']) <= 1:
+            break
+        longest['lines'].pop()
+        removed = longest['line_tokens'].pop()
+        longest['tokens'] -= removed
+        total -= removed
+
+    parts = []
+    for section in sections:
+        if section['heading']:
+            parts.append(section['heading'])
+        parts.extend(section['lines'])
+    compressed = "\n".join(parts).strip()
+    if dropped:
+        compressed += "\n\n[Omitted to fit the prompt: " + ", ".join(h.rstrip(":") for h in dropped) + "]"
+
+    if count_tokens(compressed, model) > max_tokens:
+        compressed = truncate_tokens(compressed, max_tokens - 10, model) + "\n[Truncated...]"
+    return compressed
+
+
+def budget_fields(template, model="gpt-3.5-turbo", max_completion_tokens=1500, **fields):
+    """
+    Compress a template's input fields to their token budgets
+
+    Budgets come from FIELD_BUDGETS and are scaled down if the prompt plus
+    the completion would not fit the model's context window. Fields that
+    need fewer tokens than their budget give the rest to the other fields.
+    Returns a dict with the (possibly compressed) field values.
+    """
+    budgets = dict(FIELD_BUDGETS.get(template, {}))
+    for name in fields:
+        budgets.setdefault(name, 1000)
+
+    # Leave room for the completion and the instructions around the fields
+    available = context_window(model) - max_completion_tokens - 500
+    requested = sum(budgets[name] for name in fields)
+    if requested > available:
+        budgets = {name: int(budget * available / requested) for name, budget in budgets.items()}
+
+    tokens = {name: count_tokens(value or "", model) for name, value in fields.items()}
+    spare = sum(max(0, budgets[name] - tokens[name]) for name in fields)
+    over = [name for name in fields if tokens[name] > budgets[name]]
+    total_overage = sum(tokens[name] - budgets[name] for name in over)
+
+    fitted = dict(fields)
+    for name in over:
+        # Share the spare tokens in proportion to how far over budget each field is
+        extra = int(spare * (tokens[name] - budgets[name]) / total_overage) if total_overage else 0
+        fitted[name] = compress_text(fields[name], budgets[name] + extra, model)
+    return fitted
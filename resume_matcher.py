@@ -0,0 +1,187 @@
+"""
+Rank job postings against a resume locally
+Jobs are turned into hashed TF-IDF vectors (words and word pairs) stored as
+one sparse NumPy matrix, so ranking the whole corpus is a single
+matrix-vector product. Only the best few matches need an LLM analysis.
+"""
+
+import math
+import threading
+import zlib
+
+import numpy as np
+
+from job_index import tokenize
+
+# Number of hash buckets for word and word-pair features
+HASH_DIM = 2 ** 20
+
+# Most feature strings whose hash bucket is remembered (about 15 MB)
+FEATURE_CACHE_SIZE = 100_000
+
+# Titles say more about a job than any single line of its description
+TITLE_REPEAT = 2
+
+
+def job_text(job):
+    return " ".join([job.get('title', "")] * TITLE_REPEAT + [job.get('description', "")])
+
+
+class ResumeMatcher:
+    """
+    Hashed TF-IDF vectors for a job corpus with cosine top-k search
+
+    The matrix is kept in sparse column-major form (row ids and weights
+    grouped by feature), so memory grows with the number of features the
+    jobs actually have rather than with HASH_DIM, and scoring reads only
+    the columns present in the query. Rows are L2-normalized, so a dot
+    product is a cosine score.
+
+    Safe to share between threads: adding jobs swaps in a new matrix on the
+    next query, and every query works on one matrix snapshot throughout.
+    """
+
+    def __init__(self, dim=HASH_DIM):
+        self.dim = dim
+        self.jobs = []
+        self._features = []     # per job: (unique feature ids, counts)
+        self._feature_ids = {}  # feature string -> hash bucket, for recent features
+        self._matrix = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def _hash(self, feature):
+        bucket = self._feature_ids.get(feature)
+        if bucket is None:
+            if len(self._feature_ids) >= FEATURE_CACHE_SIZE:
+                # The vocabulary grows with the corpus; start over rather than keep it all
+                self._feature_ids.clear()
+            bucket = self._feature_ids[feature] = zlib.crc32(feature.encode("utf-8")) % self.dim
+        return bucket
+
+    def _count_features(self, text):
+        """Unique hashed feature ids in text and how often each occurs"""
+        tokens = tokenize(text)
+        features = [self._hash(t) for t in tokens]
+        features.extend(self._hash(a + " " + b) for a, b in zip(tokens, tokens[1:]))
+        if not features:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        ids, counts = np.unique(np.array(features, dtype=np.int32), return_counts=True)
+        return ids, counts.astype(np.float32)
+
+    def add_jobs(self, jobs):
+        """Add jobs to the corpus; the matrix is rebuilt on the next query"""
+        jobs = list(jobs)
+        features = [self._count_features(job_text(job)) for job in jobs]
+        with self._lock:
+            self.jobs.extend(jobs)
+            self._features.extend(features)
+            self._matrix = None
+            return len(self.jobs)
+
+    def _current_matrix(self):
+        """The matrix for the jobs added so far, built if they changed"""
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = self._build(self._features)
+            return self._matrix
+
+    def _build(self, features):
+        """(rows, weights, column starts, idf, number of jobs) for a list of job features"""
+        n = len(features)
+        lengths = np.fromiter((len(ids) for ids, _ in features), dtype=np.int64, count=n)
+        if n:
+            columns = np.concatenate([ids for ids, _ in features])
+            counts = np.concatenate([c for _, c in features])
+        else:
+            columns = np.empty(0, dtype=np.int32)
+            counts = np.empty(0, dtype=np.float32)
+        rows = np.repeat(np.arange(n, dtype=np.int32), lengths)
+
+        # Smoothed IDF over the corpus, sublinear term frequency
+        document_frequency = np.bincount(columns, minlength=self.dim)
+        idf = (np.log((1 + n) / (1 + document_frequency)) + 1).astype(np.float32)
+        weights = (1 + np.log(counts)) * idf[columns]
+
+        norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=n)).astype(np.float32)
+        norms[norms == 0] = 1
+        weights /= norms[rows]
+
+        # Column-major order: a query only reads the entries of its own features
+        order = np.argsort(columns, kind="stable")
+        column_starts = np.zeros(self.dim + 1, dtype=np.int64)
+        np.cumsum(document_frequency, out=column_starts[1:])
+        return rows[order], weights[order], column_starts, idf, n
+
+    def vectorize(self, text, matrix=None):
+        """Sparse, L2-normalized TF-IDF vector for a text as (feature ids, weights)"""
+        idf = (matrix or self._current_matrix())[3]
+        ids, counts = self._count_features(text)
+        weights = (1 + np.log(counts)) * idf[ids]
+        norm = math.sqrt(float(weights @ weights))
+        return ids, (weights / norm if norm else weights)
+
+    def scores(self, text):
+        """Cosine similarity between text and every job, as one array"""
+        matrix = self._current_matrix()
+        ids, query_weights = self.vectorize(text, matrix)
+        rows, weights, column_starts, _, n = matrix
+        starts = column_starts[ids]
+        lengths = column_starts[ids + 1] - starts
+        # Positions of every matrix entry in the query's columns
+        offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        entries = np.arange(int(lengths.sum())) + offsets
+        contributions = weights[entries] * np.repeat(query_weights, lengths)
+        return np.bincount(rows[entries], weights=contributions, minlength=n)
+
+    def match(self, resume_text, top_k=5):
+        """Return up to top_k (job, score) pairs, best match first"""
+        if not self.jobs or top_k <= 0:
+            return []
+        scores = self.scores(resume_text)
+        if top_k < len(scores):
+            candidates = np.argpartition(-scores, top_k)[:top_k]
+        else:
+            candidates = np.arange(len(scores))
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(self.jobs[i], float(scores[i])) for i in ranked if scores[i] > 0]
+
+
+_resume_matcher = None
+_resume_matcher_lock = threading.Lock()
+
+
+def get_resume_matcher():
+    """
+    Return the shared matcher over the job search corpus
+    Jobs added to the search index since the last call are vectorized first.
+    """
+    global _resume_matcher
+    from scraper import get_job_index
+
+    corpus = get_job_index().jobs
+    # One session at a time checks for new jobs, so none is added twice
+    with _resume_matcher_lock:
+        if _resume_matcher is None:
+            _resume_matcher = ResumeMatcher()
+        if len(_resume_matcher) < len(corpus):
+            _resume_matcher.add_jobs(corpus[len(_resume_matcher):])
+        return _resume_matcher
+
+
+def analyze_top_matches(resume_text, top_k=3, analyze=None):
+    """
+    Rank the corpus locally and run the LLM analysis on the best matches only
+    Returns a list of (job, score, analysis).
+    """
+    if analyze is None:
+        from utils import analyze_resume as analyze
+    from scraper import get_job_artifacts
+
+    results = []
+    for job, score in get_resume_matcher().match(resume_text, top_k):
+        analysis = analyze(resume_text, get_job_artifacts(job)['processed'])
+        results.append((job, score, analysis))
+    return results
@@ -5,21 +5,24 @@ Demonstrates data collection and preprocessing capabilities
 
 import requests
 from bs4 import BeautifulSoup
+import html
 import json
 import re
+import threading
+from collections import OrderedDict
 
-def get_sample_job_descriptions():
-    """
-    Returns pre-collected sample job descriptions
-    This demonstrates data collection capability
-    In production, these would be fetched from APIs
-    """
-    sample_jobs = [
-        {
-            "title": "Senior Data Analyst",
-            "company": "TechCorp",
-            "location": "Remote",
-            "description": """We are seeking a Senior Data Analyst to join our growing analytics team.
+from job_index import JobIndex
+from job_store import get_job_store
+from prompt_budget import compress_text
+from skills import get_skill_matcher
+
+# Pre-collected sample jobs, used until a job store has been imported
+SAMPLE_JOBS = (
+    {
+        "title": "Senior Data Analyst",
+        "company": "TechCorp",
+        "location": "Remote",
+        "description": """We are seeking a Senior Data Analyst to join our growing analytics team.
 
 Requirements:
 - 5+ years of experience in data analysis
@@ -42,12 +45,12 @@ Company Culture:
 - Remote-first company with flexible work hours
 - Strong emphasis on professional development and learning
 - Collaborative team that values diverse perspectives"""
-        },
-        {
-            "title": "Software Engineer - Full Stack",
-            "company": "StartupXYZ",
-            "location": "San Francisco, CA",
-            "description": """Join our engineering team building next-generation SaaS applications.
+    },
+    {
+        "title": "Software Engineer - Full Stack",
+        "company": "StartupXYZ",
+        "location": "San Francisco, CA",
+        "description": """Join our engineering team building next-generation SaaS applications.
 
 Requirements:
 - 3+ years of professional software development experience
@@ -71,12 +74,12 @@ Benefits:
 - Flexible work hours and unlimited PTO
 - $2,000 annual learning budget
 - Latest MacBook Pro and equipment"""
-        },
-        {
-            "title": "Marketing Manager - Digital",
-            "company": "GrowthCo",
-            "location": "New York, NY",
-            "description": """Looking for a creative Marketing Manager to lead our digital marketing efforts.
+    },
+    {
+        "title": "Marketing Manager - Digital",
+        "company": "GrowthCo",
+        "location": "New York, NY",
+        "description": """Looking for a creative Marketing Manager to lead our digital marketing efforts.
 
 Requirements:
 - 4+ years in digital marketing with proven track record
@@ -100,12 +103,12 @@ Company Culture:
 - Focus on measurable growth and data-driven decisions
 - Regular team building events and company retreats
 - Commitment to work-life balance"""
-        },
-        {
-            "title": "Product Manager",
-            "company": "InnovateTech",
-            "location": "Austin, TX",
-            "description": """Seeking an experienced Product Manager to drive product strategy and execution.
+    },
+    {
+        "title": "Product Manager",
+        "company": "InnovateTech",
+        "location": "Austin, TX",
+        "description": """Seeking an experienced Product Manager to drive product strategy and execution.
 
 Requirements:
 - 5+ years of product management experience in tech
@@ -129,12 +132,12 @@ What We Offer:
 - Opportunity to shape product direction
 - Collaborative and innovative work environment
 - Professional development opportunities"""
-        },
-        {
-            "title": "UX/UI Designer",
-            "company": "DesignHub",
-            "location": "Remote",
-            "description": """Join our design team creating beautiful, user-centered digital experiences.
+    },
+    {
+        "title": "UX/UI Designer",
+        "company": "DesignHub",
+        "location": "Remote",
+        "description": """Join our design team creating beautiful, user-centered digital experiences.
 
 Requirements:
 - 3+ years of UX/UI design experience
@@ -158,47 +161,92 @@ Culture:
 - Remote-first with optional office space
 - Supportive team environment
 - Focus on continuous learning"""
-        }
-    ]
-    
-    return sample_jobs
+    }
+)
+
+
+def get_sample_job_descriptions():
+    """
+    Returns pre-collected sample job descriptions
+    This demonstrates data collection capability
+    In production, these would be fetched from APIs (see job_store.py for
+    importing a real corpus)
+    """
+    return [dict(job) for job in SAMPLE_JOBS]
+
+
+_job_index = None
+_job_index_lock = threading.Lock()
 
 
-def search_jobs(query="", location=""):
+def get_job_index():
+    """
+    Return the shared search index, building it on first use
+    The index lives for the whole process so searches never rescan the corpus.
+    It covers the job store when one has been imported, else the sample jobs.
+    """
+    global _job_index
+    if _job_index is None:
+        # Sessions starting at once build (or load) the index only once
+        with _job_index_lock:
+            if _job_index is None:
+                store = get_job_store()
+                if store is not None and len(store):
+                    index = store.load_index()
+                else:
+                    index = JobIndex()
+                    index.add_jobs(get_sample_job_descriptions())
+                _job_index = index
+    return _job_index
+
+
+def add_jobs_to_index(jobs):
+    """Add newly collected jobs to the search index incrementally"""
+    return get_job_index().add_jobs(jobs)
+
+
+def search_jobs(query="", location="", offset=0, limit=None):
     """
     Search through sample jobs based on query
     Simulates searching external job boards
+
+    Every query term must appear in the title or description and every
+    location term in the location. Results are ranked by BM25, best first.
+    offset/limit select one page of results; only offset + limit results
+    are ranked. Jobs are returned as copies, so callers may modify them
+    without touching the shared index.
     """
-    all_jobs = get_sample_job_descriptions()
+    index = get_job_index()
+    end = None if limit is None else offset + limit
     
     if not query and not location:
-        return all_jobs
-    
-    # Filter jobs based on query
-    filtered_jobs = []
-    query_lower = query.lower()
-    location_lower = location.lower()
-    
-    for job in all_jobs:
-        # Check if query matches title or description
-        query_match = (
-            query_lower in job['title'].lower() or 
-            query_lower in job['description'].lower() or
-            not query
-        )
-        
-        # Check if location matches
-        location_match = (
-            location_lower in job['location'].lower() or
-            location_lower == "remote" and "remote" in job['location'].lower() or
-            not location
-        )
-        
-        if query_match and location_match:
-            filtered_jobs.append(job)
-    
-    # Return filtered results or all if no matches
-    return filtered_jobs if filtered_jobs else all_jobs[:2]
+        results = index.jobs[offset:end]
+    else:
+        filtered_jobs = index.search(query, location, top_k=end)
+        # Return filtered results or the first jobs if no matches
+        if filtered_jobs or index.count(query, location):
+            results = filtered_jobs[offset:]
+        else:
+            results = index.jobs[:2][offset:end]
+    return [dict(job) for job in results]
+
+
+def count_jobs(query="", location=""):
+    """Total number of results search_jobs can page through for a query"""
+    index = get_job_index()
+    if not query and not location:
+        return len(index)
+    return index.count(query, location) or min(2, len(index))
+
+
+# Precompiled patterns for clean_job_description
+SCRIPT_STYLE_PATTERN = re.compile(r'<(script|style)\b.*?</\1\s*>|<!--.*?-->', re.S | re.I)
+LIST_ITEM_PATTERN = re.compile(r'<li\b[^>]*>', re.I)
+BLOCK_TAG_PATTERN = re.compile(
+    r'</?(?:p|div|br|ul|ol|h[1-6]|tr|table|section|article|header|footer)\b[^>]*>', re.I
+)
+HTML_TAG_PATTERN = re.compile(r'</?[a-zA-Z!?][^<>]*>')
+NON_PRINTABLE_PATTERN = re.compile('[\x00-\x08\x0e-\x1b\x7f-\x84\x86-\x9f\u00ad\u200b-\u200f\u2060\ufeff]')
 
 
 def clean_job_description(raw_text):
@@ -206,29 +254,46 @@ def clean_job_description(raw_text):
     Clean scraped or collected job description data
     
     Cleaning steps:
-    1. Remove extra whitespace
-    2. Remove special characters
-    3. Normalize line breaks
-    4. Remove HTML tags if present
+    1. Remove HTML tags if present (block tags become line breaks)
+    2. Decode HTML entities
+    3. Normalize line breaks and remove non-printable characters
+    4. Collapse extra whitespace, keeping paragraph breaks
+    
+    Every step is one linear pass (precompiled patterns, no repeated
+    replace loops), so cost grows linearly with page size.
     """
-    # Remove HTML tags if any
-    text = re.sub('<[^<]+?>', '', raw_text)
+    text = raw_text.replace('\r\n', '\n').replace('\r', '\n')
     
-    # Remove extra whitespace
-    text = " ".join(raw_text.split())
+    # Remove HTML tags if any
+    if '<' in text:
+        text = SCRIPT_STYLE_PATTERN.sub('', text)
+        text = LIST_ITEM_PATTERN.sub('\n- ', text)
+        text = BLOCK_TAG_PATTERN.sub('\n', text)
+        text = HTML_TAG_PATTERN.sub('', text)
+    if '&' in text:
+        text = html.unescape(text)
     
     # Remove non-printable characters
-    text = ''.join(char for char in text if char.isprintable() or char.isspace())
+    text = NON_PRINTABLE_PATTERN.sub('', text)
     
-    # Normalize line breaks (convert to standard format)
-    text = text.replace('\r\n', '\n')
-    text = text.replace('\r', '\n')
+    # Collapse whitespace within each line and keep at most one blank line,
+    # none between consecutive list items
+    lines = []
+    blank = False
+    for line in text.split('\n'):
+        line = ' '.join(line.split())
+        if not line:
+            blank = True
+            continue
+        if blank and lines and not (line.startswith('- ') and lines[-1].startswith('- ')):
+            lines.append('')
+        lines.append(line)
+        blank = False
     
-    # Remove excessive line breaks
-    while '\n\n\n' in text:
-        text = text.replace('\n\n\n', '\n\n')
-    
-    return text.strip()
+    return '\n'.join(lines)
+
+
+MAX_JOB_TOKENS = 1500
 
 
 def preprocess_job_for_analysis(job_data):
@@ -239,7 +304,7 @@ def preprocess_job_for_analysis(job_data):
     1. Combine all relevant fields
     2. Clean the text
     3. Validate length
-    4. Truncate if necessary
+    4. Compress to the token budget if necessary
     """
     # Extract and combine relevant fields
     full_description = f"""Job Title: {job_data['title']}
@@ -257,10 +322,8 @@ Job Description:
     if len(cleaned) < 50:
         raise ValueError("Job description too short after cleaning")
     
-    # Truncate if too long (API token limits)
-    MAX_LENGTH = 8000
-    if len(cleaned) > MAX_LENGTH:
-        cleaned = cleaned[:MAX_LENGTH] + "\n\n[Description truncated due to length...]"
+    # Compress if too long (API token limits), keeping the important sections
+    cleaned = compress_text(cleaned, MAX_JOB_TOKENS)
     
     return cleaned
 
@@ -272,21 +335,18 @@ def extract_key_info(job_description):
     """
     info = {
         'skills': [],
+        'skill_mentions': {},
         'requirements': [],
         'responsibilities': [],
         'benefits': []
     }
     
-    # Simple keyword extraction (in production, would use NLP)
-    text_lower = job_description.lower()
-    
-    # Common skills to look for
-    common_skills = ['python', 'sql', 'java', 'javascript', 'react', 'aws', 
-                    'machine learning', 'data analysis', 'tableau', 'excel']
+    # Taxonomy-driven skill extraction in a single pass over the text
+    mentions = get_skill_matcher().extract(job_description)
+    info['skills'] = list(mentions)
+    info['skill_mentions'] = mentions
     
-    for skill in common_skills:
-        if skill in text_lower:
-            info['skills'].append(skill.title())
+    text_lower = job_description.lower()
     
     # Extract experience requirements
     experience_patterns = [r'(\d+)\+?\s*years?', r'(\d+)-(\d+)\s*years?']
@@ -299,6 +359,41 @@ def extract_key_info(job_description):
     return info
 
 
+JOB_FIELDS = ('title', 'company', 'location', 'description')
+JOB_ARTIFACT_CACHE_SIZE = 4096
+_job_artifacts = OrderedDict()
+_job_artifacts_lock = threading.Lock()
+
+
+def get_job_artifacts(job_data):
+    """
+    Preprocessed text and extracted info for a job, memoized by content
+    
+    Returns {'processed': str, 'key_info': dict}. The cache key is the
+    tuple of field values: Python caches string hashes, so lookups on
+    every rerun cost almost nothing, and editing any field changes the key,
+    so stale entries are never returned. The cache keeps the
+    JOB_ARTIFACT_CACHE_SIZE most recently used jobs. The returned dict is
+    shared, so callers must not modify it.
+    """
+    key = tuple(job_data.get(field, "") for field in JOB_FIELDS)
+    with _job_artifacts_lock:
+        artifacts = _job_artifacts.get(key)
+        if artifacts is not None:
+            _job_artifacts.move_to_end(key)
+            return artifacts
+    
+    artifacts = {
+        'processed': preprocess_job_for_analysis(job_data),
+        'key_info': extract_key_info(job_data['description'])
+    }
+    with _job_artifacts_lock:
+        _job_artifacts[key] = artifacts
+        while len(_job_artifacts) > JOB_ARTIFACT_CACHE_SIZE:
+            _job_artifacts.popitem(last=False)
+    return artifacts
+
+
 # Example usage and testing
 if __name__ == "__main__":
     print("=" * 60)
@@ -0,0 +1,182 @@
+"""
+Skill extraction with an Aho-Corasick automaton
+Every skill name and synonym from the taxonomy (skill_taxonomy.json) is
+compiled into one automaton, so a job description is scanned once no matter
+how many skills the taxonomy holds.
+"""
+
+import json
+import os
+from collections import deque
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "skill_taxonomy.json")
+
+# Characters that continue a word: "java" must not match inside "javascript"
+# and "c" must not match inside "c++"
+WORD_CHARS = frozenset("abcdefghijklmnopqrstuvwxyz0123456789_+#")
+
+WHITESPACE_TO_SPACE = str.maketrans('\n\t\r', '   ')
+
+
+def load_taxonomy(*paths):
+    """
+    Load and merge taxonomy files
+
+    Each file looks like:
+        {"case_sensitive": ["Go", ...],
+         "skills": {"Category": {"Skill": ["synonym", ...], ...}, ...}}
+
+    Later files extend or override earlier ones. Returns
+    (skills, case_sensitive) where skills maps each skill to
+    {'category': ..., 'aliases': [...]}.
+    """
+    skills = {}
+    case_sensitive = set()
+    for path in paths or (DEFAULT_TAXONOMY_PATH,):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        case_sensitive.update(data.get("case_sensitive", []))
+        for category, entries in data.get("skills", {}).items():
+            for name, aliases in entries.items():
+                skill = skills.setdefault(name, {'category': category, 'aliases': []})
+                skill['category'] = category
+                skill['aliases'].extend(a for a in aliases if a not in skill['aliases'])
+    return skills, case_sensitive
+
+
+def _lower_same_length(text):
+    """Lowercase text without changing its length, so offsets stay valid"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return ''.join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+class SkillMatcher:
+    """
+    Aho-Corasick automaton over skill names and synonyms
+
+    Matching is case-insensitive, except for terms listed as case-sensitive
+    (e.g. "Go", "React") which are common English words in lowercase.
+    Matches must start and end on word boundaries; overlapping matches are
+    resolved leftmost-longest, so "machine learning" wins over "machine".
+    """
+
+    def __init__(self, skills, case_sensitive=()):
+        self.skills = skills
+        exact_case = {term.lower(): term for term in case_sensitive}
+
+        # Trie as parallel lists indexed by state
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        self._patterns = []
+
+        for name, details in skills.items():
+            for term in [name] + details['aliases']:
+                key = ' '.join(term.lower().split())
+                if key:
+                    self._add_pattern(key, name, exact_case.get(key))
+        self._build_failure_links()
+
+    def __len__(self):
+        return len(self._patterns)
+
+    def _add_pattern(self, key, skill, exact):
+        state = 0
+        for char in key:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(len(self._patterns))
+        self._patterns.append((len(key), skill, exact))
+
+    def _build_failure_links(self):
+        """Breadth-first pass linking each state to its longest proper suffix state"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state].extend(self._output[self._fail[next_state]])
+
+    def find_all(self, text):
+        """Return non-overlapping (start, end, skill) matches in text order"""
+        lowered = _lower_same_length(text)
+        # Multi-word synonyms should match across line breaks and tabs too
+        if '\n' in lowered or '\t' in lowered or '\r' in lowered:
+            lowered = lowered.translate(WHITESPACE_TO_SPACE)
+
+        goto, fail, output, patterns = self._goto, self._fail, self._output, self._patterns
+        length = len(lowered)
+        candidates = []
+        state = 0
+        for end, char in enumerate(lowered, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not output[state]:
+                continue
+            for pattern_id in output[state]:
+                pattern_length, skill, exact = patterns[pattern_id]
+                start = end - pattern_length
+                if start > 0 and lowered[start - 1] in WORD_CHARS and lowered[start] in WORD_CHARS:
+                    continue
+                if end < length and lowered[end] in WORD_CHARS and lowered[end - 1] in WORD_CHARS:
+                    continue
+                if exact is not None and text[start:end] != exact:
+                    continue
+                candidates.append((start, end, skill))
+
+        # Leftmost-longest selection of non-overlapping matches
+        candidates.sort(key=lambda match: (match[0], match[0] - match[1]))
+        matches = []
+        last_end = 0
+        for start, end, skill in candidates:
+            if start >= last_end:
+                matches.append((start, end, skill))
+                last_end = end
+        return matches
+
+    def extract(self, text):
+        """
+        Count skill mentions in text
+        Returns {skill: {'category', 'count', 'offsets'}} in order of first mention.
+        """
+        found = {}
+        for start, end, skill in self.find_all(text):
+            entry = found.get(skill)
+            if entry is None:
+                entry = found[skill] = {
+                    'category': self.skills[skill]['category'],
+                    'count': 0,
+                    'offsets': []
+                }
+            entry['count'] += 1
+            entry['offsets'].append((start, end))
+        return found
+
+
+_skill_matcher = None
+
+
+def get_skill_matcher():
+    """
+    Return the shared matcher, compiling it on first use
+    Extra taxonomy files can be listed in SKILL_TAXONOMY_PATHS (os.pathsep separated).
+    """
+    global _skill_matcher
+    if _skill_matcher is None:
+        extra_paths = [p for p in os.getenv("SKILL_TAXONOMY_PATHS", "").split(os.pathsep) if p]
+        _skill_matcher = SkillMatcher(*load_taxonomy(DEFAULT_TAXONOMY_PATH, *extra_paths))
+    return _skill_matcher
@@ -0,0 +1,182 @@
+"""
+Cold-start profiling for the Streamlit app
+Shows where import time goes and which heavy libraries each page loads,
+each measured in a fresh interpreter like a newly scaled-up replica:
+
+    python startup_profile.py                import-time breakdown of app.py
+    python startup_profile.py --pages        first run of every page
+    python startup_profile.py utils --top 5  breakdown for one module
+
+The app also records its first paint (the end of the first script run) as
+seconds since the process started; set STARTUP_LOG to append it as JSONL.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(APP_DIR, "app.py")
+
+# Libraries worth keeping off the cold-start path
+HEAVY_MODULES = ('openai', 'PyPDF2', 'bs4', 'requests', 'numpy')
+
+first_paint = None
+
+
+def process_age():
+    """Seconds since this process started, or None where /proc is unavailable"""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the parenthesised command name; starttime is field 22
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def note_first_paint():
+    """Record when the first script run finished; later calls do nothing"""
+    global first_paint
+    if first_paint is not None:
+        return
+    first_paint = {
+        'time': round(time.time(), 3),
+        'process_age': process_age(),
+        'heavy_modules': [m for m in HEAVY_MODULES if m in sys.modules]
+    }
+    path = os.getenv("STARTUP_LOG")
+    if path:
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(first_paint) + "\n")
+        except OSError:
+            pass
+
+
+def parse_importtime(stderr):
+    """Parse `python -X importtime` output into (cumulative us, self us, depth, module)"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((int(cumulative_us), int(self_us), depth, name.strip()))
+    return rows
+
+
+def import_breakdown(module):
+    """Import `module` in a fresh interpreter and return its import-time rows"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=APP_DIR, capture_output=True, text=True, env=dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return parse_importtime(result.stderr)
+
+
+PAGE_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+streamlit_import = time.perf_counter() - start
+at = AppTest.from_file({app!r}, default_timeout=60)
+start = time.perf_counter()
+at.run()
+first_run = time.perf_counter() - start
+page_run = None
+if {page!r}:
+    start = time.perf_counter()
+    at.sidebar.radio[0].set_value({page!r}).run()
+    page_run = time.perf_counter() - start
+print(json.dumps({{'streamlit_import': streamlit_import, 'first_run': first_run, 'page_run': page_run,
+                  'exception': bool(at.exception),
+                  'heavy_modules': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def profile_page(page=None):
+    """First run of the app, then of `page`, in a fresh interpreter"""
+    script = PAGE_SCRIPT.format(app=APP_PATH, page=page, heavy=HEAVY_MODULES)
+    # Without the background warm-up, the modules loaded are the page's own
+    env = dict(os.environ, OPENAI_API_KEY=os.getenv("OPENAI_API_KEY") or "profile-key", LLM_WARM_UP="0")
+    result = subprocess.run([sys.executable, "-c", script], cwd=APP_DIR, capture_output=True, text=True, env=env)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def app_pages():
+    """Page names from the sidebar list in app.py"""
+    import ast
+
+    with open(APP_PATH, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "pages" for t in node.targets):
+            return ast.literal_eval(node.value)
+    return []
+
+
+def direct_imports(rows, module):
+    """(total us, rows of the modules `module` imported directly)"""
+    # importtime lists a module's imports before the module itself
+    children = []
+    for row in rows:
+        if row[2] == 1:
+            children.append(row)
+        elif row[2] == 0:
+            if row[3] == module:
+                return row[0], children
+            children = []
+    return 0, []
+
+
+def print_breakdown(module, top):
+    rows = import_breakdown(module)
+    total, children = direct_imports(rows, module)
+    print(f"import {module}: {total / 1000:.1f} ms")
+    children = sorted(children, reverse=True)[:top]
+    for cumulative, self_us, _, name in children:
+        print(f"   {name:<28} {cumulative / 1000:8.1f} ms  (self {self_us / 1000:.1f} ms)")
+    loaded = [m for m in HEAVY_MODULES if any(name == m for _, _, _, name in rows)]
+    print(f"   heavy libraries loaded: {', '.join(loaded) or 'none'}")
+
+
+def print_pages():
+    home = profile_page()
+    print(f"streamlit import {home['streamlit_import']:.2f}s, first app run {home['first_run'] * 1000:.0f} ms"
+          f" (loads: {', '.join(home['heavy_modules']) or 'none'})")
+    for page in app_pages()[1:]:
+        result = profile_page(page)
+        status = "  EXCEPTION" if result['exception'] else ""
+        print(f"   {page:<36} {result['page_run'] * 1000:7.0f} ms"
+              f"  loads: {', '.join(result['heavy_modules']) or 'none'}{status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the app's cold start")
+    parser.add_argument("module", nargs="?", default="app", help="module to import (default: app)")
+    parser.add_argument("--top", type=int, default=15, help="number of imports to list")
+    parser.add_argument("--pages", action="store_true", help="time the first run of every page")
+    args = parser.parse_args()
+
+    if args.pages:
+        print_pages()
+    elif args.module == "app":
+        # Importing app.py would run it; profile streamlit and the shared utils module instead
+        print_breakdown("streamlit", args.top)
+        print_breakdown("utils", args.top)
+    else:
+        print_breakdown(args.module, args.top)
+
+
+if __name__ == "__main__":
+    main()
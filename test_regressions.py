@@ -0,0 +1,485 @@
+"""
+Regression tests for the equivalence and edge-case claims behind the
+optimizations: python -m pytest -q
+
+LLM paths run against fake_openai's local server, so no network or API
+key is needed. The reference implementations and input generators are
+the ones benchmarks.py compares against.
+"""
+
+import json
+import time
+
+import pytest
+
+import llm_cache
+import model_router
+from answer_scoring import score_answers
+from benchmarks import (legacy_clean_job_description, legacy_score_answer_quality, linear_scan_search,
+                        make_answers, make_scraped_page, make_synthetic_jobs, prep_pack_reply, use_fake_server)
+from fake_openai import FakeOpenAIServer, stub_reply
+from interview_questions import QuestionParser, QuestionStream
+from job_index import JobIndex
+from llm_scheduler import set_scheduler
+from scraper import clean_job_description
+
+
+@pytest.fixture(scope="module")
+def jobs():
+    return make_synthetic_jobs(2000)
+
+
+@pytest.fixture(scope="module")
+def index(jobs):
+    index = JobIndex()
+    index.add_jobs(jobs)
+    return index
+
+
+@pytest.fixture
+def search_index(monkeypatch, index):
+    """search_jobs and count_jobs served from the synthetic corpus"""
+    import scraper
+    monkeypatch.setattr(scraper, "_job_index", index)
+    return index
+
+
+def start_llm(monkeypatch, reply=stub_reply, cache=None):
+    """Point utils at a fresh fake server; returns (utils, server)"""
+    server = FakeOpenAIServer(reply=reply).start()
+    monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(llm_cache, "_response_cache", cache if cache is not None else False)
+    utils = use_fake_server(server)
+    utils._prep_pack_cache.clear()
+    utils._rubric_cache.clear()
+    return utils, server
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    utils, server = start_llm(monkeypatch)
+    yield utils, server
+    server.stop()
+    set_scheduler(None)
+
+
+# Search
+
+@pytest.mark.parametrize("query, location", [
+    ("sql", ""), ("python", "remote"), ("aws", "new york"), ("kubernetes", ""), ("", "remote"), ("", "austin, tx"),
+])
+def test_search_matches_linear_scan(index, jobs, query, location):
+    # Whole-word queries match the same jobs as the original substring scan
+    found = [index.jobs[i] for i in index.search_ids(query, location)]
+    expected = linear_scan_search(jobs, query, location)
+    assert {id(job) for job in found} == {id(job) for job in expected}
+    if not query:
+        # Location-only searches keep the corpus order
+        assert [id(job) for job in found] == [id(job) for job in expected]
+
+
+@pytest.mark.parametrize("query, location", [("python", ""), ("data analyst", "remote"), ("tableau", "austin")])
+def test_top_k_equals_full_ranking(index, query, location):
+    ranked = index.search_ids(query, location)
+    assert ranked
+    for k in (1, 5, 10, len(ranked), len(ranked) + 5):
+        assert index.search_ids(query, location, top_k=k) == ranked[:k]
+
+
+@pytest.mark.parametrize("top_k", [0, -1])
+def test_top_k_empty_page(index, top_k):
+    assert index.search_ids("python", "", top_k=top_k) == []
+    assert index.search_ids("", "remote", top_k=top_k) == []
+    assert index.search_ids("", "", top_k=top_k) == []
+
+
+def test_search_jobs_paging(search_index):
+    from scraper import count_jobs, search_jobs
+
+    assert search_jobs("python", "", offset=0, limit=0) == []
+    everything = search_jobs("python")
+    assert len(everything) == count_jobs("python")
+    pages = [search_jobs("python", offset=offset, limit=10) for offset in range(0, len(everything), 10)]
+    assert [job for page in pages for job in page] == everything
+
+
+def test_search_jobs_falls_back_to_first_jobs(search_index, jobs):
+    from scraper import search_jobs
+
+    # Like the original scan, a search without matches shows the first two jobs
+    assert search_jobs("zzzz") == linear_scan_search(jobs, "zzzz") == jobs[:2]
+
+
+def test_search_jobs_returns_copies(search_index):
+    from scraper import search_jobs
+
+    for results in (search_jobs("python", limit=3), search_jobs(limit=3), search_jobs("zzzz")):
+        original = dict(results[0])
+        results[0]['title'] = "Changed"
+        assert search_index.jobs[search_index.jobs.index(original)] == original
+
+
+def test_job_index_is_built_once(monkeypatch):
+    import threading
+    import scraper
+
+    builds = []
+    real_sample_jobs = scraper.get_sample_job_descriptions
+
+    def slow_sample_jobs():
+        builds.append(1)
+        threading.Event().wait(0.05)
+        return real_sample_jobs()
+
+    monkeypatch.setattr(scraper, "_job_index", None)
+    monkeypatch.setattr(scraper, "get_job_store", lambda: None)
+    monkeypatch.setattr(scraper, "get_sample_job_descriptions", slow_sample_jobs)
+    threads = [threading.Thread(target=scraper.get_job_index) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(builds) == 1
+
+
+# Resume matching
+
+def test_resume_matcher_queries_while_jobs_are_added(jobs):
+    import threading
+    from resume_matcher import ResumeMatcher
+
+    matcher = ResumeMatcher()
+    matcher.add_jobs(jobs[:50])
+    errors = []
+
+    def query():
+        try:
+            for _ in range(30):
+                assert matcher.match("Data analyst with SQL, Python and Tableau", 3)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=query) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for start in range(50, 400, 10):
+        matcher.add_jobs(jobs[start:start + 10])
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(matcher.scores("SQL")) == len(matcher) == 400
+
+
+def test_shared_resume_matcher_adds_each_job_once(monkeypatch, search_index):
+    import threading
+    import resume_matcher
+
+    monkeypatch.setattr(resume_matcher, "_resume_matcher", None)
+    threads = [threading.Thread(target=resume_matcher.get_resume_matcher) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(resume_matcher.get_resume_matcher()) == len(search_index.jobs)
+
+
+# Response cache
+
+def test_sqlite_cache_hits_do_not_write(tmp_path, monkeypatch):
+    cache = llm_cache.SQLiteCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    cache.set("old", "a")
+    cache.set("new", "b")
+    changes = cache._conn.total_changes
+    for _ in range(100):
+        assert cache.get("old") == "a"
+    assert cache._conn.total_changes == changes
+
+    # Once an access time is stale, the refresh is written with the next set
+    monkeypatch.setattr(llm_cache, "ACCESS_REFRESH_SECONDS", 0)
+    assert cache.get("old") == "a"
+    assert cache._conn.total_changes == changes
+    cache.set("newest", "c")
+    # "new" was least recently used, so it is the one evicted
+    assert cache.get("old") == "a" and cache.get("new") is None
+
+
+# Cleaning
+
+def test_clean_plain_text_matches_original():
+    for raw in ("  Senior   analyst\twith SQL  ", "Data Analyst - Remote", ""):
+        assert clean_job_description(raw) == legacy_clean_job_description(raw)
+
+
+def test_clean_html():
+    html = ("<html><head><style>p{}</style><script>var a = 1 < 2;</script></head><body>\r\n"
+            "<p>We need&nbsp;a <b>Data</b> Analyst &amp; more.</p>\r\n\r\n\r\n\r\n"
+            "<ul>\r\n  <li>SQL</li>\r\n  <li>Python</li>\r\n</ul><p>Zero​width\x07bell</p></body></html>")
+    assert clean_job_description(html) == "We need a Data Analyst & more.\n\n- SQL\n- Python\n\nZerowidthbell"
+
+
+def test_clean_scraped_page():
+    text = clean_job_description(make_scraped_page(20_000))
+    assert "<" not in text and "&amp;" not in text and "\n\n\n" not in text
+    assert clean_job_description(text) == text
+
+
+# Answer scoring
+
+def test_score_answers_matches_original():
+    answers = make_answers(2000) + ["", "ſpecifically 1", "İnstance", "١٢٣", "counterexample " * 60]
+    assert score_answers(answers) == [legacy_score_answer_quality(a) for a in answers]
+
+
+# Question parsing
+
+LINES = [
+    '{"text": "Walk me through optimizing a slow SQL query.", "category": "technical", "difficulty": "medium"}',
+    '2. {"text": "Tell me about a conflict with a stakeholder.", "category": "Behavioural", "difficulty": "Easy"},',
+    "Technical Questions:",
+    "```json",
+    '- {"text": "Walk me through optimizing a slow SQL query.", "category": "technical", "difficulty": "hard"}',
+    '{"text": "How would you size a data warehouse?", "category": "unknown", "difficulty": "hard"}',
+    '* {"text": "Why do you want to work here at DataCorp?", "category": "culture fit", "difficulty": "easy"}',
+]
+
+
+def test_question_parser_handles_chunk_boundaries():
+    text = "\n".join(LINES)
+    for size in (1, 7, 64, len(text)):
+        parser = QuestionParser()
+        questions = []
+        for start in range(0, len(text), size):
+            questions += parser.feed(text[start:start + size])
+        questions += parser.close()
+        assert [q['category'] for q in questions] == ['technical', 'behavioral', 'culture']
+        assert questions[1] == {'text': "Tell me about a conflict with a stakeholder.",
+                                'category': 'behavioral', 'difficulty': 'easy'}
+        # The heading, the duplicate and the unknown category; the code fence is skipped
+        assert parser.rejected == 3
+
+
+def test_question_stream_tops_up_missing_questions():
+    calls = []
+
+    def generate(count, exclude):
+        calls.append((count, list(exclude)))
+        if len(calls) == 1:
+            return iter(["\n".join(LINES) + "\n"])
+        return iter(['{"text": "Describe a dashboard you built end to end.", '
+                     '"category": "technical", "difficulty": "medium"}'])
+
+    stream = QuestionStream(generate, 4)
+    questions = list(stream)
+    assert len(questions) == 4 and stream.requests == 2 and stream.error is None
+    assert calls[1] == (1, [q['text'] for q in questions[:3]])
+
+
+def test_question_stream_reports_errors():
+    stream = QuestionStream(lambda count, exclude: iter(["Error: boom"]), 3)
+    assert list(stream) == [] and stream.error == "Error: boom" and stream.requests == 1
+
+
+# LLM paths against the fake server
+
+def test_stream_question_items(llm):
+    utils, server = llm
+    stream = utils.stream_question_items("Data Analyst with SQL and Python", 8)
+    questions = list(stream)
+    assert len(questions) == 8 and stream.error is None
+    assert server.request_count == stream.requests
+
+
+def test_evaluate_answer(llm):
+    utils, server = llm
+    answer = make_answers(50)[10]
+    assert len(answer.split()) >= model_router.MIN_LLM_ANSWER_WORDS
+    feedback = utils.evaluate_answer("Tell me about a time you used SQL.", answer)
+    assert not feedback.startswith("Error") and server.request_count == 1
+    streamed = "".join(utils.stream_evaluate_answer("Tell me about a time you used SQL.", answer))
+    assert not streamed.startswith("Error") and server.request_count == 2
+
+
+def test_short_answer_is_scored_locally(llm):
+    utils, server = llm
+    feedback = utils.evaluate_answer("Tell me about a time you used SQL.", "I used SQL")
+    assert feedback.startswith("**SCORE:**") and server.request_count == 0
+
+
+def test_response_cache_and_max_tokens(monkeypatch):
+    utils, server = start_llm(monkeypatch, reply=lambda messages: "word " * 500,
+                              cache=llm_cache.LRUCache(max_entries=16))
+    try:
+        first = utils.call_gpt("Summarize this posting", max_tokens=100, temperature=0.2)
+        assert len(first) == 400  # the fake server cuts replies at max_tokens (~4 characters each)
+        assert utils.call_gpt("Summarize this posting", max_tokens=100, temperature=0.2) == first
+        assert server.request_count == 1
+    finally:
+        server.stop()
+        set_scheduler(None)
+
+
+def test_prep_pack_is_shared_between_pages(monkeypatch):
+    utils, server = start_llm(monkeypatch, reply=prep_pack_reply)
+    try:
+        job = "Senior Data Analyst. Requirements: SQL, Python, Tableau."
+        assert utils.get_prep_pack(job, use_llm=False) is None
+        pack = utils.get_prep_pack(job)
+        assert set(pack) == {'analysis', 'questions', 'star_examples'} and len(pack['questions']) == 10
+        assert utils.get_prep_pack(job) is pack
+        assert "".join(utils.PrepPackSection(job, 'star_examples')) == pack['star_examples']
+        assert server.request_count == 1
+    finally:
+        server.stop()
+        set_scheduler(None)
+
+
+def test_prep_pack_sections_share_one_request(monkeypatch):
+    utils, server = start_llm(monkeypatch, reply=prep_pack_reply)
+    server.chunk_delay = 0.001
+    try:
+        job = "Senior Data Analyst. Requirements: SQL, Python, Tableau."
+        expected = json.loads(prep_pack_reply([{'content': '"star_examples"'}]))
+        # The Analyzer page streams the analysis; the other pages open while it is in flight
+        analysis = iter(utils.PrepPackSection(job, 'analysis'))
+        first = next(analysis)
+        questions = utils.PrepPackSection(job, 'questions', 5)
+        star = utils.PrepPackSection(job, 'star_examples')
+        assert "".join(star) == expected['star_examples']
+        assert first + "".join(analysis) == expected['analysis']
+        assert [q['text'] for q in questions] == [q['text'] for q in expected['questions'][:5]]
+        assert questions.error is None and star.error is None
+        assert utils.get_prep_pack(job, use_llm=False)['analysis'] == expected['analysis'].strip()
+        assert server.request_count == 1
+    finally:
+        server.stop()
+        set_scheduler(None)
+
+
+def test_prep_pack_pages_send_one_request(monkeypatch):
+    from streamlit.testing.v1 import AppTest
+
+    utils, server = start_llm(monkeypatch, reply=prep_pack_reply)
+    monkeypatch.setenv("LLM_WARM_UP", "0")
+    try:
+        job = "Senior Data Analyst. Requirements: SQL, Python, Tableau. " * 3
+        app = AppTest.from_file("app.py", default_timeout=30).run()
+        app.sidebar.radio[0].set_value('📝 Job Description Analyzer').run()
+        app.text_area[0].input(job).run()
+        app.button[0].click().run()
+        assert not app.exception and app.session_state.last_analysis.startswith("1. KEY SKILLS")
+        for page in ('❓ Interview Questions Generator', '⭐ STAR Method Examples'):
+            app.sidebar.radio[0].set_value(page).run()
+            app.button[0].click().run()
+            assert not app.exception
+        assert len(app.session_state.questions) == 10
+        assert server.request_count == 1
+    finally:
+        server.stop()
+        set_scheduler(None)
+
+
+def test_route_prompt_size_cutoff(monkeypatch):
+    monkeypatch.setattr(model_router, "ROUTING", True)
+    assert model_router.route('evaluate', 100)['model'] == model_router.FAST_MODEL
+    assert model_router.route('evaluate', model_router.FAST_MAX_PROMPT_TOKENS + 1)['model'] == \
+        model_router.STANDARD_MODEL
+    monkeypatch.setattr(model_router, "ROUTING", False)
+    assert model_router.route('evaluate', 100) == {'model': model_router.STANDARD_MODEL, 'max_tokens': 1500,
+                                                   'temperature': 0.7}
+
+
+
+def test_prompts_are_fitted_for_the_routed_model(monkeypatch):
+    import utils
+
+    fitted = []
+    budget_fields = utils.budget_fields
+
+    def record(template, model, max_tokens, **fields):
+        fitted.append((template, model, max_tokens))
+        return budget_fields(template, model, max_tokens, **fields)
+
+    monkeypatch.setattr(utils, "budget_fields", record)
+    monkeypatch.setattr(model_router, "ROUTING", True)
+    fast, standard = model_router.FAST_MODEL, model_router.STANDARD_MODEL
+    job = "Data analyst role using SQL, Python and Tableau dashboards. " * 20
+
+    prompt, routed = utils._routed_prompt('questions', utils._question_items_prompt, job, 5)
+    assert routed['model'] == fast and fitted == [('generate_interview_questions', fast, 1500)]
+
+    # Too long for the fast model: rebuilt for the standard one
+    fitted.clear()
+    monkeypatch.setattr(model_router, "FAST_MAX_PROMPT_TOKENS", 50)
+    prompt, routed = utils._routed_prompt('questions', utils._question_items_prompt, job, 5)
+    assert routed['model'] == standard
+    assert fitted == [('generate_interview_questions', fast, 1500), ('generate_interview_questions', standard, 1500)]
+
+    # The prep pack is routed too, to the standard model, with routing on or off
+    for routing in (True, False):
+        fitted.clear()
+        monkeypatch.setattr(model_router, "ROUTING", routing)
+        prompt, routed, cache, cache_key = utils._prep_pack_request(job)
+        assert (routed['model'], routed['max_tokens']) == (standard, utils.PREP_PACK_MAX_TOKENS)
+        assert fitted == [('generate_prep_pack', standard, utils.PREP_PACK_MAX_TOKENS)]
+
+# Job store
+
+def test_import_skips_malformed_lines(tmp_path):
+    from job_store import JobStore
+
+    path = tmp_path / "jobs.jsonl"
+    path.write_text("\n".join([
+        json.dumps({'id': '1', 'title': 'Analyst', 'description': 'SQL and Python.'}),
+        '{"id": "2", "title": "Broken',
+        '["not", "an", "object"]',
+        json.dumps({'id': '3', 'title': 'Engineer', 'description': 123}),
+        json.dumps({'id': '4', 'title': 'Engineer', 'description': 'Go and Kubernetes.'}),
+    ]) + "\n")
+    store = JobStore(str(tmp_path / "jobs.db"))
+    report = store.import_file(str(path))
+    assert (report.added, report.duplicates, report.invalid) == (2, 0, 3)
+    assert sorted(job['id'] for job in store.iter_jobs()) == ['1', '4']
+
+
+# Scheduling
+
+def test_interactive_requests_run_before_queued_batch_work():
+    import threading
+    from llm_scheduler import LLMScheduler, Lane
+
+    scheduler = LLMScheduler([Lane("test", "key", "model", max_in_flight=1)])
+    busy = scheduler.acquire('analyze')
+    served = []
+
+    def request(feature):
+        lane = scheduler.acquire(feature)
+        served.append(feature)
+        scheduler.release(lane)
+
+    batch = [threading.Thread(target=request, args=('batch',)) for _ in range(3)]
+    for thread in batch:
+        thread.start()
+    while scheduler.queued.get('batch', 0) < 3:
+        time.sleep(0.001)
+    interactive = threading.Thread(target=request, args=('analyze',))
+    interactive.start()
+    while scheduler.queued.get('analyze', 0) < 1:
+        time.sleep(0.001)
+    scheduler.release(busy)
+    for thread in batch + [interactive]:
+        thread.join(5)
+    assert served == ['analyze', 'batch', 'batch', 'batch']
+
+
+# Batch processing
+
+def test_batch_records_unexpected_job_errors(tmp_path):
+    from batch import run_batch
+
+    jobs = [{'id': 'bad', 'title': 'Broken', 'company': 'X', 'location': '', 'description': None},
+            {'id': 'good', 'title': 'Analyst', 'company': 'Y', 'location': 'Remote',
+             'description': 'Data analyst role using SQL and Python.'}]
+    report = run_batch(jobs, str(tmp_path / "out.jsonl"), workers=2, analyze=lambda text: "analysis")
+    lines = (tmp_path / "out.jsonl").read_text().splitlines()
+    assert len(lines) == 2 and report.failed == 1 and report.succeeded == 1
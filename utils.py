@@ -1,34 +1,282 @@
+import hashlib
+import json
 import os
+import threading
+import time
 from dotenv import load_dotenv
-import PyPDF2
-import re
-from openai import OpenAI
+
+from interview_questions import CATEGORIES, DIFFICULTIES, QuestionStream, validate_question
+from json_stream import JSONFieldReader
+from llm_cache import LRUCache, MAX_CACHEABLE_TEMPERATURE, get_response_cache, in_flight, make_cache_key
+from llm_metrics import record_call
+from llm_scheduler import MAX_CONCURRENCY, MAX_RETRIES, get_scheduler
+from model_router import (DEFAULT_MAX_TOKENS, FAST_MODEL, LOCAL_MODEL, STANDARD_MODEL, local_feedback,
+                          needs_llm_evaluation, route)
+from prompt_budget import budget_fields, count_tokens
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Initialize OpenAI client with API key from environment
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# OpenAI clients belong to the llm_scheduler lanes and are built on first
+# use: importing the SDK takes about half a second, which pages without
+# LLM calls should not pay
+_warm_up_started = False
+
+# The standard-tier model; model_router picks the model for each feature
+MODEL = STANDARD_MODEL
+MAX_TOKENS = DEFAULT_MAX_TOKENS
+
+DEFAULT_SYSTEM_MESSAGE = "You are a helpful AI interview coach."
+
+# Resume PDF limits and the extracted-text cache (keyed by file hash)
+MAX_PDF_PAGES = int(os.getenv("PDF_MAX_PAGES", 50))
+MAX_PDF_BYTES = int(os.getenv("PDF_MAX_BYTES", 10 * 1024 * 1024))
+PDF_READ_CHUNK = 64 * 1024
+_pdf_text_cache = LRUCache(max_entries=128, ttl=None)
+
+def get_client():
+    """Return the OpenAI client of the first scheduler lane, importing the SDK on first use"""
+    return get_scheduler(MODEL).lanes[0].client
+
+def warm_up_client():
+    """
+    Build the client on a background thread, so the first LLM call does not
+    wait for the SDK import. LLM_WARM_UP=0 turns this off.
+    """
+    global _warm_up_started
+    if not _warm_up_started and os.getenv("LLM_WARM_UP", "1") != "0":
+        _warm_up_started = True
+        threading.Thread(target=get_client, daemon=True).start()
+
+def _cache_for(system_message, prompt, temperature, use_cache, max_tokens=MAX_TOKENS, model=MODEL):
+    """Return (cache, key) for a request, or (None, None) when it should not be cached"""
+    if use_cache is None:
+        use_cache = temperature <= MAX_CACHEABLE_TEMPERATURE
+    cache = get_response_cache() if use_cache else None
+    if cache is None:
+        return None, None
+    return cache, make_cache_key(model, system_message, prompt, temperature, max_tokens)
+
+def _request_tokens(system_message, prompt, max_tokens, model=MODEL):
+    """Tokens a request counts against a TPM limit: the prompt plus max_tokens"""
+    return count_tokens(system_message, model) + count_tokens(prompt, model) + max_tokens
+
+def _routed(feature, prompt, **overrides):
+    """model, max_tokens and temperature for a feature's request (see model_router)"""
+    # The prompt size cutoff is the fast model's, so its tokenizer counts
+    return dict(route(feature, count_tokens(prompt, FAST_MODEL)), feature=feature, **overrides)
+
+def _messages(system_message, prompt):
+    return [
+        {"role": "system", "content": system_message},
+        {"role": "user", "content": prompt}
+    ]
+
+def call_gpt(prompt, system_message=DEFAULT_SYSTEM_MESSAGE, temperature=0.7, use_cache=None,
+             max_tokens=MAX_TOKENS, response_format=None, feature=None, model=None):
+    """
+    Call OpenAI GPT API using the new client format
+
+    Responses are cached by request content. By default only calls at or
+    below MAX_CACHEABLE_TEMPERATURE are cached; pass use_cache to override.
+    response_format is passed through for JSON output. Latency and token
+    usage are recorded under `feature` (see llm_metrics). model defaults to
+    MODEL; feature functions take theirs from model_router.route.
+
+    Cacheable requests are also coalesced: while one is in flight, identical
+    requests from other sessions wait for its response instead of calling
+    the API again. Requests that do go out queue in llm_scheduler for rate
+    limits, and rate-limit and server errors are retried there.
+    """
+    start = time.perf_counter()
+    model = model or MODEL
+    cache, cache_key = _cache_for(system_message, prompt, temperature, use_cache, max_tokens, model)
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            record_call(feature, model, start, cache_hit=True)
+            return cached
+
+    def request():
+        extra = {"response_format": response_format} if response_format else {}
+        try:
+            response, lane = get_scheduler(model).call(
+                lambda lane: lane.client.chat.completions.create(
+                    model=lane.model,
+                    messages=_messages(system_message, prompt),
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    **extra
+                ),
+                feature, _request_tokens(system_message, prompt, max_tokens, model)
+            )
+            content = response.choices[0].message.content
+        except Exception as e:
+            record_call(feature, model, start, error=e)
+            return f"Error: {str(e)}"
+
+        record_call(feature, lane.model, start, usage=response.usage)
+        if cache is not None and content:
+            cache.set(cache_key, content)
+        return content
+
+    if cache is None:
+        return request()
+    content, shared = in_flight.do("call:" + cache_key, request)
+    if shared:
+        record_call(feature, model, start, coalesced=True)
+    return content
+
+def stream_gpt(prompt, system_message=DEFAULT_SYSTEM_MESSAGE, temperature=0.7, use_cache=None,
+               feature=None, max_tokens=MAX_TOKENS, model=None):
+    """
+    Streaming variant of call_gpt that yields text chunks as they arrive
+
+    A cached response is yielded as a single chunk. Otherwise the chunks are
+    joined once the stream completes and the full text is cached, so a later
+    call_gpt or stream_gpt with the same request is a cache hit. The time to
+    the first token is recorded along with latency and usage.
+
+    Identical cacheable streams started while one is in flight replay its
+    chunks and then follow it live, so they share one API call.
+    """
+    start = time.perf_counter()
+    model = model or MODEL
+    cache, cache_key = _cache_for(system_message, prompt, temperature, use_cache, max_tokens, model)
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            record_call(feature, model, start, cache_hit=True)
+            yield cached
+            return
+
+    def open_stream():
+        return _stream_completion(prompt, system_message, temperature, max_tokens, model, feature, start,
+                                  cache, cache_key)
+
+    if cache is None:
+        yield from open_stream()
+        return
+    chunks, shared = in_flight.stream("stream:" + cache_key, open_stream)
+    if shared:
+        record_call(feature, model, start, coalesced=True)
+    yield from chunks
+
+def _stream_completion(prompt, system_message, temperature, max_tokens, model, feature, start, cache, cache_key,
+                       response_format=None):
+    """The API side of stream_gpt: yield chunks, then record usage and cache the text"""
+    extra = {"response_format": response_format} if response_format else {}
+    chunks = []
+    first_token = usage = None
+    scheduler = get_scheduler(model)
+    lane = error = None
+    try:
+        # The lane stays taken until the stream has been read
+        stream, lane = scheduler.call(
+            lambda lane: lane.client.chat.completions.create(
+                model=lane.model,
+                messages=_messages(system_message, prompt),
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                # The final chunk then carries the token usage
+                stream_options={"include_usage": True},
+                **extra
+            ),
+            feature, _request_tokens(system_message, prompt, max_tokens, model), keep_lane=True
+        )
+        for chunk in stream:
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                if first_token is None:
+                    first_token = time.perf_counter()
+                chunks.append(delta)
+                yield delta
+    except Exception as e:
+        error = e
+        record_call(feature, lane.model if lane else model, start, first_token, error=e)
+        yield f"Error: {str(e)}"
+        return
+    finally:
+        if lane is not None:
+            scheduler.release(lane, error)
+
+    record_call(feature, lane.model, start, first_token, usage)
+    if cache is not None and chunks:
+        cache.set(cache_key, "".join(chunks))
+
+async def acall_gpt(prompt, system_message=DEFAULT_SYSTEM_MESSAGE, temperature=0.7,
+                    use_cache=None, max_retries=None, feature=None, model=None, max_tokens=MAX_TOKENS):
+    """
+    Asyncio variant of call_gpt for running many requests concurrently
+
+    Like call_gpt, requests queue in llm_scheduler, which retries 429/5xx
+    responses and connection errors after pausing the lane. Unlike
+    call_gpt, errors are raised once the retries are used up instead of
+    being returned as "Error: ..." text. The recorded latency includes
+    queueing and retries. model and max_tokens work as in call_gpt, so
+    routed arguments (see _routed) apply here too.
+    """
+    start = time.perf_counter()
+    model = model or MODEL
+    cache, cache_key = _cache_for(system_message, prompt, temperature, use_cache, max_tokens, model)
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            record_call(feature, model, start, cache_hit=True)
+            return cached
 
-def call_gpt(prompt, system_message="You are a helpful AI interview coach.", temperature=0.7):
-    """Call OpenAI GPT API using the new client format"""
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=temperature,
-            max_tokens=1500
+        response, lane = await get_scheduler(model).acall(
+            lambda lane: lane.async_client().chat.completions.create(
+                model=lane.model,
+                messages=_messages(system_message, prompt),
+                temperature=temperature,
+                max_tokens=max_tokens
+            ),
+            feature, _request_tokens(system_message, prompt, max_tokens, model),
+            MAX_RETRIES if max_retries is None else max_retries
         )
-        return response.choices[0].message.content
     except Exception as e:
-        return f"Error: {str(e)}"
+        record_call(feature, model, start, error=e)
+        raise
+
+    record_call(feature, lane.model, start, usage=response.usage)
+    content = response.choices[0].message.content
+    if cache is not None and content:
+        cache.set(cache_key, content)
+    return content
+
+def _fit(template, feature, settings=None, **fields):
+    """
+    Compress prompt fields to the template's token budget (see prompt_budget)
+    Tokens are counted for the model and max_tokens in `settings`, by
+    default those a short prompt of `feature` is routed to.
+    """
+    settings = settings or route(feature)
+    return budget_fields(template, settings['model'], settings['max_tokens'], **fields)
 
-def analyze_job_description(job_desc):
-    """Analyze job description and extract key information"""
-    prompt = f"""Analyze this job description and provide:
+def _routed_prompt(feature, build, *args, **overrides):
+    """
+    (prompt, call_gpt arguments) for a feature's request
+    build(*args, settings=...) fits its fields for the routed model. A
+    prompt that is too long for the fast model is rebuilt for the model it
+    is routed to instead, so its budget matches the model that receives it.
+    """
+    settings = dict(route(feature), **overrides)
+    prompt = build(*args, settings=settings)
+    routed = _routed(feature, prompt, **overrides)
+    if routed['model'] != settings['model']:
+        prompt = build(*args, settings=routed)
+    return prompt, routed
+
+def _analyze_job_description_prompt(job_desc, settings=None):
+    job_desc = _fit('analyze_job_description', 'analyze', settings, job_desc=job_desc)['job_desc']
+    return f"""Analyze this job description and provide:
 
 1. KEY SKILLS REQUIRED: (list 5-7 main skills)
 2. EXPERIENCE LEVEL: (entry/mid/senior)
@@ -40,12 +288,23 @@ Job Description:
 {job_desc}
 
 Be specific and actionable."""
-    
-    return call_gpt(prompt)
 
-def generate_interview_questions(job_desc, num_questions=10):
-    """Generate custom interview questions based on job description"""
-    prompt = f"""Based on this job description, generate {num_questions} interview questions.
+def analyze_job_description(job_desc, feature='analyze'):
+    """
+    Analyze job description and extract key information
+    batch.py passes feature='batch', so its requests queue behind the app's.
+    """
+    prompt, routed = _routed_prompt(feature, _analyze_job_description_prompt, job_desc)
+    return call_gpt(prompt, **routed)
+
+def stream_analyze_job_description(job_desc):
+    """Streaming version of analyze_job_description, yields text chunks"""
+    prompt, routed = _routed_prompt('analyze', _analyze_job_description_prompt, job_desc)
+    return stream_gpt(prompt, **routed)
+
+def _generate_interview_questions_prompt(job_desc, num_questions=10, settings=None):
+    job_desc = _fit('generate_interview_questions', 'questions', settings, job_desc=job_desc)['job_desc']
+    return f"""Based on this job description, generate {num_questions} interview questions.
 
 Include this mix:
 - 40% Technical/Skills questions (test specific abilities)
@@ -57,12 +316,56 @@ Job Description:
 {job_desc}
 
 Format: Number each question clearly (1., 2., 3., etc.)"""
-    
-    return call_gpt(prompt)
 
-def evaluate_answer(question, user_answer):
-    """Evaluate user's interview answer"""
-    prompt = f"""You are an expert interviewer. Evaluate this answer:
+def generate_interview_questions(job_desc, num_questions=10):
+    """Generate custom interview questions based on job description"""
+    prompt, routed = _routed_prompt('questions', _generate_interview_questions_prompt, job_desc, num_questions)
+    return call_gpt(prompt, **routed)
+
+def stream_generate_interview_questions(job_desc, num_questions=10):
+    """Streaming version of generate_interview_questions, yields text chunks"""
+    prompt, routed = _routed_prompt('questions', _generate_interview_questions_prompt, job_desc, num_questions)
+    return stream_gpt(prompt, **routed)
+
+def _question_items_prompt(job_desc, num_questions, exclude=(), settings=None):
+    job_desc = _fit('generate_interview_questions', 'questions', settings, job_desc=job_desc)['job_desc']
+    avoid = ""
+    if exclude:
+        listed = "\n".join(f"- {text}" for text in exclude)
+        avoid = f"\n\nDo not repeat these questions:\n{listed}"
+    return f"""Based on this job description, generate {num_questions} interview questions.
+
+Include this mix:
+- 40% Technical/Skills questions (test specific abilities)
+- 30% Behavioral questions (STAR method situations)
+- 20% Company/Culture fit questions
+- 10% Problem-solving scenarios
+
+Job Description:
+{job_desc}{avoid}
+
+Output JSON Lines: exactly one JSON object per line and nothing else (no headings, numbering or code fences), e.g.
+{{"text": "Walk me through how you would optimize a slow SQL query.", "category": "technical", "difficulty": "medium"}}
+"category" is one of: {", ".join(CATEGORIES)}
+"difficulty" is one of: {", ".join(DIFFICULTIES)}"""
+
+def stream_question_items(job_desc, num_questions=10):
+    """
+    Generate interview questions as dicts with 'text', 'category' and 'difficulty'
+
+    Returns a QuestionStream: iterating it yields each question as soon as
+    its line has streamed in. Invalid lines are dropped and topped up with
+    one extra request; check .error afterwards for an "Error: ..." string.
+    """
+    def generate(count, exclude):
+        prompt, routed = _routed_prompt('questions', _question_items_prompt, job_desc, count, exclude)
+        return stream_gpt(prompt, **routed)
+    return QuestionStream(generate, num_questions)
+
+def _evaluate_answer_prompt(question, user_answer, settings=None):
+    fields = _fit('evaluate_answer', 'evaluate', settings, question=question, user_answer=user_answer)
+    question, user_answer = fields['question'], fields['user_answer']
+    return f"""You are an expert interviewer. Evaluate this answer:
 
 QUESTION: {question}
 
@@ -75,23 +378,179 @@ Provide:
 4. IMPROVED VERSION: (rewrite the answer better)
 
 Be specific and constructive."""
-    
-    return call_gpt(prompt)
 
-def extract_text_from_pdf(pdf_file):
-    """Extract text from uploaded PDF resume"""
-    try:
+def _rubric_evaluation_prompt(question, user_answer, rubric, settings=None):
+    fields = _fit('evaluate_with_rubric', 'evaluate', settings, question=question, rubric=rubric, user_answer=user_answer)
+    return f"""Evaluate this interview answer against the rubric.
+
+QUESTION: {fields['question']}
+
+RUBRIC:
+{fields['rubric']}
+
+CANDIDATE'S ANSWER: {fields['user_answer']}
+
+Reply with:
+1. SCORE: (1-10, by the rubric)
+2. STRENGTHS: (rubric points covered)
+3. WEAKNESSES: (rubric points missed, red flags)
+4. IMPROVED VERSION: (at most 80 words)
+
+Be brief."""
+
+def _evaluation_request(question, user_answer):
+    """call_gpt arguments for an evaluation, anchored to the question's rubric once it is cached"""
+    rubric = cached_rubric(question)
+    if rubric is None:
+        prompt, routed = _routed_prompt('evaluate', _evaluate_answer_prompt, question, user_answer)
+        return dict(routed, prompt=prompt)
+    prompt, routed = _routed_prompt('evaluate', _rubric_evaluation_prompt, question, user_answer, rubric,
+                                    max_tokens=RUBRIC_EVALUATION_MAX_TOKENS)
+    return dict(routed, prompt=prompt)
+
+def quick_feedback(question, user_answer):
+    """
+    Instant (score, markdown) feedback without an LLM call: the local
+    answer score and, once the question's rubric is cached, the rubric
+    points the answer covers (see model_router.local_feedback)
+    """
+    return local_feedback(user_answer, cached_rubric(question))
+
+def _short_answer_feedback(question, user_answer):
+    """Local feedback for an answer too short to send to the LLM, recorded under 'evaluate'"""
+    start = time.perf_counter()
+    score, feedback = quick_feedback(question, user_answer)
+    record_call('evaluate', LOCAL_MODEL, start)
+    return f"**SCORE:** {score}/10\n\n{feedback}"
+
+def evaluate_answer(question, user_answer):
+    """
+    Evaluate user's interview answer (shorter and faster when its rubric was prefetched)
+    Answers under model_router.MIN_LLM_ANSWER_WORDS get local feedback instead.
+    """
+    if not needs_llm_evaluation(user_answer):
+        return _short_answer_feedback(question, user_answer)
+    return call_gpt(**_evaluation_request(question, user_answer))
+
+def stream_evaluate_answer(question, user_answer):
+    """Streaming version of evaluate_answer, yields text chunks"""
+    if not needs_llm_evaluation(user_answer):
+        return iter([_short_answer_feedback(question, user_answer)])
+    return stream_gpt(**_evaluation_request(question, user_answer))
+
+RUBRIC_MAX_TOKENS = 300
+RUBRIC_EVALUATION_MAX_TOKENS = 600
+_rubric_cache = LRUCache(max_entries=1024, ttl=None)
+
+def question_hash(question):
+    """Key for an interview question that ignores case and whitespace differences"""
+    normalized = " ".join(question.lower().split())
+    return hashlib.sha256(f"{MODEL}\n{normalized}".encode("utf-8")).hexdigest()
+
+def _rubric_prompt(question, settings=None):
+    question = _fit('generate_rubric', 'rubric', settings, question=question)['question']
+    return f"""Write a scoring rubric for this interview question.
+
+QUESTION: {question}
+
+Provide short bullet points:
+1. MUST COVER: (3-5 points a strong answer includes)
+2. STRONG SIGNALS: (what makes it a 9-10 answer)
+3. RED FLAGS: (what lowers the score)
+4. MODEL ANSWER OUTLINE: (3-4 bullets)
+
+Keep it under 150 words."""
+
+def generate_rubric(question):
+    """
+    Scoring rubric for an interview question, cached per question hash
+    Returns the rubric text or an "Error: ..." string (which is not cached).
+    See interview_session.prefetch_rubrics for generating them ahead of time.
+    """
+    key = question_hash(question)
+    rubric = _rubric_cache.get(key)
+    if rubric is None:
+        prompt, routed = _routed_prompt('rubric', _rubric_prompt, question, max_tokens=RUBRIC_MAX_TOKENS,
+                                        temperature=0.3)
+        rubric = call_gpt(prompt, **routed)
+        if rubric.startswith("Error"):
+            return rubric
+        _rubric_cache.set(key, rubric)
+    return rubric
+
+def cached_rubric(question):
+    """The question's rubric if it has already been generated, else None"""
+    return _rubric_cache.get(question_hash(question))
+
+def _open_pdf(pdf_file):
+    """Return a seekable binary stream for a path or file-like object"""
+    if isinstance(pdf_file, (str, os.PathLike)):
+        return open(pdf_file, "rb")
+    pdf_file.seek(0)
+    return pdf_file
+
+def _hash_pdf(stream, max_bytes):
+    """SHA-256 of a PDF stream read in chunks, enforcing the size limit"""
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: stream.read(PDF_READ_CHUNK), b""):
+        size += len(chunk)
+        if size > max_bytes:
+            raise ValueError(f"PDF is larger than the {max_bytes:,} byte limit")
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+def iter_pdf_pages(pdf_file, max_pages=MAX_PDF_PAGES):
+    """Yield the text of each page lazily, stopping after max_pages"""
+    import PyPDF2
+
+    if isinstance(pdf_file, PyPDF2.PdfReader):
+        pdf_reader = pdf_file
+    else:
         pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text()
+    for page_number, page in enumerate(pdf_reader.pages):
+        if page_number >= max_pages:
+            break
+        yield page.extract_text() or ""
+
+def extract_text_from_pdf(pdf_file, max_pages=MAX_PDF_PAGES, max_bytes=MAX_PDF_BYTES):
+    """
+    Extract text from uploaded PDF resume
+
+    Text is cached by the file's content hash, so analyzing the same resume
+    against another job description skips PDF parsing. Files over max_bytes
+    are rejected and only the first max_pages pages are read.
+    """
+    stream = None
+    try:
+        stream = _open_pdf(pdf_file)
+        cache_key = (_hash_pdf(stream, max_bytes), max_pages)
+        text = _pdf_text_cache.get(cache_key)
+        if text is None:
+            import PyPDF2
+            pdf_reader = PyPDF2.PdfReader(stream)
+            pages = list(iter_pdf_pages(pdf_reader, max_pages))
+            if len(pdf_reader.pages) > max_pages:
+                pages.append(f"[Resume truncated after {max_pages} pages]")
+            text = "\n".join(pages)
+            _pdf_text_cache.set(cache_key, text)
         return text
     except Exception as e:
         return f"Error reading PDF: {str(e)}"
+    finally:
+        if stream is not None and stream is not pdf_file:
+            stream.close()
 
-def analyze_resume(resume_text, job_desc):
-    """Analyze resume against job description"""
-    prompt = f"""Compare this resume with the job requirements:
+def iter_resume_texts(pdf_files, max_pages=MAX_PDF_PAGES, max_bytes=MAX_PDF_BYTES):
+    """Yield (pdf_file, text) for a batch of resumes, one file in memory at a time"""
+    for pdf_file in pdf_files:
+        yield pdf_file, extract_text_from_pdf(pdf_file, max_pages, max_bytes)
+
+def _analyze_resume_prompt(resume_text, job_desc, settings=None):
+    fields = _fit('analyze_resume', 'resume', settings, resume_text=resume_text, job_desc=job_desc)
+    resume_text, job_desc = fields['resume_text'], fields['job_desc']
+    return f"""Compare this resume with the job requirements:
 
 JOB DESCRIPTION:
 {job_desc}
@@ -107,12 +566,21 @@ Provide:
 5. IMPROVEMENT SUGGESTIONS: (how to improve resume for this job)
 
 Be specific and actionable."""
-    
-    return call_gpt(prompt)
 
-def generate_cover_letter(resume_text, job_desc, company_name):
-    """Generate personalized cover letter"""
-    prompt = f"""Write a professional cover letter for this job application:
+def analyze_resume(resume_text, job_desc):
+    """Analyze resume against job description"""
+    prompt, routed = _routed_prompt('resume', _analyze_resume_prompt, resume_text, job_desc)
+    return call_gpt(prompt, **routed)
+
+def stream_analyze_resume(resume_text, job_desc):
+    """Streaming version of analyze_resume, yields text chunks"""
+    prompt, routed = _routed_prompt('resume', _analyze_resume_prompt, resume_text, job_desc)
+    return stream_gpt(prompt, **routed)
+
+def _generate_cover_letter_prompt(resume_text, job_desc, company_name, settings=None):
+    fields = _fit('generate_cover_letter', 'cover_letter', settings, resume_text=resume_text, job_desc=job_desc, company_name=company_name)
+    resume_text, job_desc, company_name = fields['resume_text'], fields['job_desc'], fields['company_name']
+    return f"""Write a professional cover letter for this job application:
 
 COMPANY: {company_name}
 JOB DESCRIPTION: {job_desc}
@@ -125,12 +593,21 @@ Write a compelling 3-paragraph cover letter that:
 - Uses professional tone
 
 Keep it under 300 words."""
-    
-    return call_gpt(prompt, temperature=0.8)
 
-def generate_star_examples(job_desc):
-    """Generate STAR method example answers"""
-    prompt = f"""Based on this job description, create 3 STAR method answer examples for common behavioral questions.
+def generate_cover_letter(resume_text, job_desc, company_name):
+    """Generate personalized cover letter"""
+    # Cover letters should read differently on every generation
+    prompt, routed = _routed_prompt('cover_letter', _generate_cover_letter_prompt, resume_text, job_desc, company_name)
+    return call_gpt(prompt, use_cache=False, **routed)
+
+def stream_generate_cover_letter(resume_text, job_desc, company_name):
+    """Streaming version of generate_cover_letter, yields text chunks"""
+    prompt, routed = _routed_prompt('cover_letter', _generate_cover_letter_prompt, resume_text, job_desc, company_name)
+    return stream_gpt(prompt, use_cache=False, **routed)
+
+def _generate_star_examples_prompt(job_desc, settings=None):
+    job_desc = _fit('generate_star_examples', 'star', settings, job_desc=job_desc)['job_desc']
+    return f"""Based on this job description, create 3 STAR method answer examples for common behavioral questions.
 
 Job Description:
 {job_desc}
@@ -143,30 +620,228 @@ For each example, provide:
 - Result: (outcome with metrics if possible)
 
 Make examples relevant to the job requirements."""
-    
-    return call_gpt(prompt)
+
+def generate_star_examples(job_desc):
+    """Generate STAR method example answers"""
+    prompt, routed = _routed_prompt('star', _generate_star_examples_prompt, job_desc)
+    return call_gpt(prompt, **routed)
+
+def stream_generate_star_examples(job_desc):
+    """Streaming version of generate_star_examples, yields text chunks"""
+    prompt, routed = _routed_prompt('star', _generate_star_examples_prompt, job_desc)
+    return stream_gpt(prompt, **routed)
+
+PREP_PACK_QUESTIONS = 10
+PREP_PACK_MAX_TOKENS = 3000
+PREP_PACK_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "analysis": {"type": "string"},
+        "questions": {"type": "array", "items": {
+            "type": "object",
+            "properties": {
+                "text": {"type": "string"},
+                "category": {"type": "string", "enum": list(CATEGORIES)},
+                "difficulty": {"type": "string", "enum": list(DIFFICULTIES)}
+            },
+            "required": ["text", "category", "difficulty"],
+            "additionalProperties": False
+        }},
+        "star_examples": {"type": "string"}
+    },
+    "required": ["analysis", "questions", "star_examples"],
+    "additionalProperties": False
+}
+# Models that accept a JSON schema response_format; older ones get JSON mode
+STRUCTURED_OUTPUT_MODELS = ("gpt-4o", "gpt-4.1", "o1", "o3", "o4")
+_prep_pack_cache = LRUCache(max_entries=256, ttl=None)
+
+def job_hash(job_desc):
+    """Key for a job description that ignores whitespace differences"""
+    normalized = " ".join(job_desc.split())
+    return hashlib.sha256(f"{MODEL}\n{normalized}".encode("utf-8")).hexdigest()
+
+def _prep_pack_prompt(job_desc, settings=None):
+    job_desc = _fit('generate_prep_pack', 'prep_pack', settings, job_desc=job_desc)['job_desc']
+    return f"""Create an interview prep pack for this job description.
+
+Job Description:
+{job_desc}
+
+Respond with a JSON object with exactly these keys:
+
+"analysis": markdown text covering
+1. KEY SKILLS REQUIRED: (list 5-7 main skills)
+2. EXPERIENCE LEVEL: (entry/mid/senior)
+3. COMPANY CULTURE: (what the culture seems like)
+4. MAIN RESPONSIBILITIES: (3-5 key duties)
+5. POTENTIAL CHALLENGES: (concerns or red flags)
+
+"questions": an array of {PREP_PACK_QUESTIONS} interview questions, each an object with "text" (the question, without numbering), "category" (one of: {", ".join(CATEGORIES)}) and "difficulty" (one of: {", ".join(DIFFICULTIES)}), with this mix:
+- 40% Technical/Skills questions (test specific abilities)
+- 30% Behavioral questions (STAR method situations)
+- 20% Company/Culture fit questions
+- 10% Problem-solving scenarios
+
+"star_examples": markdown text with 3 STAR method answer examples for common behavioral questions, each with
+- The Question
+- Situation: (context)
+- Task: (what needed to be done)
+- Action: (what you did)
+- Result: (outcome with metrics if possible)
+
+Be specific and actionable, and make everything relevant to the job requirements."""
+
+def _prep_pack_response_format(model):
+    if model.startswith(STRUCTURED_OUTPUT_MODELS):
+        return {"type": "json_schema",
+                "json_schema": {"name": "prep_pack", "strict": True, "schema": PREP_PACK_SCHEMA}}
+    return {"type": "json_object"}
+
+def parse_prep_pack(text):
+    """Validate a prep pack completion, returning the sections or None"""
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    analysis, star_examples = data.get('analysis'), data.get('star_examples')
+    questions = data.get('questions')
+    if not isinstance(analysis, str) or not isinstance(star_examples, str) or not isinstance(questions, list):
+        return None
+    questions = [q for q in map(validate_question, questions) if q is not None]
+    if not questions:
+        return None
+    return {'analysis': analysis.strip(), 'questions': questions, 'star_examples': star_examples.strip()}
+
+def get_prep_pack(job_desc, use_llm=True):
+    """
+    Job analysis, interview questions and STAR examples from one LLM call
+
+    The parsed pack is cached per job hash, so the Analyzer, Questions and
+    STAR pages share a single request for the same job. Returns a dict with
+    'analysis', 'questions' (question dicts, see interview_questions) and
+    'star_examples', or an "Error: ..." string.
+    With use_llm=False only the caches are checked (None on a miss).
+    """
+    start = time.perf_counter()
+    key = job_hash(job_desc)
+    pack = _prep_pack_cache.get(key)
+    if pack is not None:
+        record_call('prep_pack', MODEL, start, cache_hit=True)
+        return pack
+
+    prompt, routed, cache, cache_key = _prep_pack_request(job_desc)
+    cached = cache.get(cache_key) if cache is not None else None
+    if cached is None and not use_llm:
+        return None
+    if cached is not None:
+        record_call('prep_pack', routed['model'], start, cache_hit=True)
+        return _store_prep_pack(key, cached, cache, cache_key, cached=True)
+    text = "".join(_prep_pack_chunks(key, prompt, routed, cache, cache_key, start))
+    return _prep_pack_cache.get(key) or _store_prep_pack(key, text, None, None)
+
+def _prep_pack_request(job_desc):
+    """(prompt, call arguments from model_router, cache, cache key) for a job's prep pack"""
+    prompt, routed = _routed_prompt('prep_pack', _prep_pack_prompt, job_desc, max_tokens=PREP_PACK_MAX_TOKENS)
+    cache, cache_key = _cache_for(DEFAULT_SYSTEM_MESSAGE, prompt, routed['temperature'], None,
+                                  routed['max_tokens'], routed['model'])
+    return prompt, routed, cache, cache_key
+
+def _prep_pack_chunks(key, prompt, routed, cache, cache_key, start):
+    """
+    Stream the prep pack reply; the pack is parsed and cached once it is complete
+    Sessions opening the same job while it streams replay and follow the
+    same request instead of starting their own.
+    """
+    model = routed['model']
+
+    def open_stream():
+        chunks = []
+        for chunk in _stream_completion(prompt, DEFAULT_SYSTEM_MESSAGE, routed['temperature'], routed['max_tokens'],
+                                        model, 'prep_pack', start, None, None, _prep_pack_response_format(model)):
+            chunks.append(chunk)
+            yield chunk
+        # Only valid packs go into the response cache, so a bad reply is retried
+        _store_prep_pack(key, "".join(chunks), cache, cache_key)
+
+    chunks, shared = in_flight.stream("prep_pack:" + key, open_stream)
+    if shared:
+        record_call('prep_pack', model, start, coalesced=True)
+    return chunks
+
+class PrepPackSection:
+    """
+    Iterate to receive one section of a job's prep pack as it streams in
+
+    'analysis' and 'star_examples' yield text chunks, 'questions' yields up
+    to `limit` question dicts. Every page reads the same prep pack request:
+    a cached pack is served at once, one that is being generated is joined,
+    and otherwise the request is started here. After iteration `error` is an
+    "Error: ..." string or None; text sections also yield it, like stream_gpt.
+    """
+
+    def __init__(self, job_desc, section, limit=None):
+        self.job_desc = job_desc
+        self.section = section
+        self.limit = limit
+        self.error = None
+
+    def __iter__(self):
+        pack = get_prep_pack(self.job_desc, use_llm=False)
+        if pack is None:
+            start = time.perf_counter()
+            chunks = _prep_pack_chunks(job_hash(self.job_desc), *_prep_pack_request(self.job_desc), start)
+            if (yield from self._read(chunks)):
+                return
+            # Nothing was read from the stream: use the stored pack, if it parsed
+            pack = (get_prep_pack(self.job_desc, use_llm=False) or self.error
+                    or "Error: The prep pack response was not in the expected format")
+        if isinstance(pack, str):
+            self.error = pack
+            if self.section != 'questions':
+                yield pack
+            return
+        value = pack[self.section]
+        yield from value[:self.limit] if isinstance(value, list) else [value]
+
+    def _read(self, chunks):
+        """Yield the section's parts from the reply chunks; returns how many were yielded"""
+        reader = JSONFieldReader(self.section)
+        count = 0
+        for chunk in chunks:
+            if chunk.startswith("Error: "):
+                self.error = chunk
+                # Shown after any text already streamed, as stream_gpt does
+                if count and self.section != 'questions':
+                    yield chunk
+                return count
+            for item in reader.feed(chunk):
+                if self.section == 'questions':
+                    item = validate_question(item)
+                    if item is None:
+                        continue
+                yield item
+                count += 1
+                if count == self.limit:
+                    # The pack keeps streaming in the background and is still cached
+                    return count
+        return count
+
+def _store_prep_pack(key, text, cache, cache_key, cached=False):
+    """Parse a prep pack reply and cache it, or return an "Error: ..." string"""
+    if text.startswith("Error"):
+        return text
+    pack = parse_prep_pack(text)
+    if pack is None:
+        return "Error: The prep pack response was not in the expected format"
+    if cache is not None and not cached:
+        cache.set(cache_key, text)
+    _prep_pack_cache.set(key, pack)
+    return pack
 
 def score_answer_quality(answer):
-    """Quick scoring of answer quality"""
-    score = 5  # Base score
-    
-    # Check length
-    word_count = len(answer.split())
-    if word_count < 20:
-        score -= 2
-    elif word_count > 50:
-        score += 1
-    
-    # Check for specific examples
-    if any(word in answer.lower() for word in ['example', 'instance', 'specifically', 'when i']):
-        score += 1
-    
-    # Check for metrics/numbers
-    if re.search(r'\d+', answer):
-        score += 1
-    
-    # Check for structure
-    if any(word in answer.lower() for word in ['first', 'then', 'finally', 'resulted']):
-        score += 1
-    
-    return min(max(score, 1), 10)  # Keep between 1-10
\ No newline at end of file
+    """Quick scoring of answer quality (answer_scoring.score_answers scores many at once)"""
+    from answer_scoring import score_answers
+    return score_answers([answer])[0]
\ No newline at end of file